@@ -0,0 +1,83 @@
+"""
+Benchmark of SLD, RLD, LLD and QFIM on random full-rank states of dimension 2 to
+256, against the previous implementation with the double loop over the entries
+in the eigenbasis.
+
+Run as `python benchmarks/bench_LD.py` with the package installed.
+"""
+
+import timeit
+import numpy as np
+from quanestimation import SLD, RLD, LLD, QFIM
+
+dims = [2, 4, 8, 16, 32, 64, 128, 256]
+para_num = 3
+# the loop implementation is only timed up to this dimension
+reference_max = 256
+
+
+def SLD_loop(rho, drho, eps=1e-8):
+    # the previous SLD for mixed states in the original basis
+    dim = len(rho)
+    val, vec = np.linalg.eig(rho)
+    val = np.real(val)
+    SLD_res = []
+    for para_i in range(len(drho)):
+        SLD_eig = np.array([[0.0 + 0.0 * 1.0j for i in range(dim)] for i in range(dim)])
+        for fi in range(dim):
+            for fj in range(dim):
+                if np.abs(val[fi] + val[fj]) > eps:
+                    SLD_eig[fi][fj] = (
+                        2
+                        * np.dot(vec[:, fi].conj().transpose(), np.dot(drho[para_i], vec[:, fj]))
+                        / (val[fi] + val[fj])
+                    )
+        SLD_res.append(np.dot(vec, np.dot(SLD_eig, vec.conj().transpose())))
+    return SLD_res
+
+
+def QFIM_loop(rho, drho, eps=1e-8):
+    SLD_res = SLD_loop(rho, drho, eps)
+    F = np.array([[np.real(np.trace(rho @ (La @ Lb + Lb @ La))) / 2 for Lb in SLD_res] for La in SLD_res])
+    return F
+
+
+def random_state(dim, rng):
+    A = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+    rho = A @ A.conj().T
+    rho = rho / np.trace(rho)
+    drho = []
+    for i in range(para_num):
+        B = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+        B = B + B.conj().T
+        drho.append(B - np.trace(B) / dim * np.identity(dim))
+    return rho, drho
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print("{:>5} {:>12} {:>12} {:>12} {:>12} {:>12} {:>10} {:>10}".format(
+        "dim", "SLD [s]", "RLD [s]", "LLD [s]", "QFIM [s]", "loop [s]", "speedup", "rel diff"))
+    for dim in dims:
+        rho, drho = random_state(dim, rng)
+        number = max(1, 2000 // dim**2)
+        t_SLD = best(lambda: SLD(rho, drho), number)
+        t_RLD = best(lambda: RLD(rho, drho), number)
+        t_LLD = best(lambda: LLD(rho, drho), number)
+        t_QFIM = best(lambda: QFIM(rho, drho), number)
+        if dim <= reference_max:
+            t_loop = min(timeit.repeat(lambda: QFIM_loop(rho, drho), number=1, repeat=1))
+            F = QFIM(rho, drho)
+            diff = np.max(np.abs(F - QFIM_loop(rho, drho))) / np.max(np.abs(F))
+            ref = "{:12.3e} {:10.1f} {:10.1e}".format(t_loop, t_loop / t_QFIM, diff)
+        else:
+            ref = "{:>12} {:>10} {:>10}".format("-", "-", "-")
+        print("{:5d} {:12.3e} {:12.3e} {:12.3e} {:12.3e} {}".format(dim, t_SLD, t_RLD, t_LLD, t_QFIM, ref))
+
+
+if __name__ == "__main__":
+    main()
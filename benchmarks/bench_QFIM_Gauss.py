@@ -0,0 +1,133 @@
+"""
+Benchmark of QFIM_Gauss and QFIM_Gauss_batch on random multi-mode gaussian states,
+against the previous implementation with the nested loops over the parameters,
+modes and the four generators. The accuracy of both is measured against the closed
+form with the vectorized covariance matrices, in the normalization of QFIM_Gauss.
+The previous implementation paired the symplectic eigenvalues with the Schur
+vectors in the wrong order, it is only correct for a single mode.
+
+Run as `python benchmarks/bench_QFIM_Gauss.py` with the package installed.
+"""
+
+import timeit
+import numpy as np
+from numpy.linalg import inv
+from scipy.linalg import sqrtm, schur, eigvals, expm
+from quanestimation import QFIM_Gauss, QFIM_Gauss_batch
+
+modes = [1, 2, 5, 10, 20, 50, 100, 200]
+# the closed form inverts a (2m)^2 x (2m)^2 matrix
+closed_max = 50
+para_num = 2
+# the loop implementation is only timed up to this number of modes
+reference_max = 20
+batch_size = 1000
+
+
+def QFIM_Gauss_loop(R, dR, D, dD):
+    # the previous QFIM_Gauss
+    para_num = len(dR)
+    m = int(len(R) / 2)
+    QFIM_res = np.zeros([para_num, para_num])
+
+    C = np.array([[D[i][j] - R[i] * R[j] for j in range(2 * m)] for i in range(2 * m)])
+    dC = [
+        np.array([[dD[k][i][j] - dR[k][i] * R[j] - R[i] * dR[k][j] for j in range(2 * m)] for i in range(2 * m)])
+        for k in range(para_num)
+    ]
+
+    C_sqrt = sqrtm(C)
+    J = np.kron([[0, 1], [-1, 0]], np.eye(m))
+    B = C_sqrt @ J @ C_sqrt
+    P = np.eye(2 * m)
+    P = np.vstack([P[:][::2], P[:][1::2]])
+    T, Q = schur(B)
+    vals = eigvals(B)
+    c = vals[::2].imag
+    Diag = np.diagflat(c**-0.5)
+    S = inv(J @ C_sqrt @ Q @ P @ np.kron([[0, 1], [-1, 0]], -Diag)).T @ P.T
+
+    sx = np.array([[0.0, 1.0], [1.0, 0.0]])
+    sy = np.array([[0.0, -1.0j], [1.0j, 0.0]])
+    sz = np.array([[1.0, 0.0], [0.0, -1.0]])
+    a_Gauss = [1j * sy, sz, np.eye(2), sx]
+
+    es = [[np.eye(1, m**2, m * i + j).reshape(m, m) for j in range(m)] for i in range(m)]
+
+    As = [[np.kron(s, a_Gauss[i]) / np.sqrt(2) for s in es] for i in range(4)]
+    gs = [[[[np.trace(inv(S) @ dC @ inv(S.T) @ aa.T) for aa in a] for a in A] for A in As] for dC in dC]
+    G = [np.zeros((2 * m, 2 * m)).astype(np.longdouble) for _ in range(para_num)]
+
+    for i in range(para_num):
+        for j in range(m):
+            for k in range(m):
+                for l in range(4):
+                    G[i] += np.real(
+                        gs[i][l][j][k] / (4 * c[j] * c[k] + (-1) ** (l + 1)) * inv(S.T) @ As[l][j][k] @ inv(S)
+                    )
+
+    QFIM_res += np.real(
+        [[np.trace(G[i] @ dC[j]) + dR[i] @ inv(C) @ dR[j] for j in range(para_num)] for i in range(para_num)]
+    )
+    return QFIM_res
+
+
+def QFIM_Gauss_closed(R, dR, D, dD):
+    # vec(dC_a)^T (4 C x C - J x J)^(-1) vec(dC_b) + dR_a^T C^(-1) dR_b
+    m = len(R) // 2
+    C = D - np.outer(R, R)
+    dC = dD - np.einsum("ai,j->aij", dR, R) - np.einsum("i,aj->aij", R, dR)
+    J = np.kron([[0, 1], [-1, 0]], np.eye(m))
+    vec = dC.reshape(len(dR), -1)
+    return vec @ np.linalg.solve(4 * np.kron(C, C) - np.kron(J, J), vec.T) + dR @ np.linalg.solve(C, dR.T)
+
+
+def random_state(m, rng):
+    # a thermal state under a random symplectic transformation
+    J = np.kron([[0, 1], [-1, 0]], np.eye(m))
+    H = rng.normal(size=(2 * m, 2 * m)) / (2 * m)
+    S = expm(J @ (H + H.T))
+    nu = np.concatenate([0.5 + rng.random(m)] * 2)
+    R = rng.normal(size=2 * m)
+    D = S @ np.diag(nu) @ S.T + np.outer(R, R)
+    dR = rng.normal(size=(para_num, 2 * m))
+    dD = rng.normal(size=(para_num, 2 * m, 2 * m))
+    dD = dD + dD.transpose(0, 2, 1)
+    return R, dR, D, dD
+
+
+def best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print("{:>6} {:>12} {:>12} {:>10} {:>10} {:>10}".format(
+        "modes", "QFIM [s]", "loop [s]", "speedup", "rel err", "loop err"))
+    for m in modes:
+        R, dR, D, dD = random_state(m, rng)
+        F = QFIM_Gauss(R, dR, D, dD)
+        t_new = best(lambda: QFIM_Gauss(R, dR, D, dD), max(1, 200 // m**2))
+        F_closed = QFIM_Gauss_closed(R, dR, D, dD) if m <= closed_max else None
+        err = "-" if F_closed is None else "{:.1e}".format(np.max(np.abs(F - F_closed)) / np.max(np.abs(F_closed)))
+        if m <= reference_max:
+            t_loop = best(lambda: QFIM_Gauss_loop(R, dR, D, dD), 1)
+            F_loop = QFIM_Gauss_loop(R, dR, D, dD)
+            loop_err = np.max(np.abs(F_loop - F_closed)) / np.max(np.abs(F_closed))
+            ref = "{:12.3e} {:10.1f} {:>10} {:10.1e}".format(t_loop, t_loop / t_new, err, loop_err)
+        else:
+            ref = "{:>12} {:>10} {:>10} {:>10}".format("-", "-", err, "-")
+        print("{:6d} {:12.3e} {}".format(m, t_new, ref))
+
+    # a batch of two-mode states, against the loop and against QFIM_Gauss on every state
+    states = [random_state(2, rng) for _ in range(batch_size)]
+    R, dR, D, dD = [np.array(arr) for arr in zip(*states)]
+    t_batch = best(lambda: QFIM_Gauss_batch(R, dR, D, dD), 1)
+    t_loop = best(lambda: [QFIM_Gauss_loop(*state) for state in states], 1)
+    diff = np.max(np.abs(QFIM_Gauss_batch(R, dR, D, dD) - [QFIM_Gauss(*state) for state in states]))
+    print("\n{} two-mode states: batch {:.3e} s, loop {:.3e} s, speedup {:.1f}, max diff to QFIM_Gauss {:.1e}".format(
+        batch_size, t_batch, t_loop, t_loop / t_batch, diff))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of HCRB and NHB on a 100-point parameter sweep of a qutrit. The cached
+parameterized cvxpy problems, which are canonicalized once and then only receive
+new parameter values and the previous solution as the warm start, are compared
+with building the same problems at every point.
+
+Run as `python benchmarks/bench_SDP_sweep.py [solver ...]` with the package installed.
+"""
+
+import sys
+import time
+import numpy as np
+from scipy.linalg import expm
+from quanestimation import HCRB, NHB, QFIM
+from quanestimation.AsymptoticBound import AnalogCramerRao
+
+points = 100
+W = np.diag([1.0, 2.0])
+
+
+def sweep_states():
+    # a mixed qutrit rotated by exp(-i x_1 J_x) and then exp(-i x_2 J_z), swept in x_1
+    Jx = np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]) / np.sqrt(2)
+    Jz = np.diag([1.0, 0.0, -1.0])
+    rho0 = np.diag([0.6, 0.3, 0.1]).astype(np.complex128)
+    U2 = expm(-1j * 0.3 * Jz)
+    states = []
+    for x1 in np.linspace(0.1, np.pi / 2, points):
+        U1 = expm(-1j * x1 * Jx)
+        rho1 = U1 @ rho0 @ U1.conj().T
+        rho = U2 @ rho1 @ U2.conj().T
+        drho = [U2 @ (-1j * (Jx @ rho1 - rho1 @ Jx)) @ U2.conj().T, -1j * (Jz @ rho - rho @ Jz)]
+        states.append((rho, drho))
+    return states
+
+
+def run(func, states, cache=None):
+    values, times = [], []
+    for rho, drho in states:
+        if cache is not None:
+            cache.clear()
+        start = time.perf_counter()
+        values.append(func(rho, drho))
+        times.append(time.perf_counter() - start)
+    return np.array(values), np.array(times)
+
+
+def main():
+    solvers = sys.argv[1:] or [None]
+    states = sweep_states()
+    C_S = np.array([np.trace(W @ np.linalg.inv(QFIM(rho, drho))) for rho, drho in states])
+    print("{} points, dim 3, 2 parameters".format(points))
+    print("{:>9} {:>6} {:>14} {:>12} {:>12} {:>9} {:>9}".format(
+        "solver", "bound", "uncached [s]", "first [s]", "cached [s]", "speedup", "max diff"))
+    for solver in solvers:
+        cases = [
+            ("HCRB", lambda rho, drho: HCRB(rho, drho, W, solver=solver, method="SDP"), AnalogCramerRao._HCRB_problems),
+            ("NHB", lambda rho, drho: NHB(rho, drho, W, solver=solver), AnalogCramerRao._NHB_problems),
+        ]
+        values = {}
+        for name, func, cache in cases:
+            value_fresh, t_fresh = run(func, states, cache)
+            cache.clear()
+            # the first call compiles the problem, the others only update the parameters
+            value_cached, t_cached = run(func, states)
+            values[name] = value_cached
+            print("{:>9} {:>6} {:14.3e} {:12.3e} {:12.3e} {:9.1f} {:9.1e}".format(
+                str(solver), name, t_fresh.mean(), t_cached[0], t_cached[1:].mean(),
+                t_fresh.mean() / t_cached[1:].mean(), np.max(np.abs(value_fresh - value_cached) / value_fresh)))
+        # Tr(WF^{-1}) <= HCRB <= NHB on every point, up to the solver tolerance
+        tol = 1e-4 * values["NHB"]
+        ordered = np.all(C_S <= values["HCRB"] + tol) and np.all(values["HCRB"] <= values["NHB"] + tol)
+        print("{:>9} Tr(WF^-1) <= HCRB <= NHB on all points: {}".format("", ordered))
+
+
+if __name__ == "__main__":
+    main()
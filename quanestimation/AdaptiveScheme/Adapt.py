@@ -3,9 +3,7 @@ from scipy.integrate import simps
 from itertools import product
 
 from quanestimation.Common.Common import extract_ele, SIC
-from quanestimation.MeasurementOpt.MeasurementStruct import MeasurementOpt
-from quanestimation.Parameterization.GeneralDynamics import Lindblad
-from quanestimation.AsymptoticBound.CramerRao import QFIM, CFIM
+from quanestimation.AsymptoticBound.CramerRao import QFIM, CFIM_batch, QFIM_batch
 
 
 class Adapt:
@@ -207,6 +205,10 @@ class Adapt:
             -- Weight matrix.
         """
 
+        # the Julia-backed tools are imported here to keep `import quanestimation` light
+        from quanestimation.MeasurementOpt.MeasurementStruct import MeasurementOpt
+        from quanestimation.Parameterization.GeneralDynamics import Lindblad
+
         if W == []:
             W = np.identity(self.para_num)
         else:
@@ -214,7 +216,7 @@ class Adapt:
 
         if self.dynamic_type == "dynamics":
             if self.para_num == 1:
-                F = []
+                rho_all, drho_all = [], []
                 if self.dyn_method == "expm":
                     for i in range(len(self.H)):
                         dynamics = Lindblad(
@@ -227,9 +229,8 @@ class Adapt:
                             ctrl=self.ctrl,
                         )
                         rho_tp, drho_tp = dynamics.expm()
-                        rho, drho = rho_tp[-1], drho_tp[-1]
-                        F_tp = QFIM(rho, drho)
-                        F.append(F_tp)
+                        rho_all.append(rho_tp[-1])
+                        drho_all.append(drho_tp[-1])
                 elif self.dyn_method == "ode":
                     for i in range(len(self.H)):
                         dynamics = Lindblad(
@@ -242,9 +243,9 @@ class Adapt:
                             ctrl=self.ctrl,
                         )
                         rho_tp, drho_tp = dynamics.ode()
-                        rho, drho = rho_tp[-1], drho_tp[-1]
-                        F_tp = QFIM(rho, drho)
-                        F.append(F_tp)
+                        rho_all.append(rho_tp[-1])
+                        drho_all.append(drho_tp[-1])
+                F = QFIM_batch(rho_all, drho_all)[:, 0, 0]
                 idx = np.argmax(F)
                 H_res, dH_res = self.H[idx], self.dH[idx]
             else:
@@ -258,45 +259,43 @@ class Adapt:
                     H_list.append(H_ele)
                     dH_list.append(dH_ele)
 
-                F = []
+                rho_all, drho_all = [], []
                 if self.dyn_method == "expm":
                     for i in range(len(p_list)):
                         dynamics = Lindblad(
                             self.tspan,
                             self.rho0,
-                            self.H_list[i],
-                            self.dH_list[i],
+                            H_list[i],
+                            dH_list[i],
                             decay=self.decay,
                             Hc=self.Hc,
                             ctrl=self.ctrl,
                         )
                         rho_tp, drho_tp = dynamics.expm()
-                        rho, drho = rho_tp[-1], drho_tp[-1]
-                        F_tp = QFIM(rho, drho)
-                        if np.linalg.det(F_tp) < self.eps:
-                            F.append(self.eps)
-                        else:
-                            F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
+                        rho_all.append(rho_tp[-1])
+                        drho_all.append(drho_tp[-1])
                 elif self.dyn_method == "ode":
                     for i in range(len(p_list)):
                         dynamics = Lindblad(
                             self.tspan,
                             self.rho0,
-                            self.H_list[i],
-                            self.dH_list[i],
+                            H_list[i],
+                            dH_list[i],
                             decay=self.decay,
                             Hc=self.Hc,
                             ctrl=self.ctrl,
                         )
                         rho_tp, drho_tp = dynamics.ode()
-                        rho, drho = rho_tp[-1], drho_tp[-1]
-                        F_tp = QFIM(rho, drho)
-                        if np.linalg.det(F_tp) < self.eps:
-                            F.append(self.eps)
-                        else:
-                            F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
+                        rho_all.append(rho_tp[-1])
+                        drho_all.append(drho_tp[-1])
+                F = []
+                for F_tp in QFIM_batch(rho_all, drho_all):
+                    if np.linalg.det(F_tp) < self.eps:
+                        F.append(self.eps)
+                    else:
+                        F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
                 idx = np.argmax(F)
-                H_res, dH_res = self.H_list[idx], self.dH_list[idx]
+                H_res, dH_res = H_list[idx], dH_list[idx]
             m = MeasurementOpt(mtype="projection", minput=[], method="DE")
             m.dynamics(
                 self.tspan,
@@ -378,6 +377,7 @@ class Adapt:
             )
     
 def adaptive_dynamics(x, p, M, tspan, rho0, H, dH, decay, Hc, ctrl, W, max_episode, eps, savefile, method, dyn_method="expm"):
+    from quanestimation.Parameterization.GeneralDynamics import Lindblad
 
     para_num = len(x)
     dim = np.shape(rho0)[0]
@@ -385,23 +385,21 @@ def adaptive_dynamics(x, p, M, tspan, rho0, H, dH, decay, Hc, ctrl, W, max_episo
         #### singleparameter senario ####
         p_num = len(p)
 
-        F = []
-        rho_all = []
+        rho_all, drho_all = [], []
         if dyn_method == "expm":
             for hi in range(p_num):
                 dynamics = Lindblad(tspan, rho0, H[hi], dH[hi], decay=decay, Hc=Hc, ctrl=ctrl)
                 rho_tp, drho_tp = dynamics.expm()
-                F_tp = CFIM(rho_tp[-1], drho_tp[-1], M)
-                F.append(F_tp)
                 rho_all.append(rho_tp[-1])
+                drho_all.append(drho_tp[-1])
         elif dyn_method == "ode":
             for hi in range(p_num):
                 dynamics = Lindblad(tspan, rho0, H[hi], dH[hi], decay=decay, Hc=Hc, ctrl=ctrl)
                 rho_tp, drho_tp = dynamics.ode()
-                F_tp = CFIM(rho_tp[-1], drho_tp[-1], M)
-                F.append(F_tp)
                 rho_all.append(rho_tp[-1])
-        
+                drho_all.append(drho_tp[-1])
+        F = CFIM_batch(rho_all, drho_all, M)[:, 0, 0]
+
         u = 0.0
         if method == "FOP":
             idx = np.argmax(F)
@@ -450,28 +448,25 @@ def adaptive_dynamics(x, p, M, tspan, rho0, H, dH, decay, Hc, ctrl, W, max_episo
             dH_list.append(dH_ele)
 
         p_num = len(p_list)
-        F = []
-        rho_all = []
+        rho_all, drho_all = [], []
         if dyn_method == "expm":
             for hi in range(p_num):
                 dynamics = Lindblad(tspan, rho0, H_list[hi], dH_list[hi], decay=decay, Hc=Hc, ctrl=ctrl)
                 rho_tp, drho_tp = dynamics.expm()
-                F_tp = CFIM(rho_tp[-1], drho_tp[-1], M)
-                if np.linalg.det(F_tp) < eps:
-                    F.append(eps)
-                else:
-                    F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
                 rho_all.append(rho_tp[-1])
+                drho_all.append(drho_tp[-1])
         elif dyn_method == "ode":
             for hi in range(p_num):
                 dynamics = Lindblad(tspan, rho0, H_list[hi], dH_list[hi], decay=decay, Hc=Hc, ctrl=ctrl)
                 rho_tp, drho_tp = dynamics.ode()
-                F_tp = CFIM(rho_tp[-1], drho_tp[-1], M)
-                if np.linalg.det(F_tp) < eps:
-                    F.append(eps)
-                else:
-                    F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
                 rho_all.append(rho_tp[-1])
+                drho_all.append(drho_tp[-1])
+        F = []
+        for F_tp in CFIM_batch(rho_all, drho_all, M):
+            if np.linalg.det(F_tp) < eps:
+                F.append(eps)
+            else:
+                F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
 
         u = [0.0 for i in range(para_num)]
         if method == "FOP":
@@ -509,14 +504,13 @@ def adaptive_Kraus(x, p, M, rho0, K, dK, W, max_episode, eps, savefile, method):
     if para_num == 1:
         #### singleparameter senario ####
         p_num = len(p)
-        F = []
-        rho_all = []
+        rho_all, drho_all = [], []
         for hi in range(p_num):
             rho_tp = sum([np.dot(Ki, np.dot(rho0, Ki.conj().T)) for Ki in K[hi]])
             drho_tp = [sum([(np.dot(dKi, np.dot(rho0, Ki.conj().T)) + np.dot(Ki, np.dot(rho0, dKi.conj().T))) for (Ki, dKi) in zip(K[hi], dKj)]) for dKj in dK[hi]]
-            F_tp = CFIM(rho_tp, drho_tp, M)
-            F.append(F_tp)
             rho_all.append(rho_tp)
+            drho_all.append(drho_tp)
+        F = CFIM_batch(rho_all, drho_all, M)[:, 0, 0]
 
         u = 0.0
         if method == "FOP":
@@ -564,18 +558,19 @@ def adaptive_Kraus(x, p, M, rho0, K, dK, W, max_episode, eps, savefile, method):
             dK_list.append(dK_ele)
         k_num = len(K_list[0])
         p_num = len(p_list)
-        F = []
-        rho_all = []
+        rho_all, drho_all = [], []
         for hi in range(p_num):
             rho_tp = sum([np.dot(Ki, np.dot(rho0, Ki.conj().T)) for Ki in K_list[hi]])
             dK_reshape = [[dK_list[hi][i][j] for i in range(k_num)] for j in range(para_num)]
             drho_tp = [sum([np.dot(dKi, np.dot(rho0, Ki.conj().T))+ np.dot(Ki, np.dot(rho0, dKi.conj().T)) for (Ki, dKi) in zip(K_list[hi], dKj)]) for dKj in dK_reshape]
-            F_tp = CFIM(rho_tp, drho_tp, M)
+            rho_all.append(rho_tp)
+            drho_all.append(drho_tp)
+        F = []
+        for F_tp in CFIM_batch(rho_all, drho_all, M):
             if np.linalg.det(F_tp) < eps:
                 F.append(eps)
             else:
                 F.append(1.0 / np.trace(np.dot(W, np.linalg.inv(F_tp))))
-            rho_all.append(rho_tp)
 
         if method == "FOP":
             F = np.array(F).reshape(p_shape)
@@ -1,5 +1,5 @@
 import numpy as np
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 from quanestimation.Common.Common import brgd, annihilation
 
 
@@ -1,13 +1,21 @@
+import time
 import numpy as np
 import scipy as sp
-import cvxpy as cp
+from functools import lru_cache
 from quanestimation.Common.Common import suN_generator
-from quanestimation.AsymptoticBound.CramerRao import QFIM
+from quanestimation.AsymptoticBound.StateAnalysis import StateAnalysis
+from quanestimation.AsymptoticBound.CramerRao import QFIM_batch, _batch_check
 from numpy.linalg import matrix_rank
 
+# cached cvxpy problems of HCRB and NHB, keyed by the problem sizes
+_HCRB_problems = {}
+_NHB_problems = {}
+# statuses of HCRB_batch and NHB_batch which are not retried
+_SDP_accepted = ["optimal", "optimal_inaccurate", "analytic"]
 
-def HCRB(rho, drho, W, eps=1e-8):
-    """
+
+def HCRB(rho, drho, W, eps=1e-8, solver=None, method="auto"):
+    r"""
     Calculation of the Holevo Cramer-Rao bound (HCRB) via the semidefinite program (SDP).
 
     Parameters
@@ -26,6 +34,27 @@ def HCRB(rho, drho, W, eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **solver:** `string`
+        -- The cvxpy solver used for the SDP, for example "SCS" or "CLARABEL". The
+        default solver of cvxpy is used if it is None.
+
+    > **method:** `string`
+        -- The method of the calculation. Options are:  
+        "auto" (default) -- "analytic" if a closed form is available, otherwise 
+        "support" for rank-deficient states and "SDP" for full-rank states.  
+        "analytic" -- the closed forms for qubits in terms of the SLD based QFIM $F$ 
+        and $D_{ab}=\mathrm{Im}\,\mathrm{Tr}(\rho L_a L_b)$. For three parameters 
+        or pure states it is $\mathrm{Tr}(WF^{-1})+\mathrm{Tr}|\sqrt{W}F^{-1}DF^{-1}\sqrt{W}|$,
+        and for two parameters of a mixed state it is the formula of Suzuki 
+        [J. Math. Phys. 57, 042201 (2016)] which also involves the RLD based QFIM.  
+        "SDP" -- the observables are expanded in the $d^2$ operators 
+        $\{I, \lambda_i\}/\sqrt{2}$ with $\lambda_i$ the SU($d$) generators.  
+        "support" -- the observables are restricted to the support of rho and the 
+        blocks between the support and the kernel, and the linear matrix inequality 
+        is built from $\sqrt{\rho}$. For a state of rank $r$ the SDP has 
+        $2dr-r^2$ variables per parameter and an LMI of size $dr$ instead of $d^2$,
+        with the same value as "SDP".
+
     Returns
     ----------
     **HCRB:** `float`
@@ -35,61 +64,163 @@ def HCRB(rho, drho, W, eps=1e-8):
     if type(drho) != list:
         raise TypeError("Please make sure drho is a list!")
 
+    return _HCRB(StateAnalysis(rho, drho, eps=eps), W, solver=solver, method=method)
+
+
+def _HCRB(state, W, solver=None, method="auto", info=None):
+    # info, if given, receives the status of the solution
+    rho, drho, eps = state.rho, state.drho, state.eps
+
+    if method not in ["auto", "analytic", "SDP", "support"]:
+        raise ValueError("{!r} is not a valid value for method, supported values are 'auto', 'analytic', 'SDP' and 'support'.".format(method))
+
     if len(drho) == 1:
         print(
             "In single parameter scenario, HCRB is equivalent to QFI. This function will return the value of QFI."
         )
-        f = QFIM(rho, drho, eps=eps)
+        f = state.QFIM()
         return f
     elif matrix_rank(W) == 1:
         print(
             "For rank-one weight matrix, the HCRB is equivalent to QFIM. This function will return the value of Tr(WF^{-1})."
         )
-        F = QFIM(rho, drho, eps=eps)
+        F = state.QFIM()
         return np.trace(np.dot(W, np.linalg.pinv(F)))
     else:
-        dim = len(rho)
-        num = dim * dim
+        if method in ["auto", "analytic"]:
+            HCRB_res = _HCRB_analytic(state, W)
+            if HCRB_res is not None:
+                if info is not None:
+                    info["status"] = "analytic"
+                return HCRB_res
+            elif method == "analytic":
+                raise ValueError("The closed form of HCRB is only available for qubit states with two parameters, or three parameters of a mixed state.")
+            method = "support" if np.any(state.eigen[0] <= eps) else "SDP"
+
+        import cvxpy as cp
+
         para_num = len(drho)
+        if method == "support":
+            R, vec_drho = _HCRB_support(state)
+        else:
+            dim = len(rho)
+            Lambda = _Lambda(dim)
+            # vec_drho[a, i] = Re Tr(drho_a Lambda_i) and S[i, j] = Tr(Lambda_i Lambda_j rho)
+            vec_drho = np.real(np.einsum("akl,ilk->ai", np.array(drho), Lambda))
+            Lambda_rho = Lambda @ rho
+            S = np.einsum("ikl,jlk->ij", Lambda, Lambda_rho, optimize=True)
 
-        Lambda = [np.identity(dim)] + suN_generator(dim)
-        Lambda = Lambda / np.sqrt(2)
+            accu = len(str(int(1 / eps))) - 1
+            lu, d, perm = sp.linalg.ldl(S.round(accu))
+            R = np.dot(lu, sp.linalg.sqrtm(d)).conj().T
+        prob, params = _HCRB_problem(*R.shape, para_num)
+        _set_complex(params["R"], R)
+        params["vec_drho"].value = vec_drho.T
+        params["W"].value = np.array(W, dtype=np.float64)
+        # the variables keep the solution of the previous call as the warm start
+        prob.solve(solver=solver, warm_start=True)
+        if info is not None:
+            info["status"] = prob.status
 
-        vec_drho = [[] for i in range(para_num)]
-        for pi in range(para_num):
-            vec_drho[pi] = np.array(
-                [
-                    np.real(np.trace(np.dot(drho[pi], Lambda[i])))
-                    for i in range(len(Lambda))
-                ]
-            )
+        return prob.value
+
+
+def _HCRB_analytic(state, W):
+    # closed forms for qubits, None if there is none for the model
+    para_num = len(state.drho)
+    rank = np.count_nonzero(state.eigen[0] > state.eps)
+    if len(state.rho) != 2 or para_num > 3 or (rank == 1 and para_num != 2):
+        return None
 
-        S = np.zeros((num, num), dtype=np.complex128)
-        for a in range(num):
-            for b in range(num):
-                S[a][b] = np.trace(np.dot(Lambda[a], np.dot(Lambda[b], rho)))
+    w, v = np.linalg.eigh(np.array(W, dtype=np.float64))
+    W_sqrt = np.dot(v * np.sqrt(np.abs(w)), v.T)
+    # TrAbs(W A) for an antisymmetric A, i.e., the sum of |eigenvalues| of sqrt(W) A sqrt(W)
+    trabs = lambda A: np.sum(np.abs(np.linalg.eigvalsh(1j * W_sqrt @ A @ W_sqrt)))
 
-        accu = len(str(int(1 / eps))) - 1
-        lu, d, perm = sp.linalg.ldl(S.round(accu))
-        R = np.dot(lu, sp.linalg.sqrtm(d)).conj().T
+    F_inv = np.linalg.inv(state.QFIM())
+    SLD = state._SLD("eigen")
+    D = np.imag(np.einsum("i,aij,bji->ab", state.eigen[0], SLD, SLD))
+    C_S = np.trace(np.dot(W, F_inv))
+    C_Z = C_S + trabs(F_inv @ D @ F_inv)
+    if para_num == 3 or rank == 1:
+        return C_Z
+
+    # two parameters of a mixed qubit state
+    FR_inv = np.linalg.inv(state.QFIM(LDtype="RLD"))
+    C_R = np.trace(np.dot(W, np.real(FR_inv))) + trabs(np.imag(FR_inv))
+    if C_R >= (C_Z + C_S) / 2:
+        return C_R
+    else:
+        return C_R + ((C_Z + C_S) / 2 - C_R) ** 2 / (C_Z - C_R)
+
+
+@lru_cache(maxsize=None)
+def _Lambda(dim):
+    # orthonormal operator basis {I, SU(dim) generators}/sqrt(2) as a (dim^2, dim, dim) tensor
+    Lambda = np.array([np.identity(dim)] + suN_generator(dim), dtype=np.complex128) / np.sqrt(2)
+    Lambda.setflags(write=False)
+    return Lambda
+
+
+def _HCRB_support(state):
+    # Hermitian operators in the eigenbasis of rho with a vanishing kernel-kernel block,
+    # which neither enters Tr(rho X_a X_b) nor Tr(drho_b X_a) as that block of drho is 
+    # zero. Tr(rho X_a X_b) = <sqrt(rho) X_a, sqrt(rho) X_b>, so R maps the coefficients 
+    # of X to the (dim, rank) matrix X sqrt(rho) restricted to the support.
+    val, vec = state.eigen
+    support = val > state.eps
+    order = np.concatenate([np.flatnonzero(support), np.flatnonzero(~support)])
+    val = val[order]
+    drho_eig = state.drho_eig[:, order][:, :, order]
+    dim, rank = len(val), np.count_nonzero(support)
+
+    rows, cols = np.triu_indices(dim, 1)
+    mask = rows < rank
+    rows, cols = rows[mask], cols[mask]
+    pair = np.arange(len(rows))
+    Gamma = np.zeros((rank + 2 * len(rows), dim, dim), dtype=np.complex128)
+    Gamma[np.arange(rank), np.arange(rank), np.arange(rank)] = 1.0
+    Gamma[rank + pair, rows, cols] = Gamma[rank + pair, cols, rows] = 1 / np.sqrt(2)
+    Gamma[rank + len(rows) + pair, rows, cols] = 1j / np.sqrt(2)
+    Gamma[rank + len(rows) + pair, cols, rows] = -1j / np.sqrt(2)
+
+    vec_drho = np.real(np.einsum("akl,ilk->ai", drho_eig, Gamma))
+    R = (Gamma[:, :, :rank] * np.sqrt(val[:rank])).reshape(len(Gamma), -1).T
+    return R, vec_drho
+
+
+def _HCRB_problem(rows, num, para_num):
+    # the SDP depends on the state and the weight matrix only through parameters,
+    # so it is canonicalized once for every shape of R and para_num and reused
+    import cvxpy as cp
+
+    key = (rows, num, para_num)
+    if key not in _HCRB_problems:
+        params = {
+            "R": _complex_parameter((rows, num)),
+            "vec_drho": cp.Parameter((num, para_num)),
+            "W": cp.Parameter((para_num, para_num)),
+        }
         # ============optimization variables================
         V = cp.Variable((para_num, para_num))
         X = cp.Variable((num, para_num))
         # ================add constraints===================
-        constraints = [cp.bmat([[V, X.T @ R.conj().T], [R @ X, np.identity(num)]]) >> 0]
-        for i in range(para_num):
-            for j in range(para_num):
-                if i == j:
-                    constraints += [X[:, i].T @ vec_drho[j] == 1]
-                else:
-                    constraints += [X[:, i].T @ vec_drho[j] == 0]
+        # [[V, (RX)^\dagger], [RX, I]] >> 0 in its real form [[A, -B], [B, A]] >> 0
+        # with A and B the real and imaginary parts
+        R_re, R_im = params["R"]
+        zero = np.zeros((para_num, para_num))
+        A = cp.bmat([[V, (R_re @ X).T], [R_re @ X, np.identity(rows)]])
+        B = cp.bmat([[zero, -(R_im @ X).T], [R_im @ X, np.zeros((rows, rows))]])
+        constraints = [
+            cp.bmat([[A, -B], [B, A]]) >> 0,
+            X.T @ params["vec_drho"] == np.identity(para_num),
+        ]
+        prob = cp.Problem(cp.Minimize(cp.trace(params["W"] @ V)), constraints)
+        _HCRB_problems[key] = (prob, params)
+    return _HCRB_problems[key]
 
-        prob = cp.Problem(cp.Minimize(cp.trace(W @ V)), constraints)
-        prob.solve()
-
-        return prob.value
 
-def NHB(rho, drho, W):
+def NHB(rho, drho, W, solver=None):
     """
     Calculation of the Nagaoka-Hayashi bound (NHB) via the semidefinite program (SDP).
 
@@ -106,32 +237,270 @@ def NHB(rho, drho, W):
     > **W:** `matrix`
         -- Weight matrix.
 
+    > **solver:** `string`
+        -- The cvxpy solver used for the SDP, for example "SCS" or "CLARABEL". The
+        default solver of cvxpy is used if it is None.
+
     Returns
     ----------
     **NHB:** `float`
         -- The value of Nagaoka-Hayashi bound.
     """
+
+    return _NHB(rho, drho, W, solver=solver)
+
+
+def _NHB(rho, drho, W, solver=None, info=None):
     dim = len(rho)
     para_num = len(drho)
-    
-    L_tp = [[[] for i in range(para_num)] for j in range(para_num)]
+
+    prob, params = _NHB_problem(dim, para_num)
+    _set_complex(params["rho"], rho)
     for para_i in range(para_num):
-        for para_j in range(para_i, para_num):
-            L_tp[para_i][para_j] = cp.Variable((dim, dim), hermitian=True)
-            L_tp[para_j][para_i] = L_tp[para_i][para_j]
-    L = cp.vstack([cp.hstack(L_tp[i]) for i in range(para_num)])
-    X = [cp.Variable((dim, dim), hermitian=True) for j in range(para_num)]
-    
-    constraints = [cp.bmat([[L, cp.vstack(X)], [cp.hstack(X), np.identity(dim)]])  >> 0]
-    
-    for i in range(para_num):
-        constraints += [cp.trace(X[i] @ rho) == 0]
-        for j in range(para_num):
-            if i == j:
-                constraints += [cp.trace(X[i] @ drho[j]) == 1]
-            else:
-                constraints += [cp.trace(X[i] @ drho[j]) == 0]
-    prob = cp.Problem(cp.Minimize(cp.real(cp.trace(cp.kron(W, rho) @ L))), constraints)
-    prob.solve()
+        _set_complex(params["drho"][para_i], drho[para_i])
+    _set_complex(params["W_rho"], np.kron(W, rho))
+    # the variables keep the solution of the previous call as the warm start
+    prob.solve(solver=solver, warm_start=True)
+    if info is not None:
+        info["status"] = prob.status
 
     return prob.value
+
+
+def _NHB_problem(dim, para_num):
+    import cvxpy as cp
+
+    key = (dim, para_num)
+    if key not in _NHB_problems:
+        params = {
+            "rho": _complex_parameter((dim, dim)),
+            "drho": [_complex_parameter((dim, dim)) for i in range(para_num)],
+            "W_rho": _complex_parameter((para_num * dim, para_num * dim)),
+        }
+        rho = params["rho"][0] + 1j * params["rho"][1]
+        drho = [re + 1j * im for re, im in params["drho"]]
+        W_rho = params["W_rho"][0] + 1j * params["W_rho"][1]
+        L_tp = [[[] for i in range(para_num)] for j in range(para_num)]
+        for para_i in range(para_num):
+            for para_j in range(para_i, para_num):
+                L_tp[para_i][para_j] = cp.Variable((dim, dim), hermitian=True)
+                L_tp[para_j][para_i] = L_tp[para_i][para_j]
+        L = cp.vstack([cp.hstack(L_tp[i]) for i in range(para_num)])
+        X = [cp.Variable((dim, dim), hermitian=True) for j in range(para_num)]
+
+        constraints = [cp.bmat([[L, cp.vstack(X)], [cp.hstack(X), np.identity(dim)]])  >> 0]
+
+        for i in range(para_num):
+            constraints += [cp.trace(X[i] @ rho) == 0]
+            for j in range(para_num):
+                if i == j:
+                    constraints += [cp.trace(X[i] @ drho[j]) == 1]
+                else:
+                    constraints += [cp.trace(X[i] @ drho[j]) == 0]
+        prob = cp.Problem(cp.Minimize(cp.real(cp.trace(W_rho @ L))), constraints)
+        _NHB_problems[key] = (prob, params)
+    return _NHB_problems[key]
+
+
+def HCRB_batch(
+    rho,
+    drho,
+    W,
+    eps=1e-8,
+    solver=None,
+    method="auto",
+    fallback_solver="SCS",
+    n_jobs=1,
+    chunk_size=None,
+):
+    """
+    Calculation of the Holevo Cramer-Rao bound (HCRB) for a stack of density 
+    matrices, such as the states on a grid of the unknown parameters. The states 
+    are split into chunks which are solved in a pool of processes, and every process 
+    reuses its compiled SDP for all the states it receives. A state whose SDP fails
+    is solved again with the fallback solver instead of aborting the batch.
+
+    Parameters
+    ----------
+    > **rho:** `array`
+        -- Density matrices with the shape (N, dim, dim).
+
+    > **drho:** `array`
+        -- Derivatives of the density matrices on the unknown parameters with the 
+        shape (N, para_num, dim, dim).
+
+    > **W:** `matrix`
+        -- Weight matrix.
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **solver:** `string`
+        -- The cvxpy solver used for the SDP.
+
+    > **method:** `string`
+        -- The method of the calculation, see `HCRB`.
+
+    > **fallback_solver:** `string`
+        -- The cvxpy solver used for the states whose SDP fails. No second attempt 
+        is made if it is None.
+
+    > **n_jobs:** `int`
+        -- Number of processes.
+
+    > **chunk_size:** `int`
+        -- Number of states sent to a process at once. By default every process 
+        receives about four chunks.
+
+    Returns
+    ----------
+    **HCRB:** `array`
+        -- The values of HCRB with the shape (N,), nan for the failed states.
+
+    **status:** `array`
+        -- The status of every state, which is the cvxpy status of the SDP, 
+        "analytic" for the closed forms, "QFIM" if the HCRB reduces to the QFIM, 
+        or "failed: " followed by the reason. The statuses of the states solved 
+        with the fallback solver are prefixed by "fallback ", so that a state for 
+        which both solvers failed has the status "fallback failed: " followed by 
+        the reason of the second failure.
+
+    **time:** `array`
+        -- The wall time spent on every state in seconds.
+    """
+
+    rho, drho = _batch_check(rho, drho)
+    para_num = drho.shape[1]
+    if para_num == 1 or matrix_rank(W) == 1:
+        # the same reductions as HCRB, done for all the states at once
+        start = time.perf_counter()
+        F = QFIM_batch(rho, drho, eps=eps)
+        if para_num == 1:
+            print(
+                "In single parameter scenario, HCRB is equivalent to QFI. This function will return the value of QFI."
+            )
+            HCRB_res = F[:, 0, 0]
+        else:
+            print(
+                "For rank-one weight matrix, the HCRB is equivalent to QFIM. This function will return the value of Tr(WF^{-1})."
+            )
+            HCRB_res = np.einsum("ab,nba->n", W, np.linalg.pinv(F))
+        elapsed = (time.perf_counter() - start) / len(rho)
+        return HCRB_res, np.full(len(rho), "QFIM"), np.full(len(rho), elapsed)
+
+    options = {"eps": eps, "method": method}
+    return _SDP_batch("HCRB", rho, drho, W, solver, options, fallback_solver, n_jobs, chunk_size)
+
+
+def NHB_batch(rho, drho, W, solver=None, fallback_solver="SCS", n_jobs=1, chunk_size=None):
+    """
+    Calculation of the Nagaoka-Hayashi bound (NHB) for a stack of density matrices.
+    The SDPs are distributed like in `HCRB_batch`.
+
+    Parameters
+    ----------
+    > **rho:** `array`
+        -- Density matrices with the shape (N, dim, dim).
+
+    > **drho:** `array`
+        -- Derivatives of the density matrices on the unknown parameters with the 
+        shape (N, para_num, dim, dim).
+
+    > **W:** `matrix`
+        -- Weight matrix.
+
+    > **solver:** `string`
+        -- The cvxpy solver used for the SDP.
+
+    > **fallback_solver:** `string`
+        -- The cvxpy solver used for the states whose SDP fails. No second attempt 
+        is made if it is None.
+
+    > **n_jobs:** `int`
+        -- Number of processes.
+
+    > **chunk_size:** `int`
+        -- Number of states sent to a process at once. By default every process 
+        receives about four chunks.
+
+    Returns
+    ----------
+    **NHB, status, time:** `array, array, array`
+        -- The values of NHB with nan for the failed states, the status of every 
+        state and the wall time spent on it, see `HCRB_batch`.
+    """
+
+    rho, drho = _batch_check(rho, drho)
+    return _SDP_batch("NHB", rho, drho, W, solver, {}, fallback_solver, n_jobs, chunk_size)
+
+
+def _SDP_batch(kind, rho, drho, W, solver, options, fallback_solver, n_jobs, chunk_size):
+    num = len(rho)
+    if chunk_size is None:
+        chunk_size = max(1, -(-num // (4 * n_jobs)))
+    chunks = [
+        (kind, rho[start : start + chunk_size], drho[start : start + chunk_size], W, solver, options, fallback_solver)
+        for start in range(0, num, chunk_size)
+    ]
+    if n_jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_SDP_chunk, chunks))
+    else:
+        results = [_SDP_chunk(chunk) for chunk in chunks]
+
+    value = np.concatenate([res[0] for res in results])
+    status = np.concatenate([res[1] for res in results])
+    elapsed = np.concatenate([res[2] for res in results])
+    return value, status, elapsed
+
+
+def _SDP_chunk(chunk):
+    # runs in the worker processes, where the cached problems persist between chunks
+    kind, rho, drho, W, solver, options, fallback_solver = chunk
+    value = np.full(len(rho), np.nan)
+    status = []
+    elapsed = np.zeros(len(rho))
+    for n in range(len(rho)):
+        start = time.perf_counter()
+        value[n], status_n = _SDP_point(kind, rho[n], list(drho[n]), W, solver, options)
+        if status_n not in _SDP_accepted and fallback_solver is not None:
+            value[n], status_n = _SDP_point(kind, rho[n], list(drho[n]), W, fallback_solver, options)
+            status_n = "fallback " + status_n
+        status.append(status_n)
+        elapsed[n] = time.perf_counter() - start
+    return value, np.array(status), elapsed
+
+
+def _SDP_point(kind, rho, drho, W, solver, options):
+    from cvxpy.error import DCPError, SolverError
+
+    info = {}
+    try:
+        if kind == "HCRB":
+            state = StateAnalysis(rho, drho, eps=options["eps"])
+            value = _HCRB(state, W, solver=solver, method=options["method"], info=info)
+        else:
+            value = _NHB(rho, drho, W, solver=solver, info=info)
+    except (SolverError, DCPError, ValueError, np.linalg.LinAlgError) as error:
+        # ValueError covers the data cvxpy rejects for a parameter, such as nan,
+        # and LinAlgError a state which cannot be diagonalized
+        return np.nan, "failed: " + str(error)
+    if info["status"] not in _SDP_accepted:
+        return np.nan, "failed: " + str(info["status"])
+    return value, info["status"]
+
+
+def _complex_parameter(shape):
+    # cvxpy only reuses the compiled problem for real parameters, so the complex 
+    # data enters as its real and imaginary parts
+    import cvxpy as cp
+
+    return cp.Parameter(shape), cp.Parameter(shape)
+
+
+def _set_complex(param, value):
+    value = np.asarray(value)
+    param[0].value = np.real(value)
+    param[1].value = np.imag(value)
@@ -1,9 +1,30 @@
+import os
 import numpy as np
-from numpy.linalg import inv
-from scipy.linalg import sqrtm, schur, eigvals
-from quanestimation.Common.Common import SIC, suN_generator
-from scipy.integrate import quad
-from scipy.stats import norm, poisson, rayleigh, gamma
+from quanestimation.Common.Common import SIC, suN_structure
+from quanestimation.AsymptoticBound.StateAnalysis import StateAnalysis
+from quanestimation.Parameterization.NonDynamics import _Kraus, _Kraus_check
+
+def _POVM_probability(rho, drho, M):
+    # Tr(rho M_y) is the sum of rho * M_y^T, so the probabilities and their derivatives
+    # for all the outcomes (and all the POVMs stacked in the leading axes of M) come 
+    # from one matrix product
+    rho, M = np.asarray(rho), np.asarray(M)
+    dim = M.shape[-1]
+    M_vec = M.swapaxes(-1, -2).reshape(-1, dim * dim).T
+    p = np.real(rho.reshape(-1, dim * dim) @ M_vec)
+    dp = np.real(drho.reshape(-1, dim * dim) @ M_vec)
+    p = p.reshape(rho.shape[:-2] + M.shape[:-2])
+    dp = dp.reshape(drho.shape[:-2] + M.shape[:-2])
+    return p, dp
+
+
+def _CFIM_contract(p, dp, eps):
+    # I_ab = sum_y dp_a(y) dp_b(y) / p(y) over the outcomes with p(y) > eps, the 
+    # parameters are on the axis just before the outcomes
+    p_inv = np.zeros(p.shape)
+    p_inv[p > eps] = 1.0 / p[p > eps]
+    return np.einsum("...ay,...by,...y->...ab", dp, dp, p_inv)
+
 
 def CFIM(rho, drho, M=[], eps=1e-8):
     r"""
@@ -56,23 +77,9 @@ def CFIM(rho, drho, M=[], eps=1e-8):
         if type(M) != list:
             raise TypeError("Please make sure M is a list!")
 
-    m_num = len(M)
     para_num = len(drho)
-    CFIM_res = np.zeros([para_num, para_num])
-    for pi in range(0, m_num):
-        Mp = M[pi]
-        p = np.real(np.trace(np.dot(rho, Mp)))
-        Cadd = np.zeros([para_num, para_num])
-        if p > eps:
-            for para_i in range(0, para_num):
-                drho_i = drho[para_i]
-                dp_i = np.real(np.trace(np.dot(drho_i, Mp)))
-                for para_j in range(para_i, para_num):
-                    drho_j = drho[para_j]
-                    dp_j = np.real(np.trace(np.dot(drho_j, Mp)))
-                    Cadd[para_i][para_j] = np.real(dp_i * dp_j / p)
-                    Cadd[para_j][para_i] = np.real(dp_i * dp_j / p)
-        CFIM_res += Cadd
+    p, dp = _POVM_probability(rho, np.array(drho), M)
+    CFIM_res = _CFIM_contract(p, dp, eps)
 
     if para_num == 1:
         return CFIM_res[0][0]
@@ -80,6 +87,131 @@ def CFIM(rho, drho, M=[], eps=1e-8):
         return CFIM_res
 
 
+def _batch_check(rho, drho):
+    rho = np.asarray(rho)
+    drho = np.asarray(drho)
+    if (
+        rho.ndim != 3
+        or drho.ndim != 4
+        or drho.shape[0] != rho.shape[0]
+        or drho.shape[2:] != rho.shape[1:]
+    ):
+        raise ValueError(
+            "Please make sure rho has the shape (N, dim, dim) and drho has the shape (N, para_num, dim, dim)!"
+        )
+    return rho, drho
+
+
+def _batch_chunk(drho, chunk_size):
+    if chunk_size is None:
+        # keep every complex (chunk, para_num, dim, dim) temporary around 64 MB
+        chunk_size = max(1, 2**26 // (16 * drho[0].size))
+    return chunk_size
+
+
+def CFIM_batch(rho, drho, M=[], eps=1e-8, chunk_size=None):
+    r"""
+    Calculation of the classical Fisher information matrix (CFIM) for a stack of 
+    density matrices, such as the states on a grid of the unknown parameters. It
+    returns the same values as calling `CFIM` on every state, but the probabilities 
+    and their derivatives are computed for all the states and POVM elements with 
+    a single matrix product.
+
+    Parameters
+    ----------
+    > **rho:** `array`
+        -- Density matrices with the shape (N, dim, dim).
+
+    > **drho:** `array`
+        -- Derivatives of the density matrices on the unknown parameters with the 
+        shape (N, para_num, dim, dim). For example, drho[n][0] is the derivative 
+        of rho[n] on the first parameter.
+
+    > **M:** `list of matrices`
+        -- A set of positive operator-valued measure (POVM). The default measurement 
+        is a set of rank-one symmetric informationally complete POVM (SIC-POVM).
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **chunk_size:** `int`
+        -- Number of states handled in one vectorized call. The default value bounds
+        the size of the temporary arrays to about 64 MB.
+
+    Returns
+    ----------
+    **CFIM:** `array` 
+        -- CFIMs with the shape (N, para_num, para_num), also for single parameter 
+        estimation.
+    """
+
+    rho, drho = _batch_check(rho, drho)
+    num, para_num, dim = drho.shape[:3]
+
+    if len(M) == 0:
+        M = SIC(dim)
+
+    chunk_size = _batch_chunk(drho, chunk_size)
+    CFIM_res = np.zeros((num, para_num, para_num))
+    for start in range(0, num, chunk_size):
+        end = min(start + chunk_size, num)
+        p, dp = _POVM_probability(rho[start:end], drho[start:end], M)
+        CFIM_res[start:end] = _CFIM_contract(p, dp, eps)
+    return CFIM_res
+
+
+def CFIM_multiPOVM(rho, drho, M, eps=1e-8):
+    r"""
+    Calculation of the classical Fisher information (CFI) and classical Fisher 
+    information matrix (CFIM) of a density matrix for a set of candidate 
+    measurements. The probabilities $p(y|\textbf{x})=\mathrm{Tr}(\rho\Pi_y)$ 
+    and their derivatives for all the POVMs are obtained from a single tensor 
+    contraction, which is useful for the brute-force scan of measurements.
+
+    Parameters
+    ----------
+    > **rho:** `matrix`
+        -- Density matrix.
+
+    > **drho:** `list`
+        -- Derivatives of the density matrix on the unknown parameters to be 
+        estimated. For example, drho[0] is the derivative vector on the first 
+        parameter.
+
+    > **M:** `array`
+        -- Candidate POVMs with the shape (n_povms, n_outcomes, dim, dim), M[k] is
+        the k-th POVM. POVMs with fewer outcomes can be padded with zero matrices.
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    Returns
+    ----------
+    **CFI (CFIM):** `array` 
+        -- For single parameter estimation (the length of drho is equal to one), 
+        the output is an array of CFIs with the shape (n_povms,) and for 
+        multiparameter estimation (the length of drho is more than one), it 
+        returns the CFIMs with the shape (n_povms, para_num, para_num).
+    """
+
+    if type(drho) != list:
+        raise TypeError("Please make sure drho is a list!")
+
+    M = np.asarray(M)
+    if M.ndim != 4:
+        raise ValueError("Please make sure M has the shape (n_povms, n_outcomes, dim, dim)!")
+
+    para_num = len(drho)
+    p, dp = _POVM_probability(rho, np.array(drho), M)
+    # (para_num, n_povms, n_outcomes) -> (n_povms, para_num, n_outcomes)
+    CFIM_res = _CFIM_contract(p, np.moveaxis(dp, 0, 1), eps)
+
+    if para_num == 1:
+        return CFIM_res[:, 0, 0]
+    else:
+        return CFIM_res
+
+
 def FIM(p, dp, eps=1e-8):
     r"""
     Calculation of the classical Fisher information (CFI) and classical Fisher 
@@ -158,6 +290,10 @@ def FI_Expt(y1, y2, dx, ftype="norm"):
     ----------
     **CFI:** `float or matrix` 
     """
+    # scipy.stats is slow to import and only needed here
+    from scipy.integrate import quad
+    from scipy.stats import norm, poisson, rayleigh, gamma
+
     fidelity = 0.0
     if ftype == "norm":
         mu1, std1 = norm.fit(y1)
@@ -187,6 +323,232 @@ def FI_Expt(y1, y2, dx, ftype="norm"):
     return Fc
 
 
+def _sample_source(y):
+    # paths of .npy files are opened as memory maps and read in chunks
+    if isinstance(y, (str, os.PathLike)):
+        y = np.load(y, mmap_mode="r")
+    y = np.asarray(y)
+    if y.ndim != 1:
+        y = y.reshape(-1)
+    if y.size == 0:
+        raise ValueError("Please make sure the experimental data is not empty!")
+    return y
+
+
+def _sample_chunks(y, chunk_size):
+    for start in range(0, len(y), chunk_size):
+        yield np.asarray(y[start : start + chunk_size], dtype=np.float64)
+
+
+def _sample_kernel(width, nbins):
+    # normalized Gaussian kernels with the widths (in units of bins) width[...]
+    offset = np.arange(-(nbins - 1), nbins)
+    kernel = np.exp(-0.5 * (offset / width[..., None]) ** 2)
+    return kernel / np.sum(kernel, axis=-1, keepdims=True)
+
+
+def _sample_convolve(p, kernel):
+    # convolution of the binned probabilities p[..., bins] with the kernels
+    # kernel[..., 2*bins-1], done as an FFT convolution
+    nbins = p.shape[-1]
+    length = 3 * nbins - 2
+    return np.fft.irfft(
+        np.fft.rfft(p, length) * np.fft.rfft(kernel, length), length
+    )[..., nbins - 1 : 2 * nbins - 1]
+
+
+def FI_Expt_samples(
+    y1,
+    y2,
+    dx,
+    estimator="hist",
+    bins=None,
+    chunk_size=2**20,
+    bootstrap=0,
+    confidence=0.95,
+    seed=None,
+):
+    r"""
+    Calculation of the classical Fisher information (CFI) based on the experiment 
+    data without assuming a parametric distribution. The distributions of the data 
+    are estimated by histograms or kernel density estimates which are accumulated 
+    in chunks, so that the samples can be memory-mapped files much larger than the 
+    memory. The CFI is obtained from the fidelity $f$ between the distributions at 
+    $x$ and $x+\delta x$ via $8(1-f)/\delta x^2$, and several values of dx can be
+    evaluated in one pass over y1. The sampling noise of the estimated distributions 
+    lowers the fidelity by about (number of occupied bins)/(8N) for N samples, which 
+    is comparable to $1-f$ for small dx. This bias is removed to first order.
+
+    Parameters
+    ----------
+    > **y1:** `array or string` 
+        -- Experimental data obtained at the truth value (x), or the path of a .npy 
+        file containing it.
+
+    > **y2:** `array or string or list` 
+        -- Experimental data obtained at x+dx. If dx is an array, y2 is a list of 
+        data sets with y2[i] obtained at x+dx[i].
+
+    > **dx:** `float or array`
+        -- Known small drifts of the parameter.
+
+    > **estimator:** `string`
+        -- The estimator of the distributions. Options are:  
+        "hist" (default) -- histograms with `bins` equal bins over the range of the data.  
+        "kde" -- Gaussian kernel density estimates on a grid of `bins` points, with 
+        the bandwidths given by Silverman's rule. The smoothing widens the 
+        distributions, which lowers the CFI by a relative amount of about the 
+        squared bandwidth over the variance.  
+        "discrete" -- frequencies of non-negative integer data, such as photon counts.
+
+    > **bins:** `int`
+        -- Number of bins or grid points used by "hist" and "kde". If it is None 
+        (default), "hist" uses $N^{1/3}$ bins for the smallest data set of N samples 
+        and "kde" uses a grid spacing of a quarter of the smallest bandwidth.
+
+    > **chunk_size:** `int`
+        -- Number of samples read at once.
+
+    > **bootstrap:** `int`
+        -- Number of bootstrap resamples used for the basic bootstrap confidence 
+        interval. No interval is calculated if it is 0.
+
+    > **confidence:** `float`
+        -- Confidence level of the bootstrap interval.
+
+    > **seed:** `int`
+        -- Random seed of the bootstrap.
+
+    Returns
+    ----------
+    **CFI:** `float or array` 
+        -- The CFI for each value of dx.
+
+    **CFI_low, CFI_up:** `float or array` 
+        -- Lower and upper ends of the bootstrap confidence interval, only 
+        returned if bootstrap is larger than 0.
+    """
+
+    if estimator not in ("hist", "kde", "discrete"):
+        raise ValueError(
+            "{!r} is not a valid value for estimator, supported values are 'hist', 'kde' and 'discrete'.".format(
+                estimator
+            )
+        )
+    single = np.ndim(dx) == 0
+    dx = np.atleast_1d(np.asarray(dx, dtype=np.float64))
+    if single:
+        y2 = [y2]
+    elif len(y2) != len(dx):
+        raise ValueError("Please make sure y2 contains one data set for each value of dx!")
+    data = [_sample_source(y1)] + [_sample_source(y) for y in y2]
+
+    # first pass: support and moments of every data set
+    num = np.array([len(y) for y in data], dtype=np.float64)
+    y_min, y_max = np.inf, -np.inf
+    mean, var = np.zeros(len(data)), np.zeros(len(data))
+    for i, y in enumerate(data):
+        total, total_sq = 0.0, 0.0
+        for chunk in _sample_chunks(y, chunk_size):
+            y_min = min(y_min, chunk.min())
+            y_max = max(y_max, chunk.max())
+            total += chunk.sum()
+            total_sq += np.dot(chunk, chunk)
+        mean[i] = total / num[i]
+        var[i] = max(total_sq / num[i] - mean[i] ** 2, 0.0)
+
+    if estimator == "discrete":
+        if y_min < 0:
+            raise ValueError("Please make sure the data is non-negative for estimator 'discrete'!")
+        nbins = int(y_max) + 1
+        edges = np.arange(nbins + 1) - 0.5
+    else:
+        std = np.sqrt(var)
+        width = 1.06 * std * num ** (-0.2)
+        pad = 4.0 * width.max() if estimator == "kde" else 0.0
+        low, up = y_min - pad, y_max + pad
+        if up <= low:
+            up = low + 1.0
+        if bins is not None:
+            nbins = int(bins)
+        elif estimator == "kde":
+            nbins = int(min(2**14, np.ceil(4 * (up - low) / max(width.min(), 1e-12 * (up - low)))))
+        else:
+            nbins = int(np.ceil(num.min() ** (1 / 3)))
+        edges = np.linspace(low, up, nbins + 1)
+
+    # second pass: counts on the common bins
+    counts = np.zeros((len(data), nbins))
+    for i, y in enumerate(data):
+        for chunk in _sample_chunks(y, chunk_size):
+            if estimator == "discrete":
+                if np.any(chunk != np.round(chunk)):
+                    raise ValueError("Please make sure the data is integer for estimator 'discrete'!")
+                counts[i] += np.bincount(chunk.astype(np.int64), minlength=nbins)
+            else:
+                counts[i] += np.histogram(chunk, bins=edges)[0]
+
+    kernel = None
+    if estimator == "kde":
+        # kernel widths in units of bins, at least one bin wide
+        kernel = _sample_kernel(np.maximum(width / (edges[1] - edges[0]), 1.0), nbins)
+
+    def _noise(r, k):
+        # N times the sum over the bins of Var(p_i)/p_i for the distribution p
+        # estimated from N samples, evaluated at the distribution r
+        if k is None:
+            return np.sum(np.where(r > 0, 1 - r, 0.0), axis=-1)
+        r_s = _sample_convolve(r, k)
+        var = _sample_convolve(r, k**2) - r_s**2
+        ratio = np.divide(var, r_s, out=np.zeros_like(r_s), where=r_s > 0)
+        return np.sum(np.clip(ratio, 0.0, 1.0), axis=-1)
+
+    def _CFI(c, debias=True):
+        # c[..., data set, bins] -> CFI[..., dx]
+        n = np.sum(c, axis=-1)
+        p = c / n[..., None]
+        if kernel is not None:
+            p = np.maximum(_sample_convolve(p, kernel), 0.0)
+            p = p / np.sum(p, axis=-1, keepdims=True)
+        fidelity = np.sum(np.sqrt(p[..., :1, :] * p[..., 1:, :]), axis=-1)
+        if not debias:
+            return 8 * (1 - fidelity) / dx**2
+        # E[sqrt(p_i q_i)] = sqrt(p_i q_i) - (Var(p_i) q_i/p_i + Var(q_i) p_i/q_i)/(8 sqrt(p_i q_i))
+        # to second order, with p and q replaced by the pooled distribution of
+        # y1 and y2 since they only differ by O(dx)
+        r = (c[..., :1, :] + c[..., 1:, :]) / (n[..., :1] + n[..., 1:])[..., None]
+        k1, k2 = (None, None) if kernel is None else (kernel[:1], kernel[1:])
+        fidelity = fidelity + (_noise(r, k1) / n[..., :1] + _noise(r, k2) / n[..., 1:]) / 8
+        return 8 * (1 - fidelity) / dx**2
+
+    F = _CFI(counts)
+    if bootstrap <= 0:
+        return F[0] if single else F
+
+    # resampling the data with replacement is equivalent to a multinomial
+    # draw of the bin counts, done for all resamples at once
+    rng = np.random.default_rng(seed)
+    prob = counts / num[:, None]
+    F_boot = np.zeros((bootstrap, len(dx)))
+    step = max(1, 2**24 // (len(data) * nbins))
+    for start in range(0, bootstrap, step):
+        end = min(start + step, bootstrap)
+        c = np.stack(
+            [rng.multinomial(int(num[i]), prob[i], size=end - start) for i in range(len(data))],
+            axis=1,
+        )
+        F_boot[start:end] = _CFI(c)
+    # basic bootstrap interval: the CFI of the resampled data is the plug-in
+    # value of the estimated distributions, not the debiased F
+    alpha = 0.5 * (1 - confidence)
+    q_low, q_up = np.quantile(F_boot, [alpha, 1 - alpha], axis=0)
+    F_plug = _CFI(counts, debias=False)
+    F_low, F_up = F + F_plug - q_up, F + F_plug - q_low
+    if single:
+        return F[0], F_low[0], F_up[0]
+    return F, F_low, F_up
+
+
 def SLD(rho, drho, rep="original", eps=1e-8):
     r"""
     Calculation of the symmetric logarithmic derivative (SLD) for a density matrix.
@@ -234,62 +596,7 @@ def SLD(rho, drho, rep="original", eps=1e-8):
     if type(drho) != list:
         raise TypeError("Please make sure drho is a list!")
 
-    para_num = len(drho)
-    dim = len(rho)
-    SLD = [[] for i in range(0, para_num)]
-
-    purity = np.trace(np.dot(rho, rho))
-
-    if np.abs(1 - purity) < eps:
-        SLD_org = [[] for i in range(0, para_num)]
-        for para_i in range(0, para_num):
-            SLD_org[para_i] = 2 * drho[para_i]
-
-            if rep == "original":
-                SLD[para_i] = SLD_org[para_i]
-            elif rep == "eigen":
-                val, vec = np.linalg.eig(rho)
-                val = np.real(val)
-                SLD[para_i] = np.dot(
-                    vec.conj().transpose(), np.dot(SLD_org[para_i], vec)
-                )
-            else:
-                raise ValueError("{!r} is not a valid value for rep, supported values are 'original' and 'eigen'.".format(rep))
-        if para_num == 1:
-            return SLD[0]
-        else:
-            return SLD
-    else:
-        val, vec = np.linalg.eig(rho)
-        val = np.real(val)
-        for para_i in range(0, para_num):
-            SLD_eig = np.array(
-                [[0.0 + 0.0 * 1.0j for i in range(0, dim)] for i in range(0, dim)]
-            )
-            for fi in range(0, dim):
-                for fj in range(0, dim):
-                    if np.abs(val[fi] + val[fj]) > eps:
-                        SLD_eig[fi][fj] = (
-                            2
-                            * np.dot(
-                                vec[:, fi].conj().transpose(),
-                                np.dot(drho[para_i], vec[:, fj]),
-                            )
-                            / (val[fi] + val[fj])
-                        )
-            SLD_eig[SLD_eig == np.inf] = 0.0
-
-            if rep == "original":
-                SLD[para_i] = np.dot(vec, np.dot(SLD_eig, vec.conj().transpose()))
-            elif rep == "eigen":
-                SLD[para_i] = SLD_eig
-            else:
-                raise ValueError("{!r} is not a valid value for rep, supported values are 'original' and 'eigen'.".format(rep))
-
-        if para_num == 1:
-            return SLD[0]
-        else:
-            return SLD
+    return StateAnalysis(rho, drho, eps=eps).SLD(rep=rep)
 
 
 def RLD(rho, drho, rep="original", eps=1e-8):
@@ -335,37 +642,7 @@ def RLD(rho, drho, rep="original", eps=1e-8):
     if type(drho) != list:
         raise TypeError("Please make sure drho is a list!")
 
-    para_num = len(drho)
-    dim = len(rho)
-    RLD = [[] for i in range(0, para_num)]
-
-    val, vec = np.linalg.eig(rho)
-    val = np.real(val)
-    for para_i in range(0, para_num):
-        RLD_eig = np.array(
-            [[0.0 + 0.0 * 1.0j for i in range(0, dim)] for i in range(0, dim)]
-        )
-        for fi in range(0, dim):
-            for fj in range(0, dim):
-                term_tp = np.dot(vec[:, fi].conj().transpose(),np.dot(drho[para_i], vec[:, fj]))
-                if np.abs(val[fi]) > eps:
-                    RLD_eig[fi][fj] = (term_tp/val[fi])
-                else:
-                    if np.abs(term_tp) < eps:
-                        raise ValueError("The RLD does not exist. It only exist when the support of drho is contained in the support of rho.",
-            )
-        RLD_eig[RLD_eig == np.inf] = 0.0
-
-        if rep == "original":
-            RLD[para_i] = np.dot(vec, np.dot(RLD_eig, vec.conj().transpose()))
-        elif rep == "eigen":
-            RLD[para_i] = RLD_eig
-        else:
-            raise ValueError("{!r} is not a valid value for rep, supported values are 'original' and 'eigen'.".format(rep))
-    if para_num == 1:
-        return RLD[0]
-    else:
-        return RLD
+    return StateAnalysis(rho, drho, eps=eps).RLD(rep=rep)
 
 
 def LLD(rho, drho, rep="original", eps=1e-8):
@@ -411,42 +688,41 @@ def LLD(rho, drho, rep="original", eps=1e-8):
     if type(drho) != list:
         raise TypeError("Please make sure drho is a list!")
 
-    para_num = len(drho)
-    dim = len(rho)
-    LLD = [[] for i in range(0, para_num)]
+    return StateAnalysis(rho, drho, eps=eps).LLD(rep=rep)
 
-    val, vec = np.linalg.eig(rho)
-    val = np.real(val)
-    for para_i in range(0, para_num):
-        LLD_eig = np.array(
-            [[0.0 + 0.0 * 1.0j for i in range(0, dim)] for i in range(0, dim)]
-        )
-        for fi in range(0, dim):
-            for fj in range(0, dim):
-                term_tp = np.dot(vec[:, fi].conj().transpose(), np.dot(drho[para_i], vec[:, fj]),)
-                if np.abs(val[fj]) > eps:
-                    LLD_eig_tp = (term_tp/val[fj])
-                    LLD_eig[fj][fi] = LLD_eig_tp.conj()
-                else: 
-                    if np.abs(term_tp) < eps:
-                        raise ValueError("The LLD does not exist. It only exist when the support of drho is contained in the support of rho.",
-            )
-        LLD_eig[LLD_eig == np.inf] = 0.0
 
-        if rep == "original":
-            LLD[para_i] = np.dot(vec, np.dot(LLD_eig, vec.conj().transpose()))
-        elif rep == "eigen":
-            LLD[para_i] = LLD_eig
-        else:
-            raise ValueError("{!r} is not a valid value for rep, supported values are 'original' and 'eigen'.".format(rep))
+def _QFIM_pure(psi, dpsi):
+    # F_ab = 4Re(<d_a psi|d_b psi> - <d_a psi|psi><psi|d_b psi>)
+    dpsi = np.hstack(dpsi)
+    overlap = np.dot(dpsi.conj().T, psi)
+    return 4 * np.real(np.dot(dpsi.conj().T, dpsi) - np.dot(overlap, overlap.conj().T))
 
-    if para_num == 1:
-        return LLD[0]
-    else:
-        return LLD
 
+def _QFIM_lowrank(rho, drho, rank, eps):
+    # orthonormal basis of the support of rho from a randomized range finder, which is 
+    # exact as long as the rank of rho does not exceed the number of sampled columns
+    dim = len(rho)
+    sample = np.random.default_rng(0).standard_normal((dim, min(dim, rank + 10)))
+    Q = np.linalg.qr(np.dot(rho, sample))[0]
+    val, vec = np.linalg.eigh(Q.conj().T @ rho @ Q)
+    support = val > eps
+    val, vec = val[support], np.dot(Q, vec[:, support])
+
+    drho_vec = drho @ vec
+    drho_eig = vec.conj().T @ drho_vec
+    # the entries of SLD inside the support, 2Re(<i|drho_a|j><j|drho_b|i>)/(val_i+val_j)
+    val_sum = val.reshape(-1, 1) + val.reshape(1, -1)
+    QFIM_res = 2 * np.real(np.einsum("aij,bji->ab", drho_eig / val_sum, drho_eig))
+    # the entries between the support and its orthogonal complement, where the sum 
+    # over the complement is <i|drho_a drho_b|i> minus the sum over the support
+    comp = np.einsum("aki,bki->abi", drho_vec.conj(), drho_vec) - np.einsum(
+        "aij,bji->abi", drho_eig, drho_eig
+    )
+    QFIM_res += 4 * np.real(comp @ (1.0 / val))
+    return QFIM_res
 
-def QFIM(rho, drho, LDtype="SLD", exportLD=False, eps=1e-8):
+
+def QFIM(rho, drho, LDtype="SLD", exportLD=False, eps=1e-8, rank=None):
     r"""
     Calculation of the quantum Fisher information (QFI) and quantum Fisher 
     information matrix (QFIM) for all types. The entry of QFIM $\mathcal{F}$
@@ -467,7 +743,11 @@ def QFIM(rho, drho, LDtype="SLD", exportLD=False, eps=1e-8):
     Parameters
     ----------
     > **rho:** `matrix`
-        -- Density matrix.
+        -- Density matrix. The state vector of a pure state is also accepted, then
+        drho are the derivatives of the state vector and the SLD based QFI (QFIM) 
+        is calculated with 
+        $\mathcal{F}_{ab}=4\mathrm{Re}(\langle\partial_a\psi|\partial_b\psi\rangle
+        -\langle\partial_a\psi|\psi\rangle\langle\psi|\partial_b\psi\rangle)$.
 
     > **drho:** `list`
         Derivatives of the density matrix on the unknown parameters to be 
@@ -487,6 +767,12 @@ def QFIM(rho, drho, LDtype="SLD", exportLD=False, eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **rank:** `int`
+        -- Upper bound of the rank of the density matrix. If it is given, the SLD 
+        based QFI (QFIM) is calculated in the support of the density matrix and its
+        orthogonal complement, which costs $O(d^2 r)$ instead of $O(d^3)$ for the 
+        rank $r$ and dimension $d$. It is not used for RLD, LLD or exportLD=True.
+
     Returns
     ----------
     **QFI or QFIM:** `float or matrix` 
@@ -500,70 +786,111 @@ def QFIM(rho, drho, LDtype="SLD", exportLD=False, eps=1e-8):
 
     para_num = len(drho)
 
-    # single parameter estimation
-    if para_num == 1:
-        if LDtype == "SLD":
-            LD_tp = SLD(rho, drho, eps=eps)
-            SLD_ac = np.dot(LD_tp, LD_tp) + np.dot(LD_tp, LD_tp)
-            QFIM_res = np.real(0.5 * np.trace(np.dot(rho, SLD_ac)))
-        elif LDtype == "RLD":
-            LD_tp = RLD(rho, drho, eps=eps)
-            QFIM_res = np.real(
-                np.trace(np.dot(rho, np.dot(LD_tp, LD_tp.conj().transpose())))
-            )
-        elif LDtype == "LLD":
-            LD_tp = LLD(rho, drho, eps=eps)
-            QFIM_res = np.real(
-                np.trace(np.dot(rho, np.dot(LD_tp, LD_tp.conj().transpose())))
-            )
+    fast_path = LDtype == "SLD" and exportLD == False
+    if np.ndim(rho) == 1 or np.shape(rho)[1] == 1:
+        psi = np.array(rho, dtype=np.complex128).reshape(-1, 1)
+        dpsi = [np.array(x, dtype=np.complex128).reshape(-1, 1) for x in drho]
+        if fast_path:
+            QFIM_res = _QFIM_pure(psi, dpsi)
+            if para_num == 1:
+                return QFIM_res[0][0]
+            else:
+                return QFIM_res
+        rho = np.dot(psi, psi.conj().T)
+        drho = [np.dot(x, psi.conj().T) + np.dot(psi, x.conj().T) for x in dpsi]
+    elif rank is not None and fast_path:
+        QFIM_res = _QFIM_lowrank(np.array(rho), np.array(drho), rank, eps)
+        if para_num == 1:
+            return QFIM_res[0][0]
         else:
-            raise ValueError("{!r} is not a valid value for LDtype, supported values are 'SLD', 'RLD' and 'LLD'.".format(LDtype))
+            return QFIM_res
+
+    return StateAnalysis(rho, drho, eps=eps).QFIM(LDtype=LDtype, exportLD=exportLD)
+
+
+def QFIM_batch(rho, drho, LDtype="SLD", eps=1e-8, chunk_size=None):
+    r"""
+    Calculation of the quantum Fisher information matrix (QFIM) for a stack of 
+    density matrices, such as the states on a grid of the unknown parameters. It
+    returns the same values as calling `QFIM` on every state, but the density 
+    matrices are diagonalized together and the logarithmic derivatives are 
+    contracted in their eigenbases without building them in the original basis.
+
+    Parameters
+    ----------
+    > **rho:** `array`
+        -- Density matrices with the shape (N, dim, dim).
+
+    > **drho:** `array`
+        -- Derivatives of the density matrices on the unknown parameters with the 
+        shape (N, para_num, dim, dim). For example, drho[n][0] is the derivative 
+        of rho[n] on the first parameter.
+
+    > **LDtype:** `string`
+        -- Types of QFIM can be set as the objective function. Options are:  
+        "SLD" (default) -- QFIM based on symmetric logarithmic derivative (SLD).  
+        "RLD" -- QFIM based on right logarithmic derivative (RLD).  
+        "LLD" -- QFIM based on left logarithmic derivative (LLD).
 
-    # multiparameter estimation
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **chunk_size:** `int`
+        -- Number of states handled in one vectorized call. The default value bounds
+        the size of the temporary arrays to about 64 MB.
+
+    Returns
+    ----------
+    **QFIM:** `array` 
+        -- QFIMs with the shape (N, para_num, para_num), also for single parameter 
+        estimation. The QFIMs based on RLD and LLD are complex.
+    """
+
+    rho, drho = _batch_check(rho, drho)
+    if LDtype not in ["SLD", "RLD", "LLD"]:
+        raise ValueError("{!r} is not a valid value for LDtype, supported values are 'SLD', 'RLD' and 'LLD'.".format(LDtype))
+
+    num, para_num = drho.shape[:2]
+    chunk_size = _batch_chunk(drho, chunk_size)
+    if LDtype == "SLD":
+        QFIM_res = np.zeros((num, para_num, para_num))
     else:
+        QFIM_res = np.zeros((num, para_num, para_num), dtype=np.complex128)
+    for start in range(0, num, chunk_size):
+        end = min(start + chunk_size, num)
+        rho_c = rho[start:end]
+        val, vec = np.linalg.eigh(rho_c)
+        vec = vec[:, None]
+        drho_eig = vec.conj().transpose(0, 1, 3, 2) @ drho[start:end] @ vec
+
         if LDtype == "SLD":
-            QFIM_res = np.zeros([para_num, para_num])
-            LD_tp = SLD(rho, drho, eps=eps)
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    SLD_ac = np.dot(LD_tp[para_i], LD_tp[para_j]) + np.dot(
-                        LD_tp[para_j], LD_tp[para_i]
-                    )
-                    QFIM_res[para_i][para_j] = np.real(
-                        0.5 * np.trace(np.dot(rho, SLD_ac))
-                    )
-                    QFIM_res[para_j][para_i] = QFIM_res[para_i][para_j]
-        elif LDtype == "RLD":
-            QFIM_res = np.zeros((para_num, para_num), dtype=np.complex128)
-            LD_tp = RLD(rho, drho, eps=eps)
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    QFIM_res[para_i][para_j] = np.trace(
-                            np.dot(
-                                rho,
-                                np.dot(LD_tp[para_i], LD_tp[para_j].conj().transpose()),
-                            )
+            # <i|L|j> = 2<i|drho|j>/(val_i+val_j), and L = 2drho for pure states
+            val_sum = val[:, :, None] + val[:, None, :]
+            support = np.abs(val_sum) > eps
+            coeff = np.zeros(val_sum.shape)
+            coeff[support] = 2.0 / val_sum[support]
+            purity = np.einsum("nij,nji->n", rho_c, rho_c)
+            coeff[np.abs(1 - purity) < eps] = 2.0
+            LD = coeff[:, None] * drho_eig
+            # 0.5Tr(rho{La, Lb}) = Re[Tr(rho La Lb)]
+            QFIM_res[start:end] = np.real(np.einsum("ni,naij,nbji->nab", val, LD, LD))
+        else:
+            support = np.abs(val) > eps
+            inv_val = np.zeros(val.shape)
+            inv_val[support] = 1.0 / val[support]
+            if LDtype == "RLD":
+                if np.any((np.abs(drho_eig) < eps) & ~support[:, None, :, None]):
+                    raise ValueError("The RLD does not exist. It only exist when the support of drho is contained in the support of rho.",
                         )
-                    QFIM_res[para_j][para_i] = QFIM_res[para_i][para_j].conj()
-        elif LDtype == "LLD":
-            QFIM_res = np.zeros((para_num, para_num), dtype=np.complex128)
-            LD_tp = LLD(rho, drho, eps=eps)
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    QFIM_res[para_i][para_j] = np.trace(
-                            np.dot(
-                                rho,
-                                np.dot(LD_tp[para_i], LD_tp[para_j].conj().transpose()),
-                            )
+                LD = drho_eig * inv_val[:, None, :, None]
+            else:
+                if np.any((np.abs(drho_eig) < eps) & ~support[:, None, None, :]):
+                    raise ValueError("The LLD does not exist. It only exist when the support of drho is contained in the support of rho.",
                         )
-                    QFIM_res[para_j][para_i] = QFIM_res[para_i][para_j].conj()
-        else:
-            raise ValueError("{!r} is not a valid value for LDtype, supported values are 'SLD', 'RLD' and 'LLD'.".format(LDtype))
-
-    if exportLD == False:
-        return QFIM_res
-    else:
-        return QFIM_res, LD_tp
+                LD = (drho_eig * inv_val[:, None, None, :]).conj().transpose(0, 1, 3, 2)
+            # Tr(rho La Lb^{\dagger})
+            QFIM_res[start:end] = np.einsum("ni,naij,nbij->nab", val, LD, LD.conj())
+    return QFIM_res
 
 
 def QFIM_Kraus(rho0, K, dK, LDtype="SLD", exportLD=False, eps=1e-8):
@@ -604,21 +931,65 @@ def QFIM_Kraus(rho0, K, dK, LDtype="SLD", exportLD=False, eps=1e-8):
         is more than one), it returns QFIM.
     """
 
-    dK = [[dK[i][j] for i in range(len(K))] for j in range(len(dK[0]))]
-    rho = sum([np.dot(Ki, np.dot(rho0, Ki.conj().T)) for Ki in K])
-    drho = [
-                sum(
-                    [
-                        (
-                            np.dot(dKi, np.dot(rho0, Ki.conj().T))
-                            + np.dot(Ki, np.dot(rho0, dKi.conj().T))
-                        )
-                        for (Ki, dKi) in zip(K, dKj)
-                    ]
-                )
-                for dKj in dK
-            ]
-    return QFIM(rho, drho, LDtype=LDtype, exportLD=exportLD, eps=eps)
+    rho0 = np.asarray(rho0)
+    K, dK = _Kraus_check(K, dK, rho0.shape[-1])
+    rho, drho = _Kraus(rho0, K, dK)
+    return QFIM(rho, list(drho), LDtype=LDtype, exportLD=exportLD, eps=eps)
+
+
+def QFIM_Kraus_batch(rho0, K, dK, LDtype="SLD", eps=1e-8, chunk_size=None):
+    r"""
+    Calculation of the quantum Fisher information matrix (QFIM) with Kraus operators
+    for a stack of initial states, such as the probe states screened in state 
+    optimization. The states are evolved with `Kraus_batch` and the QFIMs are 
+    calculated with `QFIM_batch`.
+
+    Parameters
+    ----------
+    > **rho0:** `array`
+        -- Initial states (density matrices) with the shape (N, dim, dim).
+
+    > **K:** `array`
+        -- Kraus operators with the shape (k_num, dim, dim).
+
+    > **dK:** `array` 
+        -- Derivatives of the Kraus operators with the shape (k_num, para_num, dim, dim).
+
+    > **LDtype:** `string`
+        -- Types of QFIM can be set as the objective function. Options are:  
+        "SLD" (default) -- QFIM based on symmetric logarithmic derivative (SLD).  
+        "RLD" -- QFIM based on right logarithmic derivative (RLD).  
+        "LLD" -- QFIM based on left logarithmic derivative (LLD).
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **chunk_size:** `int`
+        -- Number of states handled in one vectorized call. The default value bounds
+        the size of the temporary arrays to about 64 MB.
+
+    Returns
+    ----------
+    **QFIM:** `array` 
+        -- QFIMs with the shape (N, para_num, para_num), also for single parameter 
+        estimation.
+    """
+
+    rho0 = np.asarray(rho0)
+    if rho0.ndim != 3 or rho0.shape[1] != rho0.shape[2]:
+        raise ValueError("Please make sure rho0 has the shape (N, dim, dim)!")
+    K, dK = _Kraus_check(K, dK, rho0.shape[-1])
+
+    if chunk_size is None:
+        # keep the complex (chunk, k_num, dim, dim) temporary of the evolution and
+        # the (chunk, para_num, dim, dim) derivatives around 64 MB
+        k_num, para_num, dim = dK.shape[:3]
+        chunk_size = max(1, 2**26 // (16 * max(k_num, para_num) * dim**2))
+    QFIM_res = [
+        QFIM_batch(*_Kraus(rho0[start : start + chunk_size], K, dK), LDtype=LDtype, eps=eps)
+        for start in range(0, len(rho0), chunk_size)
+    ]
+    return np.concatenate(QFIM_res)
 
 
 def QFIM_Bloch(r, dr, eps=1e-8):
@@ -651,62 +1022,87 @@ def QFIM_Bloch(r, dr, eps=1e-8):
         raise TypeError("Please make sure dr is a list")
 
     para_num = len(dr)
-    QFIM_res = np.zeros([para_num, para_num])
+    QFIM_res = _QFIM_Bloch(
+        np.array(r).reshape(1, -1), np.array(dr).reshape(1, para_num, -1), eps
+    )[0]
 
-    dim = int(np.sqrt(len(r) + 1))
-    Lambda = suN_generator(dim)
+    if para_num == 1:
+        return QFIM_res[0][0]
+    else:
+        return QFIM_res
+
+
+def QFIM_Bloch_batch(r, dr, eps=1e-8, chunk_size=None):
+    """
+    Calculation of the SLD based quantum Fisher information matrix (QFIM) in Bloch 
+    representation for a stack of Bloch vectors. It returns the same values as 
+    calling `QFIM_Bloch` on every Bloch vector.
+
+    Parameters
+    ----------
+    > **r:** `array`
+        -- Parameterized Bloch vectors with the shape (N, dim^2-1).
+
+    > **dr:** `array`
+        -- Derivatives of the Bloch vectors on the unknown parameters with the shape
+        (N, para_num, dim^2-1). For example, dr[n][0] is the derivative of r[n] on 
+        the first parameter.
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **chunk_size:** `int`
+        -- Number of Bloch vectors handled in one vectorized call. The default value 
+        bounds the size of the temporary arrays to about 64 MB.
+
+    Returns
+    ----------
+    **QFIM in Bloch representation:** `array`
+        -- QFIMs with the shape (N, para_num, para_num), also for single parameter 
+        estimation.
+    """
+
+    r = np.asarray(r)
+    dr = np.asarray(dr)
+    if r.ndim != 2 or dr.ndim != 3 or dr.shape[0] != r.shape[0] or dr.shape[2] != r.shape[1]:
+        raise ValueError(
+            "Please make sure r has the shape (N, dim^2-1) and dr has the shape (N, para_num, dim^2-1)!"
+        )
+
+    num, para_num = dr.shape[:2]
+    if chunk_size is None:
+        # keep every (chunk, dim^2-1, dim^2-1) temporary around 64 MB
+        chunk_size = max(1, 2**26 // (16 * r.shape[1] ** 2))
+    QFIM_res = np.zeros((num, para_num, para_num))
+    for start in range(0, num, chunk_size):
+        end = min(start + chunk_size, num)
+        QFIM_res[start:end] = _QFIM_Bloch(r[start:end], dr[start:end], eps)
+    return QFIM_res
+
+
+def _QFIM_Bloch(r, dr, eps):
+    # r with the shape (N, dim^2-1) and dr with the shape (N, para_num, dim^2-1)
+    num = r.shape[1]
+    dim = int(np.sqrt(num + 1))
 
     if dim == 2:
         #### single-qubit system ####
-        r_norm = np.linalg.norm(r) ** 2
-        if np.abs(r_norm - 1.0) < eps:
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    QFIM_res[para_i][para_j] = np.real(np.inner(dr[para_i], dr[para_j]))
-                    QFIM_res[para_j][para_i] = QFIM_res[para_i][para_j]
-        else:
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    QFIM_res[para_i][para_j] = np.real(
-                        np.inner(dr[para_i], dr[para_j])
-                        + np.inner(r, dr[para_i])
-                        * np.inner(r, dr[para_j])
-                        / (1 - r_norm)
-                    )
-                    QFIM_res[para_j][para_i] = QFIM_res[para_i][para_j]
-    else:
-        rho = np.identity(dim, dtype=np.complex128) / dim
-        for di in range(dim**2 - 1):
-            rho += np.sqrt(dim * (dim - 1) / 2) * r[di] * Lambda[di] / dim
-
-        G = np.zeros((dim**2 - 1, dim**2 - 1), dtype=np.complex128)
-        for row_i in range(dim**2 - 1):
-            for col_j in range(row_i, dim**2 - 1):
-                anti_commu = np.dot(Lambda[row_i], Lambda[col_j]) + np.dot(
-                    Lambda[col_j], Lambda[row_i]
-                )
-                G[row_i][col_j] = 0.5 * np.trace(np.dot(rho, anti_commu))
-                G[col_j][row_i] = G[row_i][col_j]
-
-        mat_tp = G * dim / (2 * (dim - 1)) - np.dot(
-            np.array(r).reshape(len(r), 1), np.array(r).reshape(1, len(r))
+        r_norm = np.sum(np.abs(r) ** 2, axis=1)
+        QFIM_res = np.real(np.einsum("nai,nbi->nab", dr, dr))
+        mixed = np.abs(r_norm - 1.0) >= eps
+        r_dr = np.einsum("ni,nai->na", r[mixed], dr[mixed])
+        QFIM_res[mixed] += np.real(
+            np.einsum("na,nb->nab", r_dr, r_dr) / (1 - r_norm[mixed]).reshape(-1, 1, 1)
         )
-        mat_inv = inv(mat_tp)
-
-        for para_m in range(0, para_num):
-            for para_n in range(para_m, para_num):
-                QFIM_res[para_m][para_n] = np.real(
-                    np.dot(
-                        np.array(dr[para_n]).reshape(1, len(r)),
-                        np.dot(mat_inv, np.array(dr[para_m]).reshape(len(r), 1)),
-                    )[0][0]
-                )
-                QFIM_res[para_n][para_m] = QFIM_res[para_m][para_n]
-
-    if para_num == 1:
-        return QFIM_res[0][0]
     else:
-        return QFIM_res
+        f, d = suN_structure(dim)
+        # G_ab = 0.5Tr(rho{lambda_a, lambda_b}) = 2delta_ab/dim + sum_c d_abc Tr(rho lambda_c)
+        # with Tr(rho lambda_c) = 2sqrt(dim(dim-1)/2)r_c/dim
+        rho_lambda = 2 * np.sqrt(dim * (dim - 1) / 2) * r.T / dim
+        G = (d @ rho_lambda).T.reshape(-1, num, num) + 2 * np.identity(num) / dim
+        mat_tp = G * dim / (2 * (dim - 1)) - np.einsum("ni,nj->nij", r, r)
+        QFIM_res = np.real(dr @ np.linalg.solve(mat_tp, dr.transpose(0, 2, 1)))
+    return QFIM_res
 
 
 def QFIM_Gauss(R, dR, D, dD):
@@ -744,75 +1140,105 @@ def QFIM_Gauss(R, dR, D, dD):
     """
 
     para_num = len(dR)
-    m = int(len(R) / 2)
-    QFIM_res = np.zeros([para_num, para_num])
-
-    C = np.array(
-        [
-            [D[i][j] - R[i] * R[j] for j in range(2 * m)]
-            for i in range(2 * m)
-        ]
-    )
-    dC = [
-        np.array(
-            [
-                [
-                    dD[k][i][j] - dR[k][i] * R[j] - R[i] * dR[k][j]
-                    for j in range(2 * m)
-                ]
-                for i in range(2 * m)
-            ]
+    QFIM_res = _QFIM_Gauss(
+        np.array(R).reshape(1, -1),
+        np.array(dR).reshape(1, para_num, -1),
+        np.array(D).reshape((1,) + np.shape(D)),
+        np.array(dD).reshape((1,) + np.shape(dD)),
+    )[0]
+
+    if para_num == 1:
+        return QFIM_res[0][0]
+    else:
+        return QFIM_res
+
+
+def QFIM_Gauss_batch(R, dR, D, dD):
+    """
+    Calculation of the SLD based quantum Fisher information matrix (QFIM) with 
+    gaussian states for a stack of first- and second-order moments. It returns the 
+    same values as calling `QFIM_Gauss` on every state.
+
+    Parameters
+    ----------
+    > **R:** `array` 
+        -- First-order moments with the shape (N, 2m) for m modes.
+
+    > **dR:** `array`
+        -- Derivatives of the first-order moments on the unknown parameters with the
+        shape (N, para_num, 2m).
+
+    > **D:** `array`
+        -- Second-order moments with the shape (N, 2m, 2m).
+
+    > **dD:** `array`
+        -- Derivatives of the second-order moments on the unknown parameters with 
+        the shape (N, para_num, 2m, 2m).
+
+    Returns
+    ----------
+    **QFIM with gaussian states:** `array`
+        -- QFIMs with the shape (N, para_num, para_num), also for single parameter 
+        estimation.
+    """
+
+    R, dR, D, dD = np.asarray(R), np.asarray(dR), np.asarray(D), np.asarray(dD)
+    if (
+        R.ndim != 2
+        or dR.shape != (len(R), dR.shape[1], R.shape[1])
+        or D.shape != (len(R), R.shape[1], R.shape[1])
+        or dD.shape != dR.shape + (R.shape[1],)
+    ):
+        raise ValueError(
+            "Please make sure R, dR, D and dD have the shapes (N, 2m), (N, para_num, 2m), (N, 2m, 2m) and (N, para_num, 2m, 2m)!"
         )
-        for k in range(para_num)
-    ]
+    return _QFIM_Gauss(R, dR, D, dD)
+
 
-    C_sqrt = sqrtm(C)
+def _williamson(C):
+    # symplectic T with T C T^T = diag(c, c) for the covariance matrices C in the 
+    # (x_1, ..., x_m, p_1, ..., p_m) ordering, T = diag(c, c)^(1/2) K^T C^(-1/2) where the 
+    # orthogonal K brings C^(-1/2) J C^(-1/2) to the canonical form [[0, 1/c], [-1/c, 0]]
+    m = C.shape[-1] // 2
     J = np.kron([[0, 1], [-1, 0]], np.eye(m))
-    B = C_sqrt @ J @ C_sqrt
-    P = np.eye(2 * m)
-    P = np.vstack([P[:][::2], P[:][1::2]])
-    T, Q = schur(B)
-    vals = eigvals(B)
-    c = vals[::2].imag
-    Diag = np.diagflat(c**-0.5)
-    S = inv(J @ C_sqrt @ Q @ P @ np.kron([[0, 1], [-1, 0]], -Diag)).T @ P.T
+    w, U = np.linalg.eigh(C)
+    C_isqrt = (U / np.sqrt(w)[:, None, :]) @ U.transpose(0, 2, 1)
+    # the eigenvectors x+iy of i C^(-1/2) J C^(-1/2) with the positive eigenvalues 1/c
+    val, vec = np.linalg.eigh(1j * (C_isqrt @ J @ C_isqrt))
+    c = 1.0 / val[:, m:]
+    vec = np.sqrt(2) * vec[:, :, m:]
+    K = np.concatenate([vec.imag, vec.real], axis=2)
+    T = np.sqrt(np.concatenate([c, c], axis=1))[:, :, None] * K.transpose(0, 2, 1) @ C_isqrt
+    return T, c
+
+
+def _QFIM_Gauss(R, dR, D, dD):
+    m = R.shape[1] // 2
+    C = D - np.einsum("ni,nj->nij", R, R)
+    dC = dD - np.einsum("nai,nj->naij", dR, R) - np.einsum("ni,naj->naij", R, dR)
+
+    T, c = _williamson(C)
+    # inv(S) in the (x_1, p_1, ..., x_m, p_m) ordering
+    order = np.arange(2 * m).reshape(2, m).T.flatten()
+    S_inv = T[:, order, :]
 
     sx = np.array([[0.0, 1.0], [1.0, 0.0]])
     sy = np.array([[0.0, -1.0j], [1.0j, 0.0]])
     sz = np.array([[1.0, 0.0], [0.0, -1.0]])
-    a_Gauss = [1j * sy, sz, np.eye(2), sx]
-
-    es = [
-        [np.eye(1, m**2, m * i + j).reshape(m, m) for j in range(m)] for i in range(m)
-    ]
-
-    As = [[np.kron(s, a_Gauss[i]) / np.sqrt(2) for s in es] for i in range(4)]
-    gs = [
-        [[[np.trace(inv(S) @ dC @ inv(S.T) @ aa.T) for aa in a] for a in A] for A in As]
-        for dC in dC
-    ]
-    G = [np.zeros((2 * m, 2 * m)).astype(np.longdouble) for _ in range(para_num)]
-
-    for i in range(para_num):
-        for j in range(m):
-            for k in range(m):
-                for l in range(4):
-                    G[i] += np.real(
-                        gs[i][l][j][k]
-                        / (4 * c[j] * c[k] + (-1) ** (l + 1))
-                        * inv(S.T)
-                        @ As[l][j][k]
-                        @ inv(S)
-                    )
-
-    QFIM_res += np.real(
-        [
-            [np.trace(G[i] @ dC[j]) + dR[i] @ inv(C) @ dR[j] for j in range(para_num)]
-            for i in range(para_num)
-        ]
+    a_Gauss = np.array([1j * sy, sz, np.eye(2), sx])
+
+    # gs[n, a, l, j, k] = Tr(inv(S) dC_a inv(S^T) A_ljk^T) with A_ljk = kron(e_jk, a_l)/sqrt(2)
+    X = S_inv[:, None] @ dC @ S_inv.transpose(0, 2, 1)[:, None]
+    X = X.reshape(X.shape[:2] + (m, 2, m, 2))
+    gs = np.einsum("najukv,luv->naljk", X, a_Gauss) / np.sqrt(2)
+    sign = np.array([-1, 1, -1, 1]).reshape(1, 1, 4, 1, 1)
+    gs = gs / (4 * np.einsum("nj,nk->njk", c, c)[:, None, None] + sign)
+    # G_a = sum_ljk gs_aljk inv(S^T) A_ljk inv(S)
+    A = np.einsum("naljk,luv->najukv", gs, a_Gauss) / np.sqrt(2)
+    A = A.reshape(A.shape[:2] + (2 * m, 2 * m))
+    G = np.real(S_inv.transpose(0, 2, 1)[:, None] @ A @ S_inv[:, None])
+
+    QFIM_res = np.einsum("naij,nbji->nab", G, dC) + np.einsum(
+        "nai,nbi->nab", dR, np.linalg.solve(C, dR.transpose(0, 2, 1)).transpose(0, 2, 1)
     )
-
-    if para_num == 1:
-        return QFIM_res[0][0]
-    else:
-        return QFIM_res
+    return np.real(QFIM_res)
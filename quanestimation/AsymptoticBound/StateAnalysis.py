@@ -0,0 +1,200 @@
+import numpy as np
+
+
+class StateAnalysis:
+    """
+    Quantities of a parameterized density matrix shared by the asymptotic bounds.
+    The eigendecomposition of the density matrix, the derivatives in its eigenbasis
+    and the logarithmic derivatives are calculated on first use and kept, so that
+    evaluating several bounds on the same state costs a single diagonalization. The
+    functions `SLD`, `RLD`, `LLD`, `QFIM` and `HCRB` delegate to this class.
+
+    Attributes
+    ----------
+    > **rho:** `matrix`
+        -- Density matrix.
+
+    > **drho:** `list`
+        -- Derivatives of the density matrix on the unknown parameters to be
+        estimated. For example, drho[0] is the derivative vector on the first
+        parameter.
+
+    > **eps:** `float`
+        -- Machine epsilon.
+    """
+
+    def __init__(self, rho, drho, eps=1e-8):
+
+        if type(drho) != list:
+            raise TypeError("Please make sure drho is a list!")
+
+        self.rho = np.array(rho, dtype=np.complex128)
+        self.drho = drho
+        self.eps = eps
+        self.para_num = len(drho)
+        self._cache = {}
+
+    def _memo(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def _output(self, LD):
+        if self.para_num == 1:
+            return LD[0].copy()
+        else:
+            return list(LD.copy())
+
+    @property
+    def purity(self):
+        return self._memo("purity", lambda: np.trace(np.dot(self.rho, self.rho)))
+
+    @property
+    def eigen(self):
+        """
+        Eigenvalues and eigenvectors of the density matrix.
+        """
+        return self._memo("eigen", lambda: np.linalg.eigh(self.rho))
+
+    @property
+    def drho_eig(self):
+        """
+        Derivatives of the density matrix in its eigenbasis with the shape
+        (para_num, dim, dim).
+        """
+
+        def func():
+            vec = self.eigen[1]
+            return vec.conj().T @ np.array(self.drho) @ vec
+
+        return self._memo("drho_eig", func)
+
+    def _to_original(self, LD):
+        vec = self.eigen[1]
+        return vec @ LD @ vec.conj().T
+
+    def _SLD(self, rep):
+        def func():
+            if np.abs(1 - self.purity) < self.eps:
+                SLD = 2 * np.array(self.drho)
+                if rep == "eigen":
+                    vec = self.eigen[1]
+                    SLD = vec.conj().T @ SLD @ vec
+                return SLD
+
+            if rep == "original":
+                return self._to_original(self._SLD("eigen"))
+            val = self.eigen[0]
+            drho_eig = self.drho_eig
+            val_sum = val.reshape(-1, 1) + val.reshape(1, -1)
+            support = np.abs(val_sum) > self.eps
+            SLD = np.zeros(drho_eig.shape, dtype=np.complex128)
+            SLD[:, support] = 2 * drho_eig[:, support] / val_sum[support]
+            return SLD
+
+        return self._memo(("SLD", rep), func)
+
+    def _RLD(self, rep):
+        def func():
+            if rep == "original":
+                return self._to_original(self._RLD("eigen"))
+            val = self.eigen[0]
+            drho_eig = self.drho_eig
+            support = np.abs(val) > self.eps
+            if np.any(np.abs(drho_eig[:, ~support, :]) < self.eps):
+                raise ValueError("The RLD does not exist. It only exist when the support of drho is contained in the support of rho.",
+                    )
+            RLD = np.zeros(drho_eig.shape, dtype=np.complex128)
+            RLD[:, support, :] = drho_eig[:, support, :] / val[support].reshape(-1, 1)
+            return RLD
+
+        return self._memo(("RLD", rep), func)
+
+    def _LLD(self, rep):
+        def func():
+            if rep == "original":
+                return self._to_original(self._LLD("eigen"))
+            val = self.eigen[0]
+            drho_eig = self.drho_eig
+            support = np.abs(val) > self.eps
+            if np.any(np.abs(drho_eig[:, :, ~support]) < self.eps):
+                raise ValueError("The LLD does not exist. It only exist when the support of drho is contained in the support of rho.",
+                    )
+            LLD = np.zeros(drho_eig.shape, dtype=np.complex128)
+            LLD[:, :, support] = drho_eig[:, :, support] / val[support]
+            return LLD.conj().transpose(0, 2, 1)
+
+        return self._memo(("LLD", rep), func)
+
+    def _check_rep(self, rep):
+        if rep not in ["original", "eigen"]:
+            raise ValueError("{!r} is not a valid value for rep, supported values are 'original' and 'eigen'.".format(rep))
+
+    def SLD(self, rep="original"):
+        """
+        Symmetric logarithmic derivative(s), see `quanestimation.SLD`.
+        """
+        self._check_rep(rep)
+        return self._output(self._SLD(rep))
+
+    def RLD(self, rep="original"):
+        """
+        Right logarithmic derivative(s), see `quanestimation.RLD`.
+        """
+        self._check_rep(rep)
+        return self._output(self._RLD(rep))
+
+    def LLD(self, rep="original"):
+        """
+        Left logarithmic derivative(s), see `quanestimation.LLD`.
+        """
+        self._check_rep(rep)
+        return self._output(self._LLD(rep))
+
+    def QFIM(self, LDtype="SLD", exportLD=False):
+        """
+        QFI or QFIM, see `quanestimation.QFIM`.
+        """
+        if LDtype not in ["SLD", "RLD", "LLD"]:
+            raise ValueError("{!r} is not a valid value for LDtype, supported values are 'SLD', 'RLD' and 'LLD'.".format(LDtype))
+
+        def func():
+            if LDtype == "SLD":
+                # Tr(rho L_a L_b) in the basis the SLDs were built in, the pure state
+                # SLDs 2drho do not need the eigendecomposition
+                if "eigen" in self._cache or np.abs(1 - self.purity) >= self.eps:
+                    F = np.einsum("i,aij,bji->ab", self.eigen[0], self._SLD("eigen"), self._SLD("eigen"))
+                else:
+                    SLD = self._SLD("original")
+                    F = np.einsum("ij,ajk,bki->ab", self.rho, SLD, SLD)
+                return np.real(F + F.T) / 2
+            LD = self._RLD("eigen") if LDtype == "RLD" else self._LLD("eigen")
+            # Tr(rho R_a R_b^\dagger) with rho diagonal in the eigenbasis
+            return np.einsum("i,aij,bij->ab", self.eigen[0], LD, LD.conj())
+
+        QFIM_res = self._memo(("QFIM", LDtype), func).copy()
+        if self.para_num == 1:
+            QFIM_res = np.real(QFIM_res[0][0])
+        elif LDtype == "SLD":
+            QFIM_res = np.real(QFIM_res)
+
+        if exportLD == False:
+            return QFIM_res
+        else:
+            return QFIM_res, getattr(self, LDtype)()
+
+    def CFIM(self, M=[]):
+        """
+        CFI or CFIM, see `quanestimation.CFIM`.
+        """
+        from quanestimation.AsymptoticBound.CramerRao import CFIM
+
+        return CFIM(self.rho, self.drho, M=M, eps=self.eps)
+
+    def HCRB(self, W, solver=None, method="auto"):
+        """
+        Holevo Cramer-Rao bound, see `quanestimation.HCRB`.
+        """
+        from quanestimation.AsymptoticBound.AnalogCramerRao import _HCRB
+
+        return _HCRB(self, W, solver=solver, method=method)
@@ -1,32 +1,54 @@
 from quanestimation.AsymptoticBound.CramerRao import (
     CFIM,
+    CFIM_batch,
+    CFIM_multiPOVM,
     QFIM,
+    QFIM_batch,
     QFIM_Bloch,
+    QFIM_Bloch_batch,
     QFIM_Gauss,
+    QFIM_Gauss_batch,
     QFIM_Kraus,
+    QFIM_Kraus_batch,
     FIM,
     FI_Expt,
+    FI_Expt_samples,
     LLD,
     RLD,
     SLD,
 )
 from quanestimation.AsymptoticBound.AnalogCramerRao import (
     HCRB,
+    HCRB_batch,
     NHB,
+    NHB_batch,
+)
+from quanestimation.AsymptoticBound.StateAnalysis import (
+    StateAnalysis,
 )
 
 __all__ = [
     "CramerRao",
     "CFIM",
+    "CFIM_batch",
+    "CFIM_multiPOVM",
     "QFIM",
+    "QFIM_batch",
     "QFIM_Bloch",
+    "QFIM_Bloch_batch",
     "QFIM_Gauss",
+    "QFIM_Gauss_batch",
     "QFIM_Kraus",
+    "QFIM_Kraus_batch",
     "FIM",
     "FI_Expt",
+    "FI_Expt_samples",
     "LLD",
     "RLD",
     "SLD",
     "HCRB",
+    "HCRB_batch",
     "NHB",
+    "NHB_batch",
+    "StateAnalysis",
 ]
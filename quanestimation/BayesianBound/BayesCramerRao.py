@@ -1,12 +1,131 @@
 import numpy as np
 from scipy import interpolate
 from scipy.integrate import simps, solve_bvp
-from itertools import product
-from quanestimation.AsymptoticBound.CramerRao import CFIM, QFIM
-from quanestimation.Common.Common import SIC, extract_ele
+from quanestimation.AsymptoticBound.CramerRao import CFIM_batch, QFIM, QFIM_batch
+from quanestimation.BayesianBound.Quadrature import Quadrature, _quadrature
+from quanestimation.Common.Common import SIC
+
+
+def _grid_states(p, rho, drho, para_num):
+    # the states on the grid of the parameters as the stacks (N, dim, dim) and
+    # (N, para_num, dim, dim) with N the number of grid points
+    rho = np.asarray(rho, dtype=np.complex128)
+    dim = rho.shape[-1]
+    rho = rho.reshape(-1, dim, dim)
+    drho = np.asarray(drho, dtype=np.complex128).reshape(len(rho), para_num, dim, dim)
+    if len(rho) != np.size(p):
+        raise ValueError("Please make sure rho and drho are given on the grid of p!")
+    return rho, drho
+
+
+def _grid_prior(p, dp, para_num):
+    p = np.asarray(p, dtype=np.float64).reshape(-1)
+    dp = np.asarray(dp, dtype=np.float64).reshape(len(p), para_num)
+    return p, dp
+
+
+def _grid_bias(x, b, db):
+    # the biases b[i] and db[i] are given on x[i], return their values on the
+    # grid with the shape (N, para_num). For a single parameter they can also
+    # be given as one vector on x[0].
+    if len(b) == 0:
+        b = [np.zeros(len(xi)) for xi in x]
+    elif len(x) == 1 and np.ndim(b[0]) == 0:
+        b = [b]
+    if len(db) == 0:
+        db = [np.zeros(len(xi)) for xi in x]
+    elif len(x) == 1 and np.ndim(db[0]) == 0:
+        db = [db]
+    b = np.stack(np.meshgrid(*b, indexing="ij"), axis=-1).reshape(-1, len(x))
+    db = np.stack(np.meshgrid(*db, indexing="ij"), axis=-1).reshape(-1, len(x))
+    return b, db
+
+
+def _grid_integrate(quad, p, F):
+    # integral of p(x)F(x) over the grid, F has the shape (N, ...) and the
+    # trailing axes are kept
+    F = np.asarray(F)
+    p = np.asarray(p).reshape((-1,) + (1,) * (F.ndim - 1))
+    return np.real(quad.integrate(p * F))
+
+
+def _outer(b):
+    return b[:, :, None] * b[:, None, :]
+
+
+def _sampled_states(x, quad, integration, p, dp, rho, drho):
+    # the prior and the states on the nodes of a sparse grid or a quasi-Monte
+    # Carlo sequence, the functions are called only on these nodes
+    if integration not in ["smolyak", "qmc"]:
+        raise ValueError(
+            "{!r} is not a valid value for integration, supported values are 'grid', 'smolyak' and 'qmc'.".format(integration))
+    if quad is None:
+        quad = Quadrature(x, method=integration)
+    elif quad.method != integration:
+        raise ValueError("Please make sure quad is built with the method given by integration!")
+
+    funcs = [p, rho, drho] if dp is None else [p, dp, rho, drho]
+    if not all(callable(func) for func in funcs):
+        raise TypeError(
+            "Please make sure p, dp, rho and drho are functions of the parameters when integration is 'smolyak' or 'qmc'!")
+
+    nodes = [list(xv) for xv in quad.points]
+    p_val = np.array([p(xv) for xv in nodes], dtype=np.float64).reshape(-1)
+    dp_val = None if dp is None else np.array([dp(xv) for xv in nodes], dtype=np.float64)
+    rho_val = np.array([rho(xv) for xv in nodes], dtype=np.complex128)
+    drho_val = np.array([drho(xv) for xv in nodes], dtype=np.complex128)
+    return quad, p_val, dp_val, rho_val, drho_val
+
+
+def _sampled_bias(quad, b, db):
+    bias = []
+    for func in [b, db]:
+        if callable(func):
+            val = np.array([func(list(xv)) for xv in quad.points], dtype=np.float64)
+            bias.append(val.reshape(quad.points.shape))
+        elif len(func) == 0:
+            bias.append(np.zeros(quad.points.shape))
+        else:
+            raise TypeError(
+                "Please make sure b and db are functions of the parameters when integration is 'smolyak' or 'qmc'!")
+    return bias
+
+
+def _bias_bound(quad, p, dp, F, b, db, btype):
+    # BCRB and BQCRB from the CFIM or QFIM F with the shape (N, para_num, para_num)
+    para_num = F.shape[-1]
+    if btype == 1:
+        B = 1.0 + db
+        F_inv = np.linalg.pinv(F)
+        F_tot = B[:, :, None] * F_inv * B[:, None, :] + _outer(b)
+        return _grid_integrate(quad, p, F_tot)
+    elif btype == 2:
+        F_res = _grid_integrate(quad, p, F)
+        B_res = np.diag(_grid_integrate(quad, p, 1.0 + db))
+        bb_res = _grid_integrate(quad, p, _outer(b))
+        return np.dot(B_res, np.dot(np.linalg.pinv(F_res), B_res)) + bb_res
+    elif btype == 3:
+        p_val, dp = _grid_prior(p, dp, para_num)
+        I = _outer(dp) / p_val[:, None, None] ** 2
+        G = b[:, :, None] * dp[:, None, :] / p_val[:, None, None]
+        G = G + np.eye(para_num) * (1.0 + db)[:, :, None]
+        F_tot = G @ np.linalg.pinv(F + I) @ G.transpose(0, 2, 1)
+        return _grid_integrate(quad, p, F_tot)
+    else:
+        raise NameError("NameError: btype should be choosen in {1, 2, 3}.")
+
+
+def _VT_bound(quad, p, dp, F):
+    # VTB and QVTB from the CFIM or QFIM F with the shape (N, para_num, para_num)
+    p_val, dp = _grid_prior(p, dp, F.shape[-1])
+    I = _outer(dp) / p_val[:, None, None] ** 2
 
+    F_res = _grid_integrate(quad, p, F)
+    I_res = _grid_integrate(quad, p, I)
+    return np.linalg.pinv(F_res + I_res)
 
-def BCFIM(x, p, rho, drho, M=[], eps=1e-8):
+
+def BCFIM(x, p, rho, drho, M=[], eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian classical Fisher information (BCFI) and the 
     Bayesian classical Fisher information matrix (BCFIM) of the form
@@ -38,6 +157,19 @@ def BCFIM(x, p, rho, drho, M=[], eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, rho and drho are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, rho and drho are functions of the list of
+        parameter values. They are only evaluated on the nodes in the box spanned
+        by x, which can be set with quad.
+
     Returns
     ----------
     **BCFI or BCFIM:** `float or matrix`
@@ -52,67 +184,24 @@ def BCFIM(x, p, rho, drho, M=[], eps=1e-8):
     """
 
     para_num = len(x)
-    if para_num == 1:
-        #### single parameter scenario ####
-        if M == []:
-            M = SIC(len(rho[0]))
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
-
-        p_num = len(p)
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-        p_num = len(p)
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = CFIM(rho[m], [drho[m]], M=M, eps=eps)
-
-        arr = [p[i] * F_tp[i] for i in range(p_num)]
-        return simps(arr, x[0])
+    if integration != "grid":
+        quad, p, _, rho, drho = _sampled_states(x, quad, integration, p, None, rho, drho)
     else:
-        #### multiparameter scenario ####
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-
-        dim = len(rho_list[0])
-        if M == []:
-            M = SIC(dim)
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
-
-        F_list = [
-            [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-            for k in range(para_num)
-        ]
-        for i in range(len(p_list)):
-            F_tp = CFIM(rho_list[i], drho_list[i], M=M, eps=eps)
-            for pj in range(para_num):
-                for pk in range(para_num):
-                    F_list[pj][pk][i] = F_tp[pj][pk]
-
-        BCFIM_res = np.zeros([para_num, para_num])
-        for para_i in range(0, para_num):
-            for para_j in range(para_i, para_num):
-                F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                arr = p * F_ij
-                for si in reversed(range(para_num)):
-                    arr = simps(arr, x[si])
-                BCFIM_res[para_i][para_j] = arr
-                BCFIM_res[para_j][para_i] = arr
-        return BCFIM_res
-
-
-def BQFIM(x, p, rho, drho, LDtype="SLD", eps=1e-8):
+        quad = _quadrature(x, quad)
+    rho, drho = _grid_states(p, rho, drho, para_num)
+
+    if M == []:
+        M = SIC(rho.shape[-1])
+    else:
+        if type(M) != list:
+            raise TypeError("Please make sure M is a list!")
+
+    F = CFIM_batch(rho, drho, M=M, eps=eps)
+    res = _grid_integrate(quad, p, F)
+    return res[0][0] if para_num == 1 else res
+
+
+def BQFIM(x, p, rho, drho, LDtype="SLD", eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian quantum Fisher information (BQFI) and the 
     Bayesian quantum Fisher information matrix (BQFIM) of the form
@@ -146,6 +235,19 @@ def BQFIM(x, p, rho, drho, LDtype="SLD", eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, rho and drho are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, rho and drho are functions of the list of
+        parameter values. They are only evaluated on the nodes in the box spanned
+        by x, which can be set with quad.
+
     Returns
     ----------
     **BQFI or BQFIM:** `float or matrix`
@@ -155,53 +257,18 @@ def BQFIM(x, p, rho, drho, LDtype="SLD", eps=1e-8):
     """
 
     para_num = len(x)
-    if para_num == 1:
-        #### single parameter scenario ####
-        p_num = len(p)
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = QFIM(rho[m], [drho[m]], LDtype=LDtype, eps=eps)
-        arr = [p[i] * F_tp[i] for i in range(p_num)]
-        return simps(arr, x[0])
+    if integration != "grid":
+        quad, p, _, rho, drho = _sampled_states(x, quad, integration, p, None, rho, drho)
     else:
-        #### multiparameter scenario ####
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-
-        F_list = [
-            [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-            for k in range(para_num)
-        ]
-        for i in range(len(p_list)):
-            F_tp = QFIM(rho_list[i], drho_list[i], LDtype=LDtype, eps=eps)
-            for pj in range(para_num):
-                for pk in range(para_num):
-                    F_list[pj][pk][i] = F_tp[pj][pk]
-
-        BQFIM_res = np.zeros([para_num, para_num])
-        for para_i in range(0, para_num):
-            for para_j in range(para_i, para_num):
-                F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                arr = p * F_ij
-                for si in reversed(range(para_num)):
-                    arr = simps(arr, x[si])
-                BQFIM_res[para_i][para_j] = arr
-                BQFIM_res[para_j][para_i] = arr
-        return BQFIM_res
-
-
-def BCRB(x, p, dp, rho, drho, M=[], b=[], db=[], btype=1, eps=1e-8):
+        quad = _quadrature(x, quad)
+    rho, drho = _grid_states(p, rho, drho, para_num)
+
+    F = QFIM_batch(rho, drho, LDtype=LDtype, eps=eps)
+    res = _grid_integrate(quad, p, F)
+    return res[0][0] if para_num == 1 else res
+
+
+def BCRB(x, p, dp, rho, drho, M=[], b=[], db=[], btype=1, eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian Cramer-Rao bound (BCRB). The covariance matrix 
     with a prior distribution $p(\textbf{x})$ is defined as
@@ -280,6 +347,19 @@ def BCRB(x, p, dp, rho, drho, M=[], b=[], db=[], btype=1, eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, dp, rho, drho, b and db are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, dp, rho, drho, b and db are functions of the
+        list of parameter values. They are only evaluated on the nodes in the box
+        spanned by x, which can be set with quad.
+
     Returns
     ----------
     **BCRB:** `float or matrix`
@@ -294,207 +374,29 @@ def BCRB(x, p, dp, rho, drho, M=[], b=[], db=[], btype=1, eps=1e-8):
     """
 
     para_num = len(x)
-    if para_num == 1:
-        #### single parameter scenario ####
-        p_num = len(p)
-        if b == []:
-            b = np.zeros(p_num)
-            db = np.zeros(p_num)
-        if b != [] and db == []:
-            db = np.zeros(p_num)
-
-        if M == []:
-            M = SIC(len(rho[0]))
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
-
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-        if type(b[0]) == list or type(b[0]) == np.ndarray:
-            b = b[0]
-        if type(db[0]) == list or type(db[0]) == np.ndarray:
-            db = db[0]
-
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = CFIM(rho[m], [drho[m]], M=M, eps=eps)
-
-        if btype == 1:
-            arr = [
-                p[i] * ((1 + db[i]) ** 2 / F_tp[i] + b[i] ** 2) for i in range(p_num)
-            ]
-            F = simps(arr, x[0])
-            return F
-        elif btype == 2:
-            arr = [p[i] * F_tp[i] for i in range(p_num)]
-            F1 = simps(arr, x[0])
-            arr2 = [p[j] * (1 + db[j]) for j in range(p_num)]
-            B = simps(arr2, x[0])
-            arr3 = [p[k] * b[k] ** 2 for k in range(p_num)]
-            bb = simps(arr3, x[0])
-            F = B**2 / F1 + bb
-            return F
-        elif btype == 3:
-            I_tp = [np.real(dp[i] * dp[i] / p[i] ** 2) for i in range(p_num)]
-            arr = [p[j]*(dp[j]*b[j]/p[j]+(1 + db[j]))**2 / (I_tp[j] + F_tp[j]) for j in range(p_num)]
-            F = simps(arr, x[0])
-            return F
-        else:
-            raise NameError("NameError: btype should be choosen in {1, 2, 3}.")
+    if integration != "grid":
+        quad, p, dp, rho, drho = _sampled_states(x, quad, integration, p, dp, rho, drho)
     else:
-        #### multiparameter scenario ####
-        if b == []:
-            b, db = [], []
-            for i in range(para_num):
-                b.append(np.zeros(len(x[i])))
-                db.append(np.zeros(len(x[i])))
-        if b != [] and db == []:
-            db = []
-            for i in range(para_num):
-                db.append(np.zeros(len(x[i])))
-
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        dp_ext = extract_ele(dp, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-        b_pro = product(*b)
-        db_pro = product(*db)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-        dp_list = [dpi for dpi in dp_ext]
-
-        b_list, db_list = [], []
-        for b_ele, db_ele in zip(b_pro, db_pro):
-            b_list.append([b_ele[i] for i in range(para_num)])
-            db_list.append([db_ele[j] for j in range(para_num)])
-
-        dim = len(rho_list[0])
-        if M == []:
-            M = SIC(dim)
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
-        if btype == 1:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = CFIM(rho_list[i], drho_list[i], M=M, eps=eps)
-                F_inv = np.linalg.pinv(F_tp)
-                B = np.diag([(1.0 + db_list[i][j]) for j in range(para_num)])
-                term1 = np.dot(B, np.dot(F_inv, B))
-                term2 = np.dot(
-                    np.array(b_list[i]).reshape(para_num, 1),
-                    np.array(b_list[i]).reshape(1, para_num),
-                )
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = term1[pj][pk] + term2[pj][pk]
-
-            res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    res[para_i][para_j] = arr
-                    res[para_j][para_i] = arr
-            return res
-        elif btype == 2:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            B_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            bb_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = CFIM(rho_list[i], drho_list[i], M=M, eps=eps)
-                B_tp = np.diag([(1.0 + db_list[i][j]) for j in range(para_num)])
-                bb_tp = np.dot(
-                    np.array(b_list[i]).reshape(para_num, 1),
-                    np.array(b_list[i]).reshape(1, para_num),
-                )
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = F_tp[pj][pk]
-                        B_list[pj][pk][i] = B_tp[pj][pk]
-                        bb_list[pj][pk][i] = bb_tp[pj][pk]
-
-            F_res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    F_res[para_i][para_j] = arr
-                    F_res[para_j][para_i] = arr
-            B_res = np.zeros([para_num, para_num])
-            bb_res = np.zeros([para_num, para_num])
-            for para_m in range(para_num):
-                for para_n in range(para_num):
-                    B_mn = np.array(B_list[para_m][para_n]).reshape(p_shape)
-                    bb_mn = np.array(bb_list[para_m][para_n]).reshape(p_shape)
-                    arr2 = p * B_mn
-                    arr3 = p * bb_mn
-                    for sj in reversed(range(para_num)):
-                        arr2 = simps(arr2, x[sj])
-                        arr3 = simps(arr3, x[sj])
-                    B_res[para_m][para_n] = arr2
-                    bb_res[para_m][para_n] = arr3
-            res = np.dot(B_res, np.dot(np.linalg.pinv(F_res), B_res)) + bb_res
-            return res
-        elif btype == 3:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = CFIM(rho_list[i], drho_list[i], M=M, eps=eps)
-                I_tp = np.zeros((para_num, para_num))
-                G_tp = np.zeros((para_num, para_num))
-                for pm in range(para_num):
-                    for pn in range(para_num):
-                        if pm == pn:
-                            G_tp[pm][pn] = dp_list[i][pn]*b_list[i][pm]/p_list[i]+(1.0 + db_list[i][pm])
-                        else:
-                            G_tp[pm][pn] = dp_list[i][pn]*b_list[i][pm]/p_list[i]
-                        I_tp[pm][pn] = dp_list[i][pm] * dp_list[i][pn] / p_list[i] ** 2
-
-                F_tot = np.dot(G_tp, np.dot(np.linalg.pinv(F_tp + I_tp), G_tp.T))
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = F_tot[pj][pk]
-
-            res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    res[para_i][para_j] = arr
-                    res[para_j][para_i] = arr
-            return res
-        else:
-            raise NameError("NameError: btype should be choosen in {1, 2, 3}.")
+        quad = _quadrature(x, quad)
+    rho, drho = _grid_states(p, rho, drho, para_num)
+    if integration == "grid":
+        b, db = _grid_bias(x, b, db)
+    else:
+        b, db = _sampled_bias(quad, b, db)
 
+    if M == []:
+        M = SIC(rho.shape[-1])
+    else:
+        if type(M) != list:
+            raise TypeError("Please make sure M is a list!")
 
-def BQCRB(x, p, dp, rho, drho, b=[], db=[], btype=1, LDtype="SLD", eps=1e-8):
+    F = CFIM_batch(rho, drho, M=M, eps=eps)
+
+    res = _bias_bound(quad, p, dp, F, b, db, btype)
+    return res[0][0] if para_num == 1 else res
+
+
+def BQCRB(x, p, dp, rho, drho, b=[], db=[], btype=1, LDtype="SLD", eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian quantum Cramer-Rao bound (BQCRB). The covariance matrix 
     with a prior distribution $p(\textbf{x})$ is defined as
@@ -575,6 +477,19 @@ def BQCRB(x, p, dp, rho, drho, b=[], db=[], btype=1, LDtype="SLD", eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, dp, rho, drho, b and db are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, dp, rho, drho, b and db are functions of the
+        list of parameter values. They are only evaluated on the nodes in the box
+        spanned by x, which can be set with quad.
+
     Returns
     ----------
     **BQCRB:** `float or matrix`
@@ -584,197 +499,24 @@ def BQCRB(x, p, dp, rho, drho, b=[], db=[], btype=1, LDtype="SLD", eps=1e-8):
     """
 
     para_num = len(x)
+    if integration != "grid":
+        quad, p, dp, rho, drho = _sampled_states(x, quad, integration, p, dp, rho, drho)
+    else:
+        quad = _quadrature(x, quad)
 
-    if para_num == 1:
-        #### single parameter scenario ####
-        p_num = len(p)
-
-        if b == []:
-            b = np.zeros(p_num)
-            db = np.zeros(p_num)
-        if b != [] and db == []:
-            db = np.zeros(p_num)
-
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-        if type(b[0]) == list or type(b[0]) == np.ndarray:
-            b = b[0]
-        if type(db[0]) == list or type(db[0]) == np.ndarray:
-            db = db[0]
-
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = QFIM(rho[m], [drho[m]], LDtype=LDtype, eps=eps)
-
-        if btype == 1:
-            arr = [
-                p[i] * ((1 + db[i]) ** 2 / F_tp[i] + b[i] ** 2) for i in range(p_num)
-            ]
-            F = simps(arr, x[0])
-            return F
-        elif btype == 2:
-            arr2 = [p[i] * F_tp[i] for i in range(p_num)]
-            F2 = simps(arr2, x[0])
-            arr2 = [p[j] * (1 + db[j]) for j in range(p_num)]
-            B = simps(arr2, x[0])
-            arr3 = [p[k] * b[k] ** 2 for k in range(p_num)]
-            bb = simps(arr3, x[0])
-            F = B**2 / F2 + bb
-            return F
-        elif btype == 3:
-            I_tp = [np.real(dp[i] * dp[i] / p[i] ** 2) for i in range(p_num)]
-            arr = [p[j]*(dp[j]*b[j]/p[j]+(1 + db[j]))**2 / (I_tp[j] + F_tp[j]) for j in range(p_num)]
-            F = simps(arr, x[0])
-            return F
-        else:
-            raise NameError("NameError: btype should be choosen in {1, 2, 3}.")
+    rho, drho = _grid_states(p, rho, drho, para_num)
+    if integration == "grid":
+        b, db = _grid_bias(x, b, db)
     else:
-        #### multiparameter scenario ####
-        if b == []:
-            b, db = [], []
-            for i in range(para_num):
-                b.append(np.zeros(len(x[i])))
-                db.append(np.zeros(len(x[i])))
-        if b != [] and db == []:
-            db = []
-            for i in range(para_num):
-                db.append(np.zeros(len(x[i])))
-
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        dp_ext = extract_ele(dp, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-        b_pro = product(*b)
-        db_pro = product(*db)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-        dp_list = [dpi for dpi in dp_ext]
-
-        b_list, db_list = [], []
-        for b_ele, db_ele in zip(b_pro, db_pro):
-            b_list.append([b_ele[i] for i in range(para_num)])
-            db_list.append([db_ele[j] for j in range(para_num)])
-
-        if btype == 1:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = QFIM(rho_list[i], drho_list[i], LDtype=LDtype, eps=eps)
-                F_inv = np.linalg.pinv(F_tp)
-                B = np.diag([(1.0 + db_list[i][j]) for j in range(para_num)])
-                term1 = np.dot(B, np.dot(F_inv, B))
-                term2 = np.dot(
-                    np.array(b_list[i]).reshape(para_num, 1),
-                    np.array(b_list[i]).reshape(1, para_num),
-                )
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = term1[pj][pk] + term2[pj][pk]
-
-            res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    res[para_i][para_j] = arr
-                    res[para_j][para_i] = arr
-            return res
-        elif btype == 2:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            B_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            bb_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = QFIM(rho_list[i], drho_list[i], LDtype=LDtype, eps=eps)
-                B_tp = np.diag([(1.0 + db_list[i][j]) for j in range(para_num)])
-                bb_tp = np.dot(
-                    np.array(b_list[i]).reshape(para_num, 1),
-                    np.array(b_list[i]).reshape(1, para_num),
-                )
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = F_tp[pj][pk]
-                        B_list[pj][pk][i] = B_tp[pj][pk]
-                        bb_list[pj][pk][i] = bb_tp[pj][pk]
-
-            F_res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    F_res[para_i][para_j] = arr
-                    F_res[para_j][para_i] = arr
-            B_res = np.zeros([para_num, para_num])
-            bb_res = np.zeros([para_num, para_num])
-            for para_m in range(para_num):
-                for para_n in range(para_num):
-                    B_mn = np.array(B_list[para_m][para_n]).reshape(p_shape)
-                    bb_mn = np.array(bb_list[para_m][para_n]).reshape(p_shape)
-                    arr2 = p * B_mn
-                    arr3 = p * bb_mn
-                    for sj in reversed(range(para_num)):
-                        arr2 = simps(arr2, x[sj])
-                        arr3 = simps(arr3, x[sj])
-                    B_res[para_m][para_n] = arr2
-                    bb_res[para_m][para_n] = arr3
-            res = np.dot(B_res, np.dot(np.linalg.pinv(F_res), B_res)) + bb_res
-            return res
-        elif btype == 3:
-            F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-            for i in range(len(p_list)):
-                F_tp = QFIM(rho_list[i], drho_list[i], LDtype=LDtype, eps=eps)
-                I_tp = np.zeros((para_num, para_num))
-                G_tp = np.zeros((para_num, para_num))
-                for pm in range(para_num):
-                    for pn in range(para_num):
-                        if pm == pn:
-                            G_tp[pm][pn] = dp_list[i][pn]*b_list[i][pm]/p_list[i]+(1.0 + db_list[i][pm])
-                        else:
-                            G_tp[pm][pn] = dp_list[i][pn]*b_list[i][pm]/p_list[i]
-                        I_tp[pm][pn] = dp_list[i][pm] * dp_list[i][pn] / p_list[i] ** 2
-
-                F_tot = np.dot(G_tp, np.dot(np.linalg.pinv(F_tp + I_tp), G_tp.T))
-                for pj in range(para_num):
-                    for pk in range(para_num):
-                        F_list[pj][pk][i] = F_tot[pj][pk]
-
-            res = np.zeros([para_num, para_num])
-            for para_i in range(0, para_num):
-                for para_j in range(para_i, para_num):
-                    F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                    arr = p * F_ij
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    res[para_i][para_j] = arr
-                    res[para_j][para_i] = arr
-            return res
-        else:
-            raise NameError("NameError: btype should be choosen in {1, 2, 3}.")
+        b, db = _sampled_bias(quad, b, db)
+
+    F = QFIM_batch(rho, drho, LDtype=LDtype, eps=eps)
+
+    res = _bias_bound(quad, p, dp, F, b, db, btype)
+    return res[0][0] if para_num == 1 else res
 
 
-def VTB(x, p, dp, rho, drho, M=[], eps=1e-8):
+def VTB(x, p, dp, rho, drho, M=[], eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian version of Cramer-Rao bound introduced by
     Van Trees (VTB). The covariance matrix with a prior distribution $p(\textbf{x})$ 
@@ -827,6 +569,19 @@ def VTB(x, p, dp, rho, drho, M=[], eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, dp, rho and drho are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, dp, rho and drho are functions of the list of
+        parameter values. They are only evaluated on the nodes in the box spanned
+        by x, which can be set with quad.
+
     Returns
     ----------
     **VTB:** `float or matrix`
@@ -841,88 +596,24 @@ def VTB(x, p, dp, rho, drho, M=[], eps=1e-8):
     """
 
     para_num = len(x)
-    p_num = len(p)
-
-    if para_num == 1:
-        #### single parameter scenario ####
-        if M == []:
-            M = SIC(len(rho[0]))
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
+    if integration != "grid":
+        quad, p, dp, rho, drho = _sampled_states(x, quad, integration, p, dp, rho, drho)
+    else:
+        quad = _quadrature(x, quad)
 
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-        if type(dp[0]) == list or type(dp[0]) == np.ndarray:
-            dp = [dp[i][0] for i in range(p_num)]
+    rho, drho = _grid_states(p, rho, drho, para_num)
 
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = CFIM(rho[m], [drho[m]], M=M, eps=eps)
+    if M == []:
+        M = SIC(rho.shape[-1])
+    else:
+        if type(M) != list:
+            raise TypeError("Please make sure M is a list!")
 
+    F = CFIM_batch(rho, drho, M=M, eps=eps)
+    res = _VT_bound(quad, p, dp, F)
+    return res[0][0] if para_num == 1 else res
 
-        arr1 = [np.real(dp[i] * dp[i] / p[i]) for i in range(p_num)]
-        I = simps(arr1, x[0])
-        arr2 = [np.real(F_tp[j] * p[j]) for j in range(p_num)]
-        F = simps(arr2, x[0])
-        return 1.0 / (I + F)
-    else:
-        #### multiparameter scenario ####
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        dp_ext = extract_ele(dp, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-        dp_list = [dpi for dpi in dp_ext]
-
-        dim = len(rho_list[0])
-        if M == []:
-            M = SIC(dim)
-        else:
-            if type(M) != list:
-                raise TypeError("Please make sure M is a list!")
-        
-        F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-        I_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-        for i in range(len(p_list)):
-            F_tp = CFIM(rho_list[i], drho_list[i], M=M, eps=eps)
-            for pj in range(para_num):
-                for pk in range(para_num):
-                    F_list[pj][pk][i] = F_tp[pj][pk]
-                    I_list[pj][pk][i] = (
-                            dp_list[i][pj] * dp_list[i][pk] / p_list[i] ** 2
-                        )
-
-        F_res = np.zeros([para_num, para_num])
-        I_res = np.zeros([para_num, para_num])
-        for para_i in range(0, para_num):
-            for para_j in range(para_i, para_num):
-                F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                I_ij = np.array(I_list[para_i][para_j]).reshape(p_shape)
-                arr1 = p * F_ij
-                arr2 = p * I_ij
-                for si in reversed(range(para_num)):
-                    arr1 = simps(arr1, x[si])
-                    arr2 = simps(arr2, x[si])
-                F_res[para_i][para_j] = arr1
-                F_res[para_j][para_i] = arr1
-                I_res[para_i][para_j] = arr2
-                I_res[para_j][para_i] = arr2
-        return np.linalg.pinv(F_res + I_res)
-
-def QVTB(x, p, dp, rho, drho, LDtype="SLD", eps=1e-8):
+def QVTB(x, p, dp, rho, drho, LDtype="SLD", eps=1e-8, quad=None, integration="grid"):
     r"""
     Calculation of the Bayesian version of quantum Cramer-Rao bound introduced 
     by Van Trees (QVTB). The covariance matrix with a prior distribution p(\textbf{x}) 
@@ -976,6 +667,19 @@ def QVTB(x, p, dp, rho, drho, LDtype="SLD", eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters. Options are:  
+        "grid" (default) -- p, dp, rho and drho are given on the grid x.  
+        "smolyak" -- Smolyak sparse grid, see `Quadrature`.  
+        "qmc" -- Quasi-Monte Carlo integration with a scrambled Sobol sequence.  
+        For "smolyak" and "qmc", p, dp, rho and drho are functions of the list of
+        parameter values. They are only evaluated on the nodes in the box spanned
+        by x, which can be set with quad.
+
     Returns
     ----------
     **QVTB:** `float or matrix`
@@ -984,71 +688,16 @@ def QVTB(x, p, dp, rho, drho, LDtype="SLD", eps=1e-8):
         more than one), it returns a matrix.
     """
     para_num = len(x)
-    p_num = len(p)
-
-    if para_num == 1:
-        if type(drho[0]) == list:
-            drho = [drho[i][0] for i in range(p_num)]
-        if type(dp[0]) == list or type(dp[0]) == np.ndarray:
-            dp = [dp[i][0] for i in range(p_num)]
-
-        F_tp = np.zeros(p_num)
-        for m in range(p_num):
-            F_tp[m] = QFIM(rho[m], [drho[m]], LDtype=LDtype, eps=eps)
-
-        arr1 = [np.real(dp[i] * dp[i] / p[i]) for i in range(p_num)]
-        I = simps(arr1, x[0])
-        arr2 = [np.real(F_tp[j] * p[j]) for j in range(p_num)]
-        F = simps(arr2, x[0])
-        return 1.0 / (I + F)
+    if integration != "grid":
+        quad, p, dp, rho, drho = _sampled_states(x, quad, integration, p, dp, rho, drho)
     else:
-        #### multiparameter scenario ####
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        dp_ext = extract_ele(dp, para_num)
-        rho_ext = extract_ele(rho, para_num)
-        drho_ext = extract_ele(drho, para_num)
-
-        p_list, rho_list, drho_list = [], [], []
-        for p_ele, rho_ele, drho_ele in zip(p_ext, rho_ext, drho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-            drho_list.append(drho_ele)
-        dp_list = [dpi for dpi in dp_ext]
-
-        F_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-        I_list = [
-                [[0.0 for i in range(len(p_list))] for j in range(para_num)]
-                for k in range(para_num)
-            ]
-        for i in range(len(p_list)):
-            F_tp = QFIM(rho_list[i], drho_list[i], LDtype=LDtype, eps=eps)
-            for pj in range(para_num):
-                for pk in range(para_num):
-                    F_list[pj][pk][i] = F_tp[pj][pk]
-                    I_list[pj][pk][i] = (
-                            dp_list[i][pj] * dp_list[i][pk] / p_list[i] ** 2
-                        )
-
-        F_res = np.zeros([para_num, para_num])
-        I_res = np.zeros([para_num, para_num])
-        for para_i in range(0, para_num):
-            for para_j in range(para_i, para_num):
-                F_ij = np.array(F_list[para_i][para_j]).reshape(p_shape)
-                I_ij = np.array(I_list[para_i][para_j]).reshape(p_shape)
-                arr1 = p * F_ij
-                arr2 = p * I_ij
-                for si in reversed(range(para_num)):
-                    arr1 = simps(arr1, x[si])
-                    arr2 = simps(arr2, x[si])
-                F_res[para_i][para_j] = arr1
-                F_res[para_j][para_i] = arr1
-                I_res[para_i][para_j] = arr2
-                I_res[para_j][para_i] = arr2
-        return np.linalg.pinv(F_res + I_res)
+        quad = _quadrature(x, quad)
+
+    rho, drho = _grid_states(p, rho, drho, para_num)
+
+    F = QFIM_batch(rho, drho, LDtype=LDtype, eps=eps)
+    res = _VT_bound(quad, p, dp, F)
+    return res[0][0] if para_num == 1 else res
 
 
 def OBB_func(x, y, t, J, F):
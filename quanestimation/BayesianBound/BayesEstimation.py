@@ -1,11 +1,9 @@
 import numpy as np
-from scipy.integrate import simps
-from quanestimation.Common.Common import extract_ele
+from quanestimation.BayesianBound.Quadrature import _quadrature
 from quanestimation.Common.Common import SIC
-from itertools import product
 
 
-def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
+def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False, quad=None):
     """
     Bayesian estimation. The prior distribution is updated via the posterior  
     distribution obtained by the Bayes’ rule and the estimated value of parameters
@@ -42,6 +40,11 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
         `False` the posterior distribution in the final iteration and the estimated values
         in all iterations will be saved in "pout.npy" and "xout.npy". 
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x for the normalization and the trapezoidal rule for
+        the expectation value in the multiparameter case.
+
     Returns
     ----------
     **pout and xout:** `array and float`
@@ -55,6 +58,9 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
 
     para_num = len(x)
     max_episode = len(y)
+    mean_quad = _quadrature(x, quad, method="trapz")
+    quad = _quadrature(x, quad)
+    x = quad.x
     if para_num == 1:
         #### single parameter scenario ####
         if M == []:
@@ -62,30 +68,25 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
         else:
             if type(M) != list:
                 raise TypeError("Please make sure M is a list!")
+        table = _likelihood_table(rho, M)
         if savefile == False:
             x_out = []
             if estimator == "mean":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx = np.zeros(len(x[0]))
-                    for xi in range(len(x[0])):
-                        p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                        pyx[xi] = p_tp
+                    pyx = table[:, res_exp]
                     arr = [pyx[m] * p[m] for m in range(len(x[0]))]
-                    py = simps(arr, x[0])
+                    py = quad.integrate(arr)
                     p_update = pyx * p / py
                     p = p_update
-                    mean = simps([p[m]*x[0][m] for m in range(len(x[0]))], x[0])
+                    mean = quad.integrate(p * x[0])
                     x_out.append(mean)
             elif estimator == "MAP":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx = np.zeros(len(x[0]))
-                    for xi in range(len(x[0])):
-                        p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                        pyx[xi] = p_tp
+                    pyx = table[:, res_exp]
                     arr = [pyx[m] * p[m] for m in range(len(x[0]))]
-                    py = simps(arr, x[0])
+                    py = quad.integrate(arr)
                     p_update = pyx * p / py
                     p = p_update
                     indx = np.where(p == max(p))[0][0]
@@ -101,26 +102,20 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
             if estimator == "mean":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx = np.zeros(len(x[0]))
-                    for xi in range(len(x[0])):
-                        p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                        pyx[xi] = p_tp
+                    pyx = table[:, res_exp]
                     arr = [pyx[m] * p[m] for m in range(len(x[0]))]
-                    py = simps(arr, x[0])
+                    py = quad.integrate(arr)
                     p_update = pyx * p / py
                     p = p_update
-                    mean = simps([p[m]*x[0][m] for m in range(len(x[0]))], x[0])
+                    mean = quad.integrate(p * x[0])
                     p_out.append(p)
                     x_out.append(mean)
             elif estimator == "MAP":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx = np.zeros(len(x[0]))
-                    for xi in range(len(x[0])):
-                        p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                        pyx[xi] = p_tp
+                    pyx = table[:, res_exp]
                     arr = [pyx[m] * p[m] for m in range(len(x[0]))]
-                    py = simps(arr, x[0])
+                    py = quad.integrate(arr)
                     p_update = pyx * p / py
                     p = p_update
                     indx = np.where(p == max(p))[0][0]
@@ -135,52 +130,32 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
     else:
         #### multiparameter scenario ####
         p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        rho_ext = extract_ele(rho, para_num)
-
-        p_list, rho_list = [], []
-        for p_ele, rho_ele in zip(p_ext, rho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-
-        dim = len(rho_list[0])
+        rho = np.asarray(rho)
+        dim = rho.shape[-1]
         if M == []:
             M = SIC(dim)
         else:
             if type(M) != list:
                 raise TypeError("Please make sure M is a list!")
+        table = _likelihood_table(rho, M)
 
         if savefile == False:
             x_out = []
             if estimator == "mean":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx_list = np.zeros(len(p_list))
-                    for xi in range(len(p_list)):
-                        p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                        pyx_list[xi] = p_tp
-                    pyx = pyx_list.reshape(p_shape)
-                    arr = p * pyx
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    py = arr
+                    pyx = table[:, res_exp].reshape(p_shape)
+                    py = quad.integrate(p * pyx)
                     p_update = p * pyx / py
                     p = p_update
                     
-                    mean = integ(x, p)
+                    mean = integ(x, p, quad=mean_quad)
                     x_out.append(mean)
             elif estimator == "MAP":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx_list = np.zeros(len(p_list))
-                    for xi in range(len(p_list)):
-                        p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                        pyx_list[xi] = p_tp
-                    pyx = pyx_list.reshape(p_shape)
-                    arr = p * pyx
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    py = arr
+                    pyx = table[:, res_exp].reshape(p_shape)
+                    py = quad.integrate(p * pyx)
                     p_update = p * pyx / py
                     p = p_update
 
@@ -197,33 +172,19 @@ def Bayes(x, p, rho, y, M=[], estimator="mean", savefile=False):
             if estimator == "mean":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx_list = np.zeros(len(p_list))
-                    for xi in range(len(p_list)):
-                        p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                        pyx_list[xi] = p_tp
-                    pyx = pyx_list.reshape(p_shape)
-                    arr = p * pyx
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    py = arr
+                    pyx = table[:, res_exp].reshape(p_shape)
+                    py = quad.integrate(p * pyx)
                     p_update = p * pyx / py
                     p = p_update
 
-                    mean = integ(x, p)
+                    mean = integ(x, p, quad=mean_quad)
                     p_out.append(p)
                     x_out.append(mean)
             elif estimator == "MAP":
                 for mi in range(max_episode):
                     res_exp = int(y[mi])
-                    pyx_list = np.zeros(len(p_list))
-                    for xi in range(len(p_list)):
-                        p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                        pyx_list[xi] = p_tp
-                    pyx = pyx_list.reshape(p_shape)
-                    arr = p * pyx
-                    for si in reversed(range(para_num)):
-                        arr = simps(arr, x[si])
-                    py = arr
+                    pyx = table[:, res_exp].reshape(p_shape)
+                    py = quad.integrate(p * pyx)
                     p_update = p * pyx / py
                     p = p_update
 
@@ -285,15 +246,14 @@ def MLE(x, rho, y, M=[], savefile=False):
         else:
             if type(M) != list:
                 raise TypeError("Please make sure M is a list!")
+        table = _likelihood_table(rho, M)
 
         if savefile == False:
             x_out = []
             L_out = np.ones(len(x[0]))
             for mi in range(max_episode):
                 res_exp = int(y[mi])
-                for xi in range(len(x[0])):
-                    p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                    L_out[xi] = L_out[xi] * p_tp
+                L_out *= table[:, res_exp]
                 indx = np.where(L_out == max(L_out))[0][0]
                 x_out.append(x[0][indx])
             np.save("Lout", L_out)
@@ -305,9 +265,7 @@ def MLE(x, rho, y, M=[], savefile=False):
             L_tp = np.ones(len(x[0]))
             for mi in range(max_episode):
                 res_exp = int(y[mi])
-                for xi in range(len(x[0])):
-                    p_tp = np.real(np.trace(np.dot(rho[xi], M[res_exp])))
-                    L_tp[xi] = L_tp[xi] * p_tp
+                L_tp *= table[:, res_exp]
                 indx = np.where(L_tp == max(L_tp))[0][0]
                 L_out.append(L_tp)
                 x_out.append(x[0][indx])
@@ -320,27 +278,21 @@ def MLE(x, rho, y, M=[], savefile=False):
         p_shape = []
         for i in range(para_num):
             p_shape.append(len(x[i]))
-        rho_ext = extract_ele(rho, para_num)
-
-        rho_list = []
-        for rho_ele in rho_ext:
-            rho_list.append(rho_ele)
-
-        dim = len(rho_list[0])
+        rho = np.asarray(rho)
+        dim = rho.shape[-1]
         if M == []:
             M = SIC(dim)
         else:
             if type(M) != list:
                 raise TypeError("Please make sure M is a list!")
+        table = _likelihood_table(rho, M)
 
         if savefile == False:
             x_out = []
-            L_list = np.ones(len(rho_list))
+            L_list = np.ones(len(table))
             for mi in range(max_episode):
                 res_exp = int(y[mi])
-                for xi in range(len(rho_list)):
-                    p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                    L_list[xi] = L_list[xi] * p_tp
+                L_list *= table[:, res_exp]
                 L_out = L_list.reshape(p_shape)
                 indx = np.where(L_out == np.max(L_out))
                 x_out.append([x[i][indx[i][0]] for i in range(para_num)])
@@ -350,12 +302,10 @@ def MLE(x, rho, y, M=[], savefile=False):
             return L_out, x_out[-1]
         else:
             L_out, x_out = [], []
-            L_list = np.ones(len(rho_list))
+            L_list = np.ones(len(table))
             for mi in range(max_episode):
                 res_exp = int(y[mi])
-                for xi in range(len(rho_list)):
-                    p_tp = np.real(np.trace(np.dot(rho_list[xi], M[res_exp])))
-                    L_list[xi] = L_list[xi] * p_tp
+                L_list *= table[:, res_exp]
                 L_tp = L_list.reshape(p_shape)
                 indx = np.where(L_tp == np.max(L_tp))
                 L_out.append(L_tp)
@@ -365,26 +315,47 @@ def MLE(x, rho, y, M=[], savefile=False):
             np.save("xout", x_out)
             return L_tp, x_out[-1]
 
-def integ(x, p):
+def _likelihood_table(rho, M, chunk_size=None):
+    # probabilities Tr(rho M_y) of all the outcomes on all the points of the grid
+    # with the shape (N, len(M)), the density matrices are read chunk by chunk
+    rho = np.asarray(rho)
+    dim = rho.shape[-1]
+    rho = rho.reshape(-1, dim, dim)
+    M = np.array(M, dtype=np.complex128)
+    if chunk_size is None:
+        chunk_size = max(1, 2**26 // (16 * rho[0].size))
+    table = np.zeros((len(rho), len(M)))
+    for start in range(0, len(rho), chunk_size):
+        end = min(start + chunk_size, len(rho))
+        table[start:end] = np.real(np.einsum("nij,yji->ny", rho[start:end], M))
+    return table
+
+
+def integ(x, p, quad=None):
+    # expectation values of the parameters, the trapezoidal rule is used on x
+    # unless quad is given
+    quad = _quadrature(x, quad, method="trapz")
     para_num = len(x)
+    pW = quad.W * np.asarray(p)
     mean = [0.0 for i in range(para_num)]
     for i in range(para_num):
-        p_tp = p
-        if i == para_num-1:
-            for si in range(para_num-1):
-                p_tp = np.trapz(p_tp, x[si],axis=0)
-        
-        elif i == 0:
-            for si in reversed(range(1,para_num)):
-                p_tp = np.trapz(p_tp, x[si])
-        else:
-            p_tp = np.trapz(p_tp, x[-1])
-            for si in range(para_num-1):
-                p_tp = np.trapz(p_tp, x[si], axis=0)
-        mean[i] = np.trapz(x[i]*p_tp, x[i])
+        axes = tuple(si for si in range(para_num) if si != i)
+        mean[i] = np.dot(np.sum(pW, axis=axes), quad.x[i])
     return mean
 
-def BayesCost(x, p, xest, rho, M, W=[], eps=1e-8):
+
+def _grid_flatten(x, p, rho):
+    # prior, density matrices and parameter values on the grid as the stacks
+    # (N,), (N, dim, dim) and (N, para_num)
+    p_val = np.asarray(p, dtype=np.float64).reshape(-1)
+    rho_list = np.asarray(rho, dtype=np.complex128)
+    dim = rho_list.shape[-1]
+    rho_list = rho_list.reshape(-1, dim, dim)
+    x_list = np.stack(np.meshgrid(*x, indexing="ij"), axis=-1).reshape(-1, len(x))
+    return p_val, rho_list, x_list
+
+
+def BayesCost(x, p, xest, rho, M, W=[], eps=1e-8, quad=None):
     """
     Calculation of the average Bayesian cost with a quadratic cost function.
 
@@ -411,12 +382,18 @@ def BayesCost(x, p, xest, rho, M, W=[], eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
     Returns
     ----------
     **The average Bayesian cost:** `float`
         -- The average Bayesian cost.
     """
     para_num = len(x)
+    quad = _quadrature(x, quad)
+    x = quad.x
     if para_num == 1:
         # single-parameter scenario
         if M == []:
@@ -426,26 +403,12 @@ def BayesCost(x, p, xest, rho, M, W=[], eps=1e-8):
                 raise TypeError("Please make sure M is a list!")
         p_num = len(x[0])
         value = [p[i]*sum([np.trace(np.dot(rho[i], M[mi]))*(x[0][i]-xest[mi][0])**2 for mi in range(len(M))]) for i in range(p_num)]
-        C = simps(value, x[0])
+        C = quad.integrate(value)
         return np.real(C)
     else:
         # multi-parameter scenario
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        rho_ext = extract_ele(rho, para_num)
-
-        p_list, rho_list = [], []
-        for p_ele, rho_ele in zip(p_ext, rho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
-
-        x_pro = product(*x)
-        x_list = []
-        for x_ele in x_pro:
-            x_list.append([x_ele[i] for i in range(para_num)])
-            
-        dim = len(rho_list[0])
-        p_num = len(p_list)
+        p_val, rho_list, x_list = _grid_flatten(x, p, rho)
+        dim = rho_list.shape[-1]
         
         if W == []:
             W = np.identity(para_num)
@@ -456,20 +419,15 @@ def BayesCost(x, p, xest, rho, M, W=[], eps=1e-8):
             if type(M) != list:
                 raise TypeError("Please make sure M is a list!")
 
-        value = [0.0 for i in range(p_num)]
-        for i in range(p_num):
-            x_tp = np.array(x_list[i])
-            xCx = 0.0
-            for mi in range(len(M)):
-                xCx += np.trace(np.dot(rho_list[i], M[mi]))*np.dot((x_tp-xest[mi]).reshape(1, -1), np.dot(W, (x_tp-xest[mi]).reshape(-1, 1)))[0][0]
-            value[i] = p_list[i]*xCx
-        C = np.array(value).reshape(p_shape)
-        for si in reversed(range(para_num)):
-            C = simps(C, x[si])
+        # Tr(rho M_m) and the quadratic cost (x-xest_m)^T W (x-xest_m) on the grid
+        pyx = np.einsum("nij,mji->nm", rho_list, np.array(M))
+        diff = x_list[:, None, :] - np.array(xest, dtype=np.float64).reshape(len(M), para_num)
+        xCx = np.einsum("nmi,ij,nmj->nm", diff, np.array(W), diff)
+        C = quad.integrate(p_val * np.sum(pyx * xCx, axis=1))
         return np.real(C)
     
     
-def BCB(x, p, rho, W=[], eps=1e-8):
+def BCB(x, p, rho, W=[], eps=1e-8, quad=None):
     """
     Calculation of the Bayesian cost bound with a quadratic cost function.
 
@@ -490,85 +448,52 @@ def BCB(x, p, rho, W=[], eps=1e-8):
     > **eps:** `float`
         -- Machine epsilon.
 
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
     Returns
     ----------
     **BCB:** `float`
         -- The value of the minimum Bayesian cost.
     """
     para_num = len(x)
+    quad = _quadrature(x, quad)
+    x = quad.x
     if para_num == 1:
         # single-parameter scenario
-        dim = len(rho[0])
-        p_num = len(x[0])
-        value = [p[i]*x[0][i]**2 for i in range(p_num)]
-        delta2_x = simps(value, x[0])
-        rho_avg = np.zeros((dim, dim), dtype=np.complex128)
-        rho_pri = np.zeros((dim, dim), dtype=np.complex128)
-        for di in range(dim):
-            for dj in range(dim):
-                rho_avg_arr = [p[m]*rho[m][di][dj] for m in range(p_num)]
-                rho_pri_arr = [p[n]*x[0][n]*rho[n][di][dj] for n in range(p_num)]
-                rho_avg[di][dj] = simps(rho_avg_arr, x[0])
-                rho_pri[di][dj] = simps(rho_pri_arr, x[0])
+        p_val, rho_list, x_list = _grid_flatten(x, p, rho)
+        delta2_x = quad.integrate(p_val * x[0]**2)
+        rho_avg = quad.integrate(p_val[:, None, None] * rho_list)
+        rho_pri = quad.integrate((p_val * x[0])[:, None, None] * rho_list)
         Lambda = Lambda_avg(rho_avg, [rho_pri], eps=eps)
         minBC = delta2_x-np.real(np.trace(np.dot(np.dot(rho_avg, Lambda[0]), Lambda[0])))
         return minBC
     else:
         # multi-parameter scenario
-        p_shape = np.shape(p)
-        p_ext = extract_ele(p, para_num)
-        rho_ext = extract_ele(rho, para_num)
-
-        p_list, rho_list = [], []
-        for p_ele, rho_ele in zip(p_ext, rho_ext):
-            p_list.append(p_ele)
-            rho_list.append(rho_ele)
+        p_val, rho_list, x_list = _grid_flatten(x, p, rho)
 
-        dim = len(rho_list[0])
-        p_num = len(p_list)
-
-        x_pro = product(*x)
-        x_list = []
-        for x_ele in x_pro:
-            x_list.append([x_ele[i] for i in range(para_num)])
-        
         if W == []:
             W = np.identity(para_num)
         
-        value = [0.0 for i in range(p_num)]
-        for i in range(p_num):
-            x_tp = np.array(x_list[i])
-            xCx = np.dot(x_tp.reshape(1, -1), np.dot(W, x_tp.reshape(-1, 1)))[0][0]
-            value[i] = p_list[i]*xCx
-        delta2_x = np.array(value).reshape(p_shape)
-        for si in reversed(range(para_num)):
-            delta2_x = simps(delta2_x, x[si])
-        rho_avg = np.zeros((dim, dim), dtype=np.complex128)
-        rho_pri = [np.zeros((dim, dim), dtype=np.complex128) for i in range(para_num)]
-        for di in range(dim):
-            for dj in range(dim):
-                rho_avg_arr = [p_list[m]*rho_list[m][di][dj] for m in range(p_num)]
-                rho_avg_tp = np.array(rho_avg_arr).reshape(p_shape)
-                for si in reversed(range(para_num)):
-                    rho_avg_tp = simps(rho_avg_tp, x[si])
-                rho_avg[di][dj] = rho_avg_tp
-
-                for para_i in range(para_num):
-                    rho_pri_arr = [p_list[n]*x_list[n][para_i]*rho_list[n][di][dj] for n in range(p_num)]
-                    rho_pri_tp = np.array(rho_pri_arr).reshape(p_shape)
-                    for si in reversed(range(para_num)):
-                        rho_pri_tp = simps(rho_pri_tp, x[si])
-
-                    rho_pri[para_i][di][dj] = rho_pri_tp
+        xCx = np.einsum("ni,ij,nj->n", x_list, np.array(W), x_list)
+        delta2_x = quad.integrate(p_val * xCx)
+        rho_avg = quad.integrate(p_val[:, None, None] * rho_list)
+        rho_pri = [
+            quad.integrate((p_val * x_list[:, para_i])[:, None, None] * rho_list)
+            for para_i in range(para_num)
+        ]
         Lambda = Lambda_avg(rho_avg, rho_pri, eps=eps)
-        Mat = np.zeros((para_num, para_num), dtype=np.complex128)
+        dim = rho_list.shape[-1]
+        Mat = np.zeros((dim, dim), dtype=np.complex128)
         for para_m in range(para_num):
             for para_n in range(para_num):
                 Mat += W[para_m][para_n]*np.dot(Lambda[para_m], Lambda[para_n])
                 
         minBC = delta2_x-np.real(np.trace(np.dot(rho_avg, Mat)))
         return minBC
-        
+
+
 def Lambda_avg(rho_avg, rho_pri, eps=1e-8):
     para_num = len(rho_pri)
     dim = len(rho_avg)
@@ -0,0 +1,153 @@
+import numpy as np
+from quanestimation.AsymptoticBound.CramerRao import CFIM_batch, QFIM_batch
+from quanestimation.BayesianBound.BayesCramerRao import (
+    _bias_bound,
+    _grid_bias,
+    _grid_integrate,
+    _grid_states,
+    _sampled_bias,
+    _sampled_states,
+    _VT_bound,
+)
+from quanestimation.BayesianBound.Quadrature import _quadrature
+from quanestimation.Common.Common import SIC
+
+
+class BayesianBoundSession:
+    """
+    Bayesian bounds on a fixed prior distribution and parameterized density matrix.
+    The CFIM (for every POVM) and the QFIM (for every LDtype) on the grid are
+    calculated on first use and kept, so that `BCRB` with all the btypes, `BQCRB`,
+    `VTB`, `QVTB`, `BCFIM` and `BQFIM` on the same input only cost the Fisher
+    information once. The methods return the same values as the functions of the
+    same names.
+
+    Attributes
+    ----------
+    > **x:** `list`
+        -- The regimes of the parameters for the integral.
+
+    > **p:** `multidimensional array`
+        -- The prior distribution.
+
+    > **dp:** `list`
+        -- Derivatives of the prior distribution with respect to the unknown parameters
+        to be estimated. For example, dp[0] is the derivative vector with respect to the first
+        parameter.
+
+    > **rho:** `multidimensional list`
+        -- Parameterized density matrix.
+
+    > **drho:** `multidimensional list`
+        -- Derivatives of the parameterized density matrix (rho) with respect to the
+        unknown parameters to be estimated.
+
+    > **eps:** `float`
+        -- Machine epsilon.
+
+    > **quad:** `Quadrature`
+        -- Quadrature weights on the grid x, see `Quadrature`. The default is
+        Simpson's rule on x.
+
+    > **integration:** `string`
+        -- Integration over the parameters, "grid" (default), "smolyak" or "qmc".
+        See `BCRB`.
+    """
+
+    def __init__(self, x, p, dp, rho, drho, eps=1e-8, quad=None, integration="grid"):
+
+        self.x = x
+        self.para_num = len(x)
+        self.eps = eps
+        self.integration = integration
+        if integration != "grid":
+            quad, p, dp, rho, drho = _sampled_states(x, quad, integration, p, dp, rho, drho)
+        else:
+            quad = _quadrature(x, quad)
+        self.quad = quad
+
+        self.p = np.asarray(p, dtype=np.float64).reshape(-1)
+        self.dp = np.asarray(dp, dtype=np.float64).reshape(len(self.p), self.para_num)
+        self.rho, self.drho = _grid_states(self.p, rho, drho, self.para_num)
+        self._cache = {}
+
+    def _memo(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def _output(self, res):
+        if self.para_num == 1:
+            return res[0][0]
+        else:
+            return res
+
+    def _bias(self, b, db):
+        if self.integration != "grid":
+            return _sampled_bias(self.quad, b, db)
+        return _grid_bias(self.x, b, db)
+
+    def CFIM(self, M=[]):
+        """
+        CFIM on every point of the grid with the shape (N, para_num, para_num).
+        The default measurement is the SIC-POVM.
+        """
+        if M == []:
+            key = ("CFIM", None)
+            M = SIC(self.rho.shape[-1])
+        else:
+            if type(M) != list:
+                raise TypeError("Please make sure M is a list!")
+            key = ("CFIM", np.array(M, dtype=np.complex128).tobytes())
+        return self._memo(key, lambda: CFIM_batch(self.rho, self.drho, M=M, eps=self.eps))
+
+    def QFIM(self, LDtype="SLD"):
+        """
+        QFIM on every point of the grid with the shape (N, para_num, para_num).
+        """
+        return self._memo(
+            ("QFIM", LDtype),
+            lambda: QFIM_batch(self.rho, self.drho, LDtype=LDtype, eps=self.eps),
+        )
+
+    def BCFIM(self, M=[]):
+        """
+        BCFI or BCFIM, see `quanestimation.BCFIM`.
+        """
+        return self._output(_grid_integrate(self.quad, self.p, self.CFIM(M)))
+
+    def BQFIM(self, LDtype="SLD"):
+        """
+        BQFI or BQFIM, see `quanestimation.BQFIM`.
+        """
+        return self._output(_grid_integrate(self.quad, self.p, self.QFIM(LDtype)))
+
+    def BCRB(self, M=[], b=[], db=[], btype=1):
+        """
+        Bayesian Cramer-Rao bound, see `quanestimation.BCRB`.
+        """
+        b, db = self._bias(b, db)
+        return self._output(
+            _bias_bound(self.quad, self.p, self.dp, self.CFIM(M), b, db, btype)
+        )
+
+    def BQCRB(self, b=[], db=[], btype=1, LDtype="SLD"):
+        """
+        Bayesian quantum Cramer-Rao bound, see `quanestimation.BQCRB`.
+        """
+        b, db = self._bias(b, db)
+        return self._output(
+            _bias_bound(self.quad, self.p, self.dp, self.QFIM(LDtype), b, db, btype)
+        )
+
+    def VTB(self, M=[]):
+        """
+        Van Trees bound, see `quanestimation.VTB`.
+        """
+        return self._output(_VT_bound(self.quad, self.p, self.dp, self.CFIM(M)))
+
+    def QVTB(self, LDtype="SLD"):
+        """
+        Quantum Van Trees bound, see `quanestimation.QVTB`.
+        """
+        return self._output(_VT_bound(self.quad, self.p, self.dp, self.QFIM(LDtype)))
@@ -0,0 +1,190 @@
+import numpy as np
+from scipy.integrate import simps
+from scipy.special import comb
+from itertools import product
+
+
+class Quadrature:
+    """
+    Quadrature weights on the grid of the unknown parameters. The one-dimensional
+    weights of every axis are calculated once and an integral over the grid is a
+    single tensor contraction with their product, so that one object can be passed
+    to and reused by `BCFIM`, `BQFIM`, `BCRB`, `BQCRB`, `VTB`, `QVTB`, `Bayes`,
+    `BayesCost` and `BCB` on the same grid.
+
+    For many parameters the tensor-product grid is replaced by the scattered nodes
+    of a Smolyak sparse grid or of a quasi-Monte Carlo sequence in the box spanned
+    by x, whose number grows polynomially with the number of parameters. These
+    quadratures are used by the bounds with `integration="smolyak"` or `"qmc"`.
+
+    Parameters
+    ----------
+    > **x:** `list`
+        -- The regimes of the parameters for the integral.
+
+    > **method:** `string`
+        -- Quadrature rule on every axis. Options are:
+        "simpson" (default) -- Simpson's rule on x, the same as `scipy.integrate.simps`.
+        "trapz" -- Trapezoidal rule on x.
+        "gauss" -- Gauss-Legendre rule with len(x[i]) nodes on [x[i][0], x[i][-1]].
+        The nodes are stored in the attribute `x` and the prior distribution and
+        the density matrices have to be given on them.
+        "smolyak" -- Smolyak sparse grid of nested Clenshaw-Curtis rules on the box
+        [x[0][0], x[0][-1]] x [x[1][0], x[1][-1]] x ...
+        "qmc" -- Scrambled Sobol sequence with equal weights on the same box.
+
+    > **level:** `int`
+        -- Only for "smolyak" and "qmc". The level of the sparse grid (default 4)
+        or the base 2 logarithm of the number of Sobol points (default 10).
+
+    > **seed:** `int`
+        -- Only for "qmc". The seed of the scrambling.
+
+    Attributes
+    ----------
+    > **x:** `list`
+        -- The nodes of the quadrature on every axis, None for "smolyak" and "qmc".
+
+    > **weights:** `list`
+        -- The weights of the quadrature on every axis, None for "smolyak" and "qmc".
+
+    > **points:** `array`
+        -- All the nodes with the shape (N, para_num).
+
+    > **W:** `multidimensional array`
+        -- The weights on the grid with the shape (len(x[0]), len(x[1]), ...), or
+        the weights of the N nodes for "smolyak" and "qmc".
+    """
+
+    def __init__(self, x, method="simpson", level=None, seed=None):
+
+        if method not in ["simpson", "trapz", "gauss", "smolyak", "qmc"]:
+            raise ValueError(
+                "{!r} is not a valid value for method, supported values are 'simpson', 'trapz', 'gauss', 'smolyak' and 'qmc'.".format(method))
+
+        self.method = method
+        self.grid = method not in ["smolyak", "qmc"]
+        if not self.grid:
+            box = np.array([[xi[0], xi[-1]] for xi in x], dtype=np.float64)
+            if method == "smolyak":
+                points, W = _smolyak(len(x), 4 if level is None else level)
+            else:
+                from scipy.stats import qmc
+
+                sobol = qmc.Sobol(d=len(x), scramble=True, seed=seed)
+                points = 2.0 * sobol.random_base2(10 if level is None else level) - 1.0
+                W = np.full(len(points), 2.0 ** len(x) / len(points))
+            # from [-1, 1]^para_num to the box
+            half = 0.5 * (box[:, 1] - box[:, 0])
+            self.points = half * points + 0.5 * (box[:, 1] + box[:, 0])
+            self.W = W * np.prod(half)
+            self.x, self.weights = None, None
+            self.shape = self.W.shape
+            return
+
+        self.x, self.weights = [], []
+        for xi in x:
+            xi = np.asarray(xi, dtype=np.float64)
+            if method == "gauss":
+                t, w = np.polynomial.legendre.leggauss(len(xi))
+                a, b = xi[0], xi[-1]
+                xi = 0.5 * (b - a) * t + 0.5 * (a + b)
+                w = 0.5 * (b - a) * w
+            else:
+                w = self._weights(xi)
+            self.x.append(xi)
+            self.weights.append(w)
+
+        self.shape = tuple(len(w) for w in self.weights)
+        W = self.weights[0]
+        for w in self.weights[1:]:
+            W = np.multiply.outer(W, w)
+        self.W = W
+        self.points = np.stack(np.meshgrid(*self.x, indexing="ij"), axis=-1).reshape(-1, len(self.x))
+
+    def _weights(self, xi, block=256):
+        # the rules are linear in the integrand, the weight of a node is the
+        # integral of the unit vector on it
+        rule = simps if self.method == "simpson" else np.trapz
+        n = len(xi)
+        w = np.zeros(n)
+        for j in range(0, n, block):
+            unit = np.zeros((n, min(block, n - j)))
+            unit[j : j + unit.shape[1]] = np.identity(unit.shape[1])
+            w[j : j + unit.shape[1]] = rule(unit, xi, axis=0)
+        return w
+
+    def integrate(self, F):
+        """
+        Integral over the grid.
+
+        Parameters
+        ----------
+        > **F:** `multidimensional array`
+            -- The integrand on the grid, with the shape (len(x[0]), len(x[1]), ...)
+            or (N, ...) with N the number of grid points. The trailing axes are kept.
+
+        Returns
+        ----------
+        **integral:** `float or array`
+            -- The integral of F with the shape of the trailing axes.
+        """
+        F = np.asarray(F)
+        num = len(self.shape)
+        if F.shape[:num] == self.shape:
+            return np.tensordot(self.W, F, axes=num)
+        elif F.ndim > 0 and F.shape[0] == self.W.size:
+            return np.tensordot(self.W.reshape(-1), F, axes=1)
+        else:
+            raise ValueError("Please make sure the integrand is given on the grid of the quadrature!")
+
+
+def _quadrature(x, quad, method="simpson"):
+    if quad is None:
+        return Quadrature(x, method=method)
+    if not quad.grid or quad.shape != tuple(len(xi) for xi in x):
+        raise ValueError("Please make sure quad is built on the grid x!")
+    return quad
+
+
+def _clenshaw_curtis(k):
+    # nested Clenshaw-Curtis rule on [-1, 1] with 1 and 2^(k-1)+1 nodes
+    if k == 1:
+        return np.zeros(1), np.array([2.0])
+    n = 2 ** (k - 1)
+    theta = np.pi * np.arange(n + 1) / n
+    w = np.ones(n + 1)
+    for j in range(1, n // 2 + 1):
+        bj = 1.0 if j == n // 2 else 2.0
+        w -= bj * np.cos(2 * j * theta) / (4 * j**2 - 1)
+    w *= 2.0 / n
+    w[0] /= 2.0
+    w[-1] /= 2.0
+    return np.cos(theta), w
+
+
+def _smolyak(para_num, level):
+    # combination technique, the sum over the tensor rules with
+    # q-para_num < |k| <= q and q = level+para_num, coinciding nodes of the
+    # nested rules are merged
+    q = level + para_num
+    nodes = {}
+    for k in product(range(1, level + 2), repeat=para_num):
+        norm = sum(k)
+        if norm <= q - para_num or norm > q:
+            continue
+        coeff = (-1) ** (q - norm) * comb(para_num - 1, q - norm)
+        rules = [_clenshaw_curtis(ki) for ki in k]
+        for idx in product(*[range(len(r[0])) for r in rules]):
+            pt = tuple(rules[i][0][j] for i, j in enumerate(idx))
+            w = coeff * np.prod([rules[i][1][j] for i, j in enumerate(idx)])
+            key = tuple(np.round(pt, 12))
+            if key in nodes:
+                nodes[key][1] += w
+            else:
+                nodes[key] = [pt, w]
+    # nodes whose weights cancel are not evaluated
+    nodes = [v for v in nodes.values() if np.abs(v[1]) > 1e-14]
+    points = np.array([v[0] for v in nodes]).reshape(-1, para_num)
+    W = np.array([v[1] for v in nodes])
+    return points, W
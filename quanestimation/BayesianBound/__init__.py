@@ -16,6 +16,12 @@ from quanestimation.BayesianBound.BayesEstimation import (
     BCB,
     BayesCost
 )
+from quanestimation.BayesianBound.Quadrature import (
+    Quadrature,
+)
+from quanestimation.BayesianBound.BayesianBoundSession import (
+    BayesianBoundSession,
+)
 
 __all__ = [
     "BCFIM",
@@ -30,4 +36,6 @@ __all__ = [
     "MLE",
     "BCB",
     "BayesCost",
+    "Quadrature",
+    "BayesianBoundSession",
 ]
@@ -1,8 +1,8 @@
 import numpy as np
 import os
 import copy
-from scipy.sparse import csc_matrix, csr_matrix
-from sympy import Matrix, GramSchmidt
+from functools import lru_cache
+from scipy.sparse import csr_matrix, hstack as sp_hstack, vstack as sp_vstack
 from itertools import product
 
 
@@ -18,20 +18,19 @@ def suN_unsorted(n):
     U, V, W = [], [], []
     for i in range(1, n):
         for j in range(0, i):
-            U_tp = csc_matrix(([1.0, 1.0], ([i, j], [j, i])), shape=(n, n)).toarray()
-            V_tp = csc_matrix(([1.0j, -1.0j], ([i, j], [j, i])), shape=(n, n)).toarray()
+            U_tp = np.zeros((n, n), dtype=np.complex128)
+            U_tp[i, j], U_tp[j, i] = 1.0, 1.0
+            V_tp = np.zeros((n, n), dtype=np.complex128)
+            V_tp[i, j], V_tp[j, i] = 1.0j, -1.0j
             U.append(U_tp)
             V.append(V_tp)
 
-    diag = []
-    for i in range(n - 1):
-        mat_tp = csc_matrix(([1, -1], ([i, i + 1], [i, i + 1])), shape=(n, n)).toarray()
-        diag_tp = np.diagonal(mat_tp)
-        diag.append(Matrix(diag_tp))
-    W_gs = GramSchmidt(diag, True)
-    for k in range(len(W_gs)):
-        W_tp = np.fromiter(W_gs[k], dtype=complex)
-        W.append(np.sqrt(2) * np.diag(W_tp))
+    # the Gram-Schmidt orthonormalization of diag(1, -1, 0, ...), diag(0, 1, -1, ...), ...
+    # gives diag(1, ..., 1, -k, 0, ...)/sqrt(k(k+1)) with k ones
+    for k in range(1, n):
+        W_tp = np.zeros(n, dtype=np.complex128)
+        W_tp[:k], W_tp[k] = 1.0, -k
+        W.append(np.sqrt(2) * np.diag(W_tp / np.sqrt(k * (k + 1))))
 
     return U, V, W
 
@@ -50,9 +49,14 @@ def suN_generator(n):
     SU($N$) generators.
     """
 
+    return [Lambda.toarray() for Lambda in _suN_sparse(n)]
+
+
+@lru_cache(maxsize=None)
+def _suN_sparse(n):
     symm, anti_symm, diag = suN_unsorted(n)
     if n == 2:
-        return [symm[0], anti_symm[0], diag[0]]
+        Lambda = [symm[0], anti_symm[0], diag[0]]
     else:
         Lambda = [0.0 for i in range(len(symm + anti_symm + diag))]
 
@@ -82,7 +86,48 @@ def suN_generator(n):
             k2 = k2 + 1
             if k2 == len(diag):
                 break
-        return Lambda
+    return tuple(csr_matrix(x) for x in Lambda)
+
+
+@lru_cache(maxsize=None)
+def suN_structure(n):
+    r"""
+    The structure constants of SU($N$) for the generators given by `suN_generator`, 
+    which are defined by
+    \begin{align}
+    \lambda_a\lambda_b=\frac{2}{N}\delta_{ab}\openone+\sum_c(d_{abc}+if_{abc})\lambda_c.
+    \end{align}
+
+    Parameters
+    ----------
+    > **n:** `int` 
+        -- The dimension of the system.
+
+    Returns
+    ----------
+    **f, d:** `sparse matrices`
+        -- The antisymmetric and symmetric structure constants as sparse matrices with
+        the shape ((n^2-1)^2, n^2-1), the entry [a*(n^2-1)+b, c] is $f_{abc}$ ($d_{abc}$).
+        They are computed once per dimension and cached.
+    """
+
+    Lambda = _suN_sparse(n)
+    num = len(Lambda)
+    # all the products lambda_a lambda_b as the blocks of one sparse matrix
+    prod = (sp_vstack(Lambda).tocsr() @ sp_hstack(Lambda).tocsr()).tocoo()
+    a, i = np.divmod(prod.row, n)
+    b, k = np.divmod(prod.col, n)
+    prod = csr_matrix(
+        (prod.data, (a * num + b, k * n + i)), shape=(num * num, n * n)
+    )
+    # Tr(lambda_a lambda_b lambda_c) = 2(d_abc + if_abc)
+    Lambda_vec = sp_vstack([x.reshape(1, n * n) for x in Lambda]).tocsr()
+    trace = (prod @ Lambda_vec.T).tocsr()
+    f = csr_matrix(trace.imag / 2)
+    d = csr_matrix(trace.real / 2)
+    f.eliminate_zeros()
+    d.eliminate_zeros()
+    return f, d
 
 
 def gramschmidt(A):
@@ -113,33 +158,49 @@ def sic_povm(fiducial):
     https://doi.org/10.3390/axioms6030021 and it is realized in QBism.
     """
 
+    return list(_sic_povm(fiducial))
+
+
+def _sic_povm(fiducial):
     d = fiducial.shape[0]
-    w = np.exp(2.0 * np.pi * 1.0j / d)
-    Z = np.diag([w**i for i in range(d)])
-    X = np.zeros((d, d), dtype=np.complex128)
-    for i in range(d):
-        for j in range(d):
-            if j != (d - 1):
-                X += np.dot(basis(d, j + 1), basis(d, j).transpose().conj())
-            else:
-                X += np.dot(basis(d, 0), basis(d, j).transpose().conj())
-    X = X / d
-
-    D = [[[] for i in range(d)] for j in range(d)]
-    for a in range(d):
-        for b in range(d):
-            X_a = np.linalg.matrix_power(X, a)
-            Z_b = np.linalg.matrix_power(Z, b)
-            D[a][b] = (-np.exp(1.0j * np.pi / d)) ** (a * b) * np.dot(X_a, Z_b)
-
-    res = []
-    for m in range(d):
-        for n in range(d):
-            res_tp = np.dot(D[m][n], fiducial)
-            res_tp = res_tp / np.linalg.norm(res_tp)
-            basis_res = np.dot(res_tp, res_tp.conj().transpose()) / d
-            res.append(basis_res)
-    return res
+    fiducial = np.asarray(fiducial).reshape(d)
+    # D_ab = X^a Z^b up to a phase, which does not enter the projectors. With the shift X and
+    # the clock Z, (D_ab psi)_k = w^(b(k-a)) psi_(k-a) with the indices taken modulo d, so all
+    # the d^2 displaced states are built at once
+    idx = (np.arange(d).reshape(1, d) - np.arange(d).reshape(d, 1)) % d
+    clock = np.exp(
+        2.0j * np.pi * ((np.arange(d).reshape(1, d, 1) * idx.reshape(d, 1, d)) % d) / d
+    )
+    vec = (clock * fiducial[idx].reshape(d, 1, d)).reshape(d * d, d)
+    vec = vec / (np.sqrt(d) * np.linalg.norm(vec, axis=1).reshape(-1, 1))
+    return np.einsum("ni,nj->nij", vec, vec.conj())
+
+
+_sic_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sic_fiducial_vectors")
+
+
+@lru_cache(maxsize=None)
+def _fiducial_store():
+    # the fiducial states of dim = 2, ..., 151 concatenated in one binary file which is
+    # memory-mapped, the state of dim starts at 2+3+...+(dim-1). If the file is missing,
+    # the store is read from the text files and only kept in memory
+    store_path = os.path.join(_sic_path, "fiducials.npy")
+    if not os.path.exists(store_path):
+        data = np.concatenate(
+            [np.loadtxt(os.path.join(_sic_path, "d%d.txt" % d)) for d in range(2, 152)]
+        )
+        return data[:, 0] + data[:, 1] * 1.0j
+    return np.load(store_path, mmap_mode="r")
+
+
+@lru_cache(maxsize=8)
+def _SIC(dim):
+    start = dim * (dim - 1) // 2 - 1
+    fiducial = np.array(_fiducial_store()[start : start + dim]).reshape(dim, 1)
+    M = _sic_povm(fiducial)
+    # the POVM is shared by all the callers
+    M.flags.writeable = False
+    return M
 
 
 def SIC(dim):
@@ -154,26 +215,20 @@ def SIC(dim):
 
     Returns
     ----------
-    A set of SCI-POVM.
+    A set of SCI-POVM. The matrices are read-only views of a cached array, so 
+    in-place changes raise a ValueError. Use `np.array(M)` for a writable copy.
 
     **Note:** 
         SIC-POVM is calculated by the Weyl-Heisenberg covariant SIC-POVM fiducial state 
         which can be downloaded from [here](http://www.physics.umb.edu/Research/QBism/
-        solutions.html).
+        solutions.html). The SIC-POVMs of the recently used dimensions are cached and
+        shared by all the callers.
     """
 
-    if dim <= 151:
-        file_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            "sic_fiducial_vectors/d%d.txt" % (dim),
-        )
-        data = np.loadtxt(file_path)
-        fiducial = data[:, 0] + data[:, 1] * 1.0j
-        fiducial = np.array(fiducial).reshape(len(fiducial), 1)
-        M = sic_povm(fiducial)
-        return M
+    if 2 <= dim <= 151:
+        return list(_SIC(dim))
     else:
-        raise ValueError("The dimension of the space should be less or equal to 151.")
+        raise ValueError("The dimension of the space should be between 2 and 151.")
 
 
 def extract_ele(element, n):
@@ -205,63 +260,244 @@ def brgd(n):
     return res
 
 
-def BayesInput(x, func, dfunc, channel="dynamics"):
+def BayesInput(
+    x,
+    func,
+    dfunc,
+    channel="dynamics",
+    vectorized=False,
+    n_jobs=1,
+    chunk_size=None,
+    path=None,
+):
     """
-    Generation of the input variables H, dH (or K, dK).
+    Generation of the input variables H, dH (or K, dK). The grid is evaluated in 
+    chunks of points which are written directly into the preallocated output arrays, 
+    optionally memory-mapped files on disk.
 
     Parameters
     ----------
     > **x:** `list`
         -- The regimes of the parameters for the integral.
 
-    > **func:** `list`
-        -- Function defined by the users which returns H or K.
+    > **func:** `callable`
+        -- Function defined by the users which returns H or K for a list of the 
+        values of the parameters.
 
-    > **dfunc:** `list`
-        -- Function defined by the users which returns dH or dK.
+    > **dfunc:** `callable`
+        -- Function defined by the users which returns dH or dK for a list of the 
+        values of the parameters.
 
     > **channel:** `string`
         -- Seeting the output of this function. Options are:  
         "dynamics" (default) --  The output of this function is H and dH.  
-        "Kraus" (default) --  The output of this function is K and dHK.
+        "Kraus" --  The output of this function is K and dK.
+
+    > **vectorized:** `bool`
+        -- Whether func and dfunc are vectorized. If it is True, they receive a list 
+        of arrays with the values of the parameters on n points of the grid, 
+        x_list[i] being the values of the i-th parameter, and return the stacked 
+        outputs with the shape (n, ...).
+
+    > **n_jobs:** `int`
+        -- Number of processes used to evaluate the chunks. If it is larger than 1, 
+        func and dfunc have to be picklable, for example functions defined at the 
+        top level of a module.
+
+    > **chunk_size:** `int`
+        -- Number of points evaluated at once. By default every process receives 
+        about four chunks of at most 1024 points.
+
+    > **path:** `string`
+        -- The directory where the outputs are stored as "H.npy", "dH.npy" (or 
+        "K.npy", "dK.npy"). The returned arrays are then memory maps of these files. 
+        The outputs are kept in memory by default.
 
     Returns
     ----------
     H, dH (or K, dK).
     """
 
+    if channel not in ["dynamics", "Kraus"]:
+        raise ValueError(
+            "{!r} is not a valid value for channel, supported values are 'dynamics' and 'Kraus'.".format(
+                channel
+            )
+        )
+
     para_num = len(x)
     size = [len(x[i]) for i in range(len(x))]
-    x_all = product(*x)
+    x = [np.asarray(xi) for xi in x]
+    num = int(np.prod(size))
+    if chunk_size is None:
+        chunk_size = min(1024, max(1, -(-num // (4 * n_jobs))))
+    chunks = (
+        (func, dfunc, vectorized, [xi[idx] for xi, idx in zip(x, np.unravel_index(np.arange(start, min(start + chunk_size, num)), size))])
+        for start in range(0, num, chunk_size)
+    )
+
+    if num == 0:
+        # nothing to evaluate, the dimensions are taken from the zero point
+        F, _ = _BayesInput_chunk((func, dfunc, vectorized, [np.zeros(1) for i in range(para_num)]))
+        F_res, dF_res = _BayesInput_alloc(F.shape[1:], size, para_num, channel, path)
+    elif n_jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            F_res, dF_res = _BayesInput_write(executor.map(_BayesInput_chunk, chunks), size, para_num, channel, path)
+    else:
+        F_res, dF_res = _BayesInput_write(map(_BayesInput_chunk, chunks), size, para_num, channel, path)
+    if path is not None:
+        F_res.flush()
+        dF_res.flush()
+    return F_res, dF_res
+
+
+def _BayesInput_chunk(chunk):
+    # runs in the worker processes
+    func, dfunc, vectorized, x_list = chunk
+    if vectorized:
+        return np.asarray(func(x_list)), np.asarray(dfunc(x_list))
+    points = [list(xi) for xi in zip(*[x_i.tolist() for x_i in x_list])]
+    return np.array([func(xi) for xi in points]), np.array([dfunc(xi) for xi in points])
+
+
+def _BayesInput_alloc(shape, size, para_num, channel, path):
+    # the outputs for H (or K) with the shape of one point
+    dim = shape[-1]
     if channel == "dynamics":
-        dim = len(func([0 for i in range(para_num)]))
-        H_list, dH_list = [], []
-        for xi in x_all:
-            H_list.append(func([i for i in xi]))
-            dH_list.append(dfunc([i for i in xi]))
-        H_res = np.reshape(H_list, [*size, *[dim, dim]])
-        dH_res = np.reshape(dH_list, [*size, *[para_num, dim, dim]])
-        return H_res, dH_res
-    elif channel == "Kraus":
-        k_num = len(func([0 for i in range(para_num)]))
-        dim = len(func([0 for i in range(para_num)])[0])
-        K_list, dK_list = [], []
+        names = ["H", "dH"]
+        shapes = [[*size, dim, dim], [*size, para_num, dim, dim]]
+    else:
+        k_num = shape[-3]
+        names = ["K", "dK"]
         if para_num == 1:
-            for xi in x_all:
-                K_list.append(func([i for i in xi]))
-                dK_list.append(dfunc([i for i in xi]))
-            K_res = np.reshape(K_list, [*size, *[k_num, dim, dim]])
-            dK_res = np.reshape(dK_list, [*size, *[para_num, k_num, dim, dim]])
+            shapes = [[*size, k_num, dim, dim], [*size, para_num, k_num, dim, dim]]
         else:
-            for xi in x_all:
-                K_list.append(func([i for i in xi]))
-                dK_list.append(dfunc([i for i in xi]))
-            K_res = np.reshape(K_list, [*size, *[k_num, dim, dim]])
-            dK_res = np.reshape(dK_list, [*size, *[k_num, para_num, dim, dim]])
-        return K_res, dK_res
-    else:
-        raise ValueError(
-            "{!r} is not a valid value for channel, supported values are 'dynamics' and 'Kraus'.".format(
-                channel
-            )
+            shapes = [[*size, k_num, dim, dim], [*size, k_num, para_num, dim, dim]]
+    if path is None:
+        return [np.empty(shape, dtype=np.complex128) for shape in shapes]
+    os.makedirs(path, exist_ok=True)
+    return [
+        np.lib.format.open_memmap(
+            os.path.join(path, name + ".npy"), mode="w+", dtype=np.complex128, shape=tuple(shape)
         )
+        for name, shape in zip(names, shapes)
+    ]
+
+
+def _BayesInput_write(results, size, para_num, channel, path):
+    # the outputs are allocated with the first chunk, which fixes the dimensions
+    F_res, dF_res = None, None
+    start = 0
+    for F, dF in results:
+        if F_res is None:
+            F_res, dF_res = _BayesInput_alloc(F.shape[1:], size, para_num, channel, path)
+            # flat views on the grid points, the outputs are contiguous
+            F_flat = F_res.reshape(int(np.prod(size)), -1)
+            dF_flat = dF_res.reshape(int(np.prod(size)), -1)
+        stop = start + len(F)
+        F_flat[start:stop] = F.reshape(stop - start, -1)
+        dF_flat[start:stop] = dF.reshape(stop - start, -1)
+        start = stop
+    return F_res, dF_res
+
+
+def parameterized_state(func, x, h=1e-4, order=1, n_jobs=1):
+    r"""
+    Generation of the density matrix and its derivatives on the unknown parameters 
+    with central finite differences. The first derivatives are calculated by
+    \begin{align}
+    \partial_a\rho\approx\frac{\rho(x+h_a e_a)-\rho(x-h_a e_a)}{2h_a}
+    \end{align}
+
+    and the second derivatives with the three-point (diagonal) and four-point 
+    (off-diagonal) central stencils. Every point of the stencils is evaluated only 
+    once, also when it is used by both the first and second derivatives.
+
+    Parameters
+    ----------
+    > **func:** `callable`
+        -- Function defined by the users which returns the density matrix for a 
+        list of the values of the parameters.
+
+    > **x:** `list`
+        -- The values of the parameters where the derivatives are calculated.
+
+    > **h:** `float or list`
+        -- Step size of the finite differences, the same for all the parameters or 
+        one for each parameter.
+
+    > **order:** `int`
+        -- The highest order of the derivatives, 1 (default) or 2.
+
+    > **n_jobs:** `int`
+        -- Number of processes used to evaluate the points of the stencils. If it 
+        is larger than 1, func has to be picklable, for example a function defined 
+        at the top level of a module.
+
+    Returns
+    ----------
+    **rho, drho:** `matrix, list` 
+        -- The density matrix and its derivatives on the parameters.
+
+    **d2rho:** `list`
+        -- The second derivatives with d2rho[a][b] the derivative on the a-th and 
+        b-th parameters, only returned for order=2.
+    """
+
+    if order not in [1, 2]:
+        raise ValueError("{!r} is not a valid value for order, supported values are 1 and 2.".format(order))
+
+    x = np.array(x, dtype=np.float64).reshape(-1)
+    para_num = len(x)
+    h = np.broadcast_to(np.array(h, dtype=np.float64), (para_num,))
+
+    # the stencils as integer offsets in units of h, collected without duplicates
+    def shift(*pairs):
+        offset = [0] * para_num
+        for a, s in pairs:
+            offset[a] += s
+        return tuple(offset)
+
+    offsets = {shift(): None}
+    for a in range(para_num):
+        offsets[shift((a, 1))] = offsets[shift((a, -1))] = None
+        if order == 2:
+            for b in range(a + 1, para_num):
+                for sa, sb in product([1, -1], repeat=2):
+                    offsets[shift((a, sa), (b, sb))] = None
+    offsets = list(offsets)
+    points = [list(x + np.array(offset) * h) for offset in offsets]
+
+    if n_jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            values = list(executor.map(func, points))
+    else:
+        values = [func(point) for point in points]
+    rho_all = dict(zip(offsets, [np.array(v, dtype=np.complex128) for v in values]))
+
+    rho = rho_all[shift()]
+    drho = [
+        (rho_all[shift((a, 1))] - rho_all[shift((a, -1))]) / (2 * h[a])
+        for a in range(para_num)
+    ]
+    if order == 1:
+        return rho, drho
+
+    d2rho = [[None] * para_num for a in range(para_num)]
+    for a in range(para_num):
+        d2rho[a][a] = (
+            rho_all[shift((a, 1))] - 2 * rho + rho_all[shift((a, -1))]
+        ) / h[a] ** 2
+        for b in range(a + 1, para_num):
+            d2rho[a][b] = (
+                rho_all[shift((a, 1), (b, 1))]
+                - rho_all[shift((a, 1), (b, -1))]
+                - rho_all[shift((a, -1), (b, 1))]
+                + rho_all[shift((a, -1), (b, -1))]
+            ) / (4 * h[a] * h[b])
+            d2rho[b][a] = d2rho[a][b]
+    return rho, drho, d2rho
@@ -0,0 +1,210 @@
+import numpy as np
+import os
+import tempfile
+
+
+class ParamGrid:
+    """
+    Prior distribution and parameterized density matrices on a grid of the unknown
+    parameters, stored as .npy files in a directory on local disk and opened as
+    memory maps. The density matrices are flattened over the grid, so that `rho` has
+    the shape (N, dim, dim) and `drho` the shape (N, para_num, dim, dim) with N the
+    number of grid points, and only the pages which are read are loaded. The arrays
+    can be passed directly to `BCFIM`, `BQFIM`, `BCRB`, `BQCRB`, `VTB`, `QVTB`,
+    `BayesianBoundSession`, `Bayes` and `MLE`, which read them chunk by chunk.
+
+    Parameters
+    ----------
+    > **path:** `string`
+        -- The directory of the grid, created by `ParamGrid.create` or
+        `ParamGrid.from_arrays`.
+
+    > **mode:** `string`
+        -- Mode of the memory maps. Options are:
+        "r" (default) -- Read-only.
+        "r+" -- Read and write.
+
+    Attributes
+    ----------
+    > **x:** `list`
+        -- The regimes of the parameters for the integral.
+
+    > **p:** `multidimensional array`
+        -- The prior distribution with the shape (len(x[0]), len(x[1]), ...).
+
+    > **dp:** `multidimensional array`
+        -- Derivatives of the prior distribution with the shape (len(x[0]), len(x[1]),
+        ..., para_num), None if the grid was created without them.
+
+    > **rho:** `array`
+        -- Density matrices with the shape (N, dim, dim).
+
+    > **drho:** `array`
+        -- Derivatives of the density matrices with the shape (N, para_num, dim, dim).
+    """
+
+    _files = ["p", "dp", "rho", "drho"]
+
+    def __init__(self, path, mode="r"):
+
+        if mode not in ["r", "r+"]:
+            raise ValueError("{!r} is not a valid value for mode, supported values are 'r' and 'r+'.".format(mode))
+
+        self.path = path
+        with np.load(os.path.join(path, "x.npz")) as axes:
+            self.x = [axes["x%d" % i] for i in range(len(axes.files))]
+        for name in self._files:
+            file = os.path.join(path, name + ".npy")
+            setattr(self, name, np.load(file, mmap_mode=mode) if os.path.exists(file) else None)
+
+        self.para_num = len(self.x)
+        self.shape = tuple(len(xi) for xi in self.x)
+        self.dim = self.rho.shape[-1]
+
+    def __len__(self):
+        return len(self.rho)
+
+    @classmethod
+    def create(cls, x, dim, path=None, dp=True):
+        """
+        Allocation of an empty grid on disk, the arrays are filled with zeros and
+        opened in the mode "r+".
+
+        Parameters
+        ----------
+        > **x:** `list`
+            -- The regimes of the parameters for the integral.
+
+        > **dim:** `int`
+            -- The dimension of the density matrices.
+
+        > **path:** `string`
+            -- The directory for the files. A temporary directory is used by default.
+
+        > **dp:** `bool`
+            -- Whether or not to store the derivatives of the prior distribution.
+
+        Returns
+        ----------
+        **grid:** `ParamGrid`
+        """
+        if path is None:
+            path = tempfile.mkdtemp(prefix="ParamGrid_")
+        os.makedirs(path, exist_ok=True)
+
+        para_num = len(x)
+        shape = tuple(len(xi) for xi in x)
+        num = int(np.prod(shape))
+        np.savez(os.path.join(path, "x.npz"), **{"x%d" % i: np.asarray(xi) for i, xi in enumerate(x)})
+        shapes = {
+            "p": (shape, np.float64),
+            "dp": (shape + (para_num,), np.float64),
+            "rho": ((num, dim, dim), np.complex128),
+            "drho": ((num, para_num, dim, dim), np.complex128),
+        }
+        for name in cls._files:
+            if name == "dp" and not dp:
+                continue
+            shape, dtype = shapes[name]
+            np.lib.format.open_memmap(
+                os.path.join(path, name + ".npy"), mode="w+", dtype=dtype, shape=shape
+            ).flush()
+        return cls(path, mode="r+")
+
+    @classmethod
+    def from_arrays(cls, x, p, rho, drho, dp=None, path=None, chunk_size=None):
+        """
+        Storage of a prior distribution and parameterized density matrices given on
+        the grid x, in the same format as for `BCRB`. The density matrices are 
+        converted and copied chunk by chunk, so that the input is never held as one 
+        complex array in memory.
+
+        Parameters
+        ----------
+        > **x:** `list`
+            -- The regimes of the parameters for the integral.
+
+        > **p:** `multidimensional array`
+            -- The prior distribution on the grid.
+
+        > **rho:** `multidimensional list`
+            -- Parameterized density matrices on the grid, either nested with one 
+            level per parameter or flattened to N = len(x[0])*len(x[1])*... points.
+
+        > **drho:** `multidimensional list`
+            -- Derivatives of the parameterized density matrices on the unknown 
+            parameters, in the same layout as rho.
+
+        > **dp:** `multidimensional array`
+            -- Derivatives of the prior distribution on the grid. They are not 
+            stored if it is None.
+
+        > **path:** `string`
+            -- The directory for the files. A temporary directory is used by default.
+
+        > **chunk_size:** `int`
+            -- Number of points copied at once, see `chunks`.
+
+        Returns
+        ----------
+        **grid:** `ParamGrid`
+        """
+        shape = tuple(len(xi) for xi in x)
+        dim = np.shape(_grid_take(rho, shape, slice(0, 1), 2))[-1]
+        grid = cls.create(x, dim, path=path, dp=dp is not None)
+        grid.p[:] = np.asarray(p).reshape(grid.p.shape)
+        if dp is not None:
+            grid.dp[:] = np.asarray(dp).reshape(grid.dp.shape)
+        for sl, _, _, rho_tp, drho_tp in grid.chunks(chunk_size):
+            rho_tp[:] = np.reshape(_grid_take(rho, shape, sl, 2), rho_tp.shape)
+            drho_tp[:] = np.reshape(_grid_take(drho, shape, sl, 3), drho_tp.shape)
+        grid.flush()
+        return grid
+
+    def chunks(self, chunk_size=None):
+        """
+        Iteration over the grid in chunks of consecutive points in the flattened
+        order. Every step yields the slice of the points and the views p, dp, rho and
+        drho on them with the shapes (n,), (n, para_num), (n, dim, dim) and
+        (n, para_num, dim, dim).
+
+        Parameters
+        ----------
+        > **chunk_size:** `int`
+            -- Number of points in a chunk. The default value bounds the size of a
+            chunk of drho to about 64 MB.
+        """
+        if chunk_size is None:
+            chunk_size = max(1, 2**26 // (16 * self.drho[0].size))
+        for start in range(0, len(self), chunk_size):
+            sl = slice(start, min(start + chunk_size, len(self)))
+            dp = None if self.dp is None else self.dp.reshape(-1, self.para_num)[sl]
+            yield sl, self.p.reshape(-1)[sl], dp, self.rho[sl], self.drho[sl]
+
+    def flush(self):
+        """
+        Write the changes of the arrays to disk.
+        """
+        for name in self._files:
+            arr = getattr(self, name)
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+
+def _grid_take(data, shape, sl, ndim):
+    # the points sl of the flattened grid from an array, or from a list which is
+    # either flat or nested with one level per parameter and whose entries have
+    # ndim dimensions. Only these points are converted.
+    num = int(np.prod(shape))
+    if isinstance(data, np.ndarray):
+        return data.reshape((num, -1) + data.shape[-2:])[sl]
+    if np.ndim(data[0]) == ndim:
+        return np.array(data[sl])
+    index = np.unravel_index(np.arange(num)[sl], shape)
+    points = []
+    for idx in zip(*index):
+        entry = data
+        for i in idx:
+            entry = entry[i]
+        points.append(entry)
+    return np.array(points)
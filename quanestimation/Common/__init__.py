@@ -1,19 +1,27 @@
 from quanestimation.Common.Common import (
     mat_vec_convert,
     suN_generator,
+    suN_structure,
     gramschmidt,
     basis,
     SIC,
     annihilation,
     BayesInput,
+    parameterized_state,
+)
+from quanestimation.Common.ParamGrid import (
+    ParamGrid,
 )
 
 __all__ = [
     "mat_vec_convert",
     "suN_generator",
+    "suN_structure",
     "gramschmidt",
     "basis",
     "SIC",
     "annihilation",
     "BayesInput",
+    "parameterized_state",
+    "ParamGrid",
 ]
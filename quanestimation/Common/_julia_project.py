@@ -1,20 +1,76 @@
-
 import logging
-
-from julia_project import JuliaProject
+import importlib
+import platform
 
 # The top-level directory of the mymodule installation must be
 # passed when constructing JuliaProject. We compute this path here.
 import os
 QuanEstimation_JL_path = os.path.dirname(os.path.abspath(__file__))
 
-project = JuliaProject(
-    name="quanestimation",
-    package_path=QuanEstimation_JL_path,
-    version_spec = "1.7",
-    env_prefix = 'QuanEstimation_',
-    logging_level = logging.INFO, # or logging.WARN,
-    console_logging=False,
-    # post_init_hook=_post_init_hook, # Run this after ensure_init
-   calljulia = "pyjulia"
-)
+_project = None
+_initialized = False
+
+
+def get_project():
+    global _project
+    if _project is None:
+        from julia_project import JuliaProject
+
+        _project = JuliaProject(
+            name="quanestimation",
+            package_path=QuanEstimation_JL_path,
+            version_spec = "1.7",
+            env_prefix = 'QuanEstimation_',
+            logging_level = logging.INFO, # or logging.WARN,
+            console_logging=False,
+            # post_init_hook=_post_init_hook, # Run this after ensure_init
+           calljulia = "pyjulia"
+        )
+    return _project
+
+
+def ensure_init():
+    """
+    Start the Julia runtime and load the QuanEstimation.jl environment. This is
+    done only once per process, the first time a Julia-backed object is used.
+    """
+    global _initialized
+    if _initialized:
+        return
+
+    import julia
+
+    if platform.system() != "Windows":
+        get_project().ensure_init()
+
+    if julia.find_libpython.linked_libpython() is None:
+        julia.Julia(compiled_modules=False)
+
+    _initialized = True
+
+
+class JuliaModule:
+    """
+    Deferred handle of a Julia module. The Julia runtime is started and the
+    module is imported through pyjulia on the first attribute access, so that
+    importing the Python modules which use it costs nothing.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if self._module is None:
+            ensure_init()
+            self._module = importlib.import_module("julia.%s" % self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return "<deferred Julia module %s>" % self._name
+
+
+QuanEstimation = JuliaModule("QuanEstimation")
+Main = JuliaModule("Main")
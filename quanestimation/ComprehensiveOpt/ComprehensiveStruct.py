@@ -3,7 +3,7 @@ from scipy.interpolate import interp1d
 import warnings
 import math
 import os
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.ComprehensiveOpt as compopt
 from quanestimation.Common.Common import gramschmidt, SIC
 
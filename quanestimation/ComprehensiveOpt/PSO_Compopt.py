@@ -1,4 +1,4 @@
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.ComprehensiveOpt.ComprehensiveStruct as Comp
 
 
@@ -4,7 +4,7 @@ import warnings
 import math
 import os
 import quanestimation.ControlOpt as ctrl
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 from quanestimation.Common.Common import SIC
 
 
@@ -1,5 +1,5 @@
 import warnings
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.ControlOpt.ControlStruct as Control
 
 
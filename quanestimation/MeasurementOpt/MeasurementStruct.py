@@ -3,9 +3,9 @@ from scipy.interpolate import interp1d
 import os
 import math
 import warnings
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.MeasurementOpt as Measure
-from quanestimation.Common.Common import gramschmidt, sic_povm
+from quanestimation.Common.Common import gramschmidt, SIC
 
 
 class MeasurementSystem:
@@ -162,14 +162,9 @@ class MeasurementSystem:
             if self.minput[0] == "LC":
                 ## optimize the combination of a set of SIC-POVM
                 if self.minput[1] == []:
-                    file_path = os.path.join(
-                        os.path.dirname(os.path.dirname(__file__)),
-                        "sic_fiducial_vectors/d%d.txt" % (len(self.rho0)),
-                    )
-                    data = np.loadtxt(file_path)
-                    fiducial = data[:, 0] + data[:, 1] * 1.0j
-                    fiducial = np.array(fiducial).reshape(len(fiducial), 1)
-                    self.povm_basis = sic_povm(fiducial)
+                    self.povm_basis = [
+                        np.array(x, dtype=np.complex128) for x in SIC(len(self.rho0))
+                    ]
                     self.M_num = self.minput[2]
                 else:
                     ## optimize the combination of a set of given POVMs
@@ -445,14 +440,9 @@ class MeasurementSystem:
             if self.minput[0] == "LC":
                 ## optimize the combination of a set of SIC-POVM
                 if self.minput[1] == []:
-                    file_path = os.path.join(
-                        os.path.dirname(os.path.dirname(__file__)),
-                        "sic_fiducial_vectors/d%d.txt" % (len(self.rho0)),
-                    )
-                    data = np.loadtxt(file_path)
-                    fiducial = data[:, 0] + data[:, 1] * 1.0j
-                    fiducial = np.array(fiducial).reshape(len(fiducial), 1)
-                    self.povm_basis = sic_povm(fiducial)
+                    self.povm_basis = [
+                        np.array(x, dtype=np.complex128) for x in SIC(len(self.rho0))
+                    ]
                     self.M_num = self.minput[2]
                 else:
                     ## optimize the combination of a set of given POVMs
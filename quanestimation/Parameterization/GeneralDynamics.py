@@ -1,7 +1,7 @@
 import numpy as np
 import warnings
 import math
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 
 
 class Lindblad:
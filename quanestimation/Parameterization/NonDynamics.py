@@ -12,13 +12,13 @@ def Kraus(rho0, K, dK):
 
     Parameters
     ----------
-    > **K:** `list`
-        -- Kraus operators.
+    > **K:** `list or array`
+        -- Kraus operators, also accepted as an array with the shape (k_num, dim, dim).
 
-    > **dK:** `list`
+    > **dK:** `list or array`
         -- Derivatives of the Kraus operators with respect to the unknown parameters to be 
-        estimated. For example, dK[0] is the derivative vector on the first 
-        parameter.
+        estimated, also accepted as an array with the shape (k_num, para_num, dim, dim). 
+        For example, dK[0] is the derivative vector of the first Kraus operator.
 
     > **rho0:** `matrix`
         -- Initial state (density matrix).
@@ -28,13 +28,158 @@ def Kraus(rho0, K, dK):
     Density matrix and its derivatives on the unknown parameters.
     """
 
-    k_num = len(K)
-    para_num = len(dK[0])
-    dK_reshape = [[dK[i][j] for i in range(k_num)] for j in range(para_num)]
+    rho0 = np.asarray(rho0)
+    K, dK = _Kraus_check(K, dK, rho0.shape[-1])
+    rho, drho = _Kraus(rho0, K, dK)
 
-    rho = sum([np.dot(Ki, np.dot(rho0, Ki.conj().T)) for Ki in K])
-    drho = [sum([(np.dot(dKi, np.dot(rho0, Ki.conj().T))+ np.dot(Ki, np.dot(rho0, dKi.conj().T))) for (Ki, dKi) in zip(K, dKj)]) for dKj in dK_reshape]
+    return rho, list(drho)
 
+
+def Kraus_batch(rho0, K, dK):
+    r"""
+    The parameterization of a stack of states with the same Kraus operators,
+    \begin{align}
+    \rho^{(n)}=\sum_i K_i\rho^{(n)}_0K_i^{\dagger},
+    \end{align} 
+
+    such as many probe states screened in state optimization. All the states
+    are evolved with the same matrix products.
+
+    Parameters
+    ----------
+    > **rho0:** `array`
+        -- Initial states (density matrices) with the shape (N, dim, dim).
+
+    > **K:** `array`
+        -- Kraus operators with the shape (k_num, dim, dim).
+
+    > **dK:** `array`
+        -- Derivatives of the Kraus operators with the shape (k_num, para_num, dim, dim).
+        For example, dK[i][0] is the derivative of K[i] on the first parameter.
+
+    Returns
+    ----------
+    Density matrices with the shape (N, dim, dim) and their derivatives on the 
+    unknown parameters with the shape (N, para_num, dim, dim).
+    """
+
+    rho0 = np.asarray(rho0)
+    if rho0.ndim != 3 or rho0.shape[1] != rho0.shape[2]:
+        raise ValueError("Please make sure rho0 has the shape (N, dim, dim)!")
+    K, dK = _Kraus_check(K, dK, rho0.shape[-1])
+
+    return _Kraus(rho0, K, dK)
+
+
+def _Kraus_check(K, dK, dim):
+    K = np.asarray(K, dtype=np.complex128)
+    dK = np.asarray(dK, dtype=np.complex128)
+    if K.ndim != 3 or K.shape[1:] != (dim, dim) or dK.ndim != 4 or dK.shape[0] != K.shape[0] or dK.shape[2:] != (dim, dim):
+        raise ValueError(
+            "Please make sure K has the shape (k_num, dim, dim) and dK has the shape (k_num, para_num, dim, dim)!"
+        )
+    return K, dK
+
+
+def _Kraus(rho0, K, dK):
+    # rho0[..., dim, dim] -> rho[..., dim, dim], drho[..., para_num, dim, dim]. With 
+    # A_i = rho0 K_i^\dagger stacked along the rows, both sum_i K_i A_i and 
+    # sum_i dK_i A_i are single matrix products over the (i, row) index.
+    k_num, para_num, dim = dK.shape[:3]
+    A = (rho0[..., None, :, :] @ K.conj().swapaxes(-1, -2)).reshape(
+        *rho0.shape[:-2], k_num * dim, dim
+    )
+    rho = K.transpose(1, 0, 2).reshape(dim, k_num * dim) @ A
+    drho = dK.transpose(1, 2, 0, 3).reshape(para_num, dim, k_num * dim) @ A[..., None, :, :]
+    drho = drho + drho.conj().swapaxes(-1, -2)
+    return rho, drho
+
+
+def Kraus_superop(K, dK):
+    r"""
+    The superoperator of a Kraus channel and its derivatives,
+    \begin{align}
+    \mathcal{S}=\sum_i K_i\otimes K_i^{*},
+    \end{align} 
+
+    which acts on the row-major vectorization of the density matrix, i.e., 
+    $\mathrm{vec}(\sum_i K_i\rho K_i^{\dagger})=\mathcal{S}\mathrm{vec}(\rho)$.
+
+    Parameters
+    ----------
+    > **K:** `list or array`
+        -- Kraus operators with the shape (k_num, dim, dim).
+
+    > **dK:** `list or array`
+        -- Derivatives of the Kraus operators with the shape (k_num, para_num, dim, dim).
+
+    Returns
+    ----------
+    The superoperator with the shape (dim^2, dim^2) and its derivatives on the 
+    unknown parameters with the shape (para_num, dim^2, dim^2).
+    """
+
+    K, dK = _Kraus_check(K, dK, np.shape(K)[-1])
+    k_num, para_num, dim = dK.shape[:3]
+    S = np.einsum("kij,klm->iljm", K, K.conj()).reshape(dim**2, dim**2)
+    dS = np.einsum("kaij,klm->ailjm", dK, K.conj()) + np.einsum(
+        "kij,kalm->ailjm", K, dK.conj()
+    )
+    return S, dS.reshape(para_num, dim**2, dim**2)
+
+
+def Kraus_repeated(rho0, K, dK, n):
+    r"""
+    The state after n sequential uses of the same Kraus channel,
+    $\rho_n=\mathcal{S}^n\rho_0$ with $\mathcal{S}$ the superoperator of the 
+    channel (see `Kraus_superop`), and its derivatives on the unknown parameters. 
+    The powers $\mathcal{S}^{2^j}$ and their derivatives are obtained by repeated 
+    squaring and every $\rho_n$ is assembled from the binary digits of n, so the 
+    cost is $O(\log n)$ matrix products for any number of values of n. The QFI 
+    versus n is then given by `QFIM_batch` on the outputs.
+
+    Parameters
+    ----------
+    > **rho0:** `matrix`
+        -- Initial state (density matrix).
+
+    > **K:** `list or array`
+        -- Kraus operators with the shape (k_num, dim, dim).
+
+    > **dK:** `list or array`
+        -- Derivatives of the Kraus operators with the shape (k_num, para_num, dim, dim).
+
+    > **n:** `int or array`
+        -- Number(s) of uses of the channel.
+
+    Returns
+    ----------
+    Density matrix and its derivatives on the unknown parameters for a single n. 
+    For an array of n, arrays of the density matrices with the shape (len(n), dim, dim) 
+    and the derivatives with the shape (len(n), para_num, dim, dim).
+    """
+
+    n_arr = np.atleast_1d(np.asarray(n))
+    if n_arr.ndim != 1 or not np.issubdtype(n_arr.dtype, np.integer) or np.any(n_arr < 0):
+        raise ValueError("Please make sure n is a non-negative integer or an array of them!")
+
+    S, dS = Kraus_superop(K, dK)
+    dim = len(rho0)
+    para_num = len(dS)
+
+    vec = np.tile(np.asarray(rho0, dtype=np.complex128).reshape(1, dim**2), (len(n_arr), 1))
+    dvec = np.zeros((len(n_arr), para_num, dim**2), dtype=np.complex128)
+    A, dA = S, dS
+    for j in range(int(n_arr.max()).bit_length()):
+        if j > 0:
+            # (A, dA) -> (A^2, dA A + A dA)
+            A, dA = A @ A, dA @ A + A @ dA
+        use = (n_arr >> j) & 1 == 1
+        dvec[use] = dvec[use] @ A.T + np.einsum("nj,aij->nai", vec[use], dA)
+        vec[use] = vec[use] @ A.T
+
+    rho = vec.reshape(-1, dim, dim)
+    drho = dvec.reshape(-1, para_num, dim, dim)
+    if np.ndim(n) == 0:
+        return rho[0], list(drho[0])
     return rho, drho
-    
-    
\ No newline at end of file
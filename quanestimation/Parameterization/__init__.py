@@ -3,10 +3,16 @@ from quanestimation.Parameterization.GeneralDynamics import (
 )
 from quanestimation.Parameterization.NonDynamics import (
     Kraus,
+    Kraus_batch,
+    Kraus_superop,
+    Kraus_repeated,
 )
 
 __all__ = [
     "Lindblad",
     "secondorder_derivative",
     "Kraus", 
+    "Kraus_batch",
+    "Kraus_superop",
+    "Kraus_repeated",
 ]
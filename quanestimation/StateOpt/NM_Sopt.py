@@ -1,5 +1,5 @@
-from julia import Main
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import Main
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.StateOpt.StateStruct as State
 
 
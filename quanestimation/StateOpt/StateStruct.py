@@ -3,7 +3,7 @@ from scipy.interpolate import interp1d
 import os
 import math
 import warnings
-from julia import QuanEstimation
+from quanestimation.Common._julia_project import QuanEstimation
 import quanestimation.StateOpt as stateoptimize
 from quanestimation.Common.Common import SIC
 
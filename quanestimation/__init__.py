@@ -1,30 +1,35 @@
 """Top-level package for quanestimation."""
 __version__ = "0.2.0"
 
-import julia
-import platform
-from .Common._julia_project import project
-
-if platform.system() != 'Windows':
-    project.ensure_init()
-
-if julia.find_libpython.linked_libpython() is None:
-    jl = julia.Julia(compiled_modules=False)
+import importlib
+import sys
+import types
 
 from quanestimation.AsymptoticBound.CramerRao import (
     CFIM,
+    CFIM_batch,
+    CFIM_multiPOVM,
     QFIM,
+    QFIM_batch,
     QFIM_Bloch,
+    QFIM_Bloch_batch,
     QFIM_Gauss,
+    QFIM_Gauss_batch,
     QFIM_Kraus,
+    QFIM_Kraus_batch,
     FIM,
     FI_Expt,
+    FI_Expt_samples,
     LLD,
     RLD,
     SLD,
 )
 from quanestimation.AsymptoticBound.AnalogCramerRao import (
-    HCRB, NHB, 
+    HCRB, NHB,
+    HCRB_batch, NHB_batch,
+)
+from quanestimation.AsymptoticBound.StateAnalysis import (
+    StateAnalysis,
 )
 from quanestimation.BayesianBound.BayesCramerRao import (
     BCFIM,
@@ -44,69 +49,33 @@ from quanestimation.BayesianBound.BayesEstimation import (
     BCB,
     BayesCost
 )
+from quanestimation.BayesianBound.Quadrature import (
+    Quadrature,
+)
+from quanestimation.BayesianBound.BayesianBoundSession import (
+    BayesianBoundSession,
+)
 
 from quanestimation.Common.Common import (
     mat_vec_convert,
     suN_generator,
+    suN_structure,
     gramschmidt,
     basis,
     SIC,
     annihilation,
     BayesInput,
+    parameterized_state,
 )
-
-from quanestimation.ComprehensiveOpt.ComprehensiveStruct import (
-    ComprehensiveSystem,
-    ComprehensiveOpt,
-)
-from quanestimation.ComprehensiveOpt.AD_Compopt import (
-    AD_Compopt,
-)
-from quanestimation.ComprehensiveOpt.DE_Compopt import (
-    DE_Compopt,
-)
-from quanestimation.ComprehensiveOpt.PSO_Compopt import (
-    PSO_Compopt,
+from quanestimation.Common.ParamGrid import (
+    ParamGrid,
 )
 
-from quanestimation.ControlOpt.ControlStruct import (
-    ControlSystem,
-    ControlOpt,
-    csv2npy_controls,
-)
-from quanestimation.ControlOpt.GRAPE_Copt import (
-    GRAPE_Copt,
-)
-from quanestimation.ControlOpt.DE_Copt import (
-    DE_Copt,
-)
-from quanestimation.ControlOpt.PSO_Copt import (
-    PSO_Copt,
-)
-from quanestimation.ControlOpt.DDPG_Copt import (
-    DDPG_Copt,
-)
-
-from quanestimation.Parameterization.GeneralDynamics import (
-    Lindblad,
-)
 from quanestimation.Parameterization.NonDynamics import (
     Kraus,
-)
-
-from quanestimation.MeasurementOpt.MeasurementStruct import (
-    MeasurementSystem,
-    MeasurementOpt,
-    csv2npy_measurements,
-)
-from quanestimation.MeasurementOpt.AD_Mopt import (
-    AD_Mopt,
-)
-from quanestimation.MeasurementOpt.PSO_Mopt import (
-    PSO_Mopt,
-)
-from quanestimation.MeasurementOpt.DE_Mopt import (
-    DE_Mopt,
+    Kraus_batch,
+    Kraus_superop,
+    Kraus_repeated,
 )
 
 from quanestimation.Resource.Resource import (
@@ -114,33 +83,72 @@ from quanestimation.Resource.Resource import (
     TargetTime,
 )
 
-from quanestimation.StateOpt.StateStruct import (
-    StateSystem,
-    StateOpt,
-    csv2npy_states,
-)
-from quanestimation.StateOpt.AD_Sopt import (
-    AD_Sopt,
-)
-from quanestimation.StateOpt.DE_Sopt import (
-    DE_Sopt,
-)
-from quanestimation.StateOpt.PSO_Sopt import (
-    PSO_Sopt,
-)
-from quanestimation.StateOpt.DDPG_Sopt import (
-    DDPG_Sopt,
-)
-from quanestimation.StateOpt.NM_Sopt import (
-    NM_Sopt,
-)
-from quanestimation.StateOpt.RI_Sopt import (
-    RI_Sopt,
-)
-
 from quanestimation.AdaptiveScheme.Adapt import Adapt
-from quanestimation.AdaptiveScheme.Adapt_MZI import Adapt_MZI
 
+# The optimization tools and the Lindblad dynamics are backed by the Julia package
+# QuanEstimation.jl. They are imported on first access (PEP 562) and the Julia
+# runtime itself is only started when one of them calls into Julia, so the NumPy
+# based bounds and estimation tools can be used without paying for it.
+_lazy_imports = {
+    "ComprehensiveSystem": "quanestimation.ComprehensiveOpt.ComprehensiveStruct",
+    "ComprehensiveOpt": "quanestimation.ComprehensiveOpt.ComprehensiveStruct",
+    "AD_Compopt": "quanestimation.ComprehensiveOpt.AD_Compopt",
+    "DE_Compopt": "quanestimation.ComprehensiveOpt.DE_Compopt",
+    "PSO_Compopt": "quanestimation.ComprehensiveOpt.PSO_Compopt",
+    "ControlSystem": "quanestimation.ControlOpt.ControlStruct",
+    "ControlOpt": "quanestimation.ControlOpt.ControlStruct",
+    "csv2npy_controls": "quanestimation.ControlOpt.ControlStruct",
+    "GRAPE_Copt": "quanestimation.ControlOpt.GRAPE_Copt",
+    "DE_Copt": "quanestimation.ControlOpt.DE_Copt",
+    "PSO_Copt": "quanestimation.ControlOpt.PSO_Copt",
+    "DDPG_Copt": "quanestimation.ControlOpt.DDPG_Copt",
+    "Lindblad": "quanestimation.Parameterization.GeneralDynamics",
+    "MeasurementSystem": "quanestimation.MeasurementOpt.MeasurementStruct",
+    "MeasurementOpt": "quanestimation.MeasurementOpt.MeasurementStruct",
+    "csv2npy_measurements": "quanestimation.MeasurementOpt.MeasurementStruct",
+    "AD_Mopt": "quanestimation.MeasurementOpt.AD_Mopt",
+    "PSO_Mopt": "quanestimation.MeasurementOpt.PSO_Mopt",
+    "DE_Mopt": "quanestimation.MeasurementOpt.DE_Mopt",
+    "StateSystem": "quanestimation.StateOpt.StateStruct",
+    "StateOpt": "quanestimation.StateOpt.StateStruct",
+    "csv2npy_states": "quanestimation.StateOpt.StateStruct",
+    "AD_Sopt": "quanestimation.StateOpt.AD_Sopt",
+    "DE_Sopt": "quanestimation.StateOpt.DE_Sopt",
+    "PSO_Sopt": "quanestimation.StateOpt.PSO_Sopt",
+    "DDPG_Sopt": "quanestimation.StateOpt.DDPG_Sopt",
+    "NM_Sopt": "quanestimation.StateOpt.NM_Sopt",
+    "RI_Sopt": "quanestimation.StateOpt.RI_Sopt",
+    "Adapt_MZI": "quanestimation.AdaptiveScheme.Adapt_MZI",
+}
+
+
+class _PackageModule(types.ModuleType):
+    # the functions are resolved on first access by the module class, since a
+    # module-level __getattr__ is only supported from Python 3.7 on
+    def __getattr__(self, name):
+        if name not in _lazy_imports:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        package = _lazy_imports[name].rsplit(".", 1)[0]
+        if package == __name__ + "." + name and package in sys.modules:
+            # the subpackage sharing its name with this function is still being
+            # imported, let the import system fall back to sys.modules
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        value = getattr(importlib.import_module(_lazy_imports[name]), name)
+        globals()[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        # importing a subpackage binds it to this namespace, which would shadow the
+        # functions ControlOpt, StateOpt, MeasurementOpt and ComprehensiveOpt
+        if name in _lazy_imports and isinstance(value, types.ModuleType):
+            value = getattr(importlib.import_module(_lazy_imports[name]), name)
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(globals()) | set(_lazy_imports))
+
+
+sys.modules[__name__].__class__ = _PackageModule
 
 
 __all__ = [
@@ -149,17 +157,27 @@ __all__ = [
     "MeasurementOpt",
     "ComprehensiveOpt",
     "CFIM",
+    "CFIM_batch",
+    "CFIM_multiPOVM",
     "QFIM",
+    "QFIM_batch",
     "QFIM_Bloch",
+    "QFIM_Bloch_batch",
     "LLD",
     "RLD",
     "SLD",
     "HCRB",
+    "HCRB_batch",
     "NHB",
+    "NHB_batch",
+    "StateAnalysis",
     "QFIM_Gauss",
+    "QFIM_Gauss_batch",
     "QFIM_Kraus",
+    "QFIM_Kraus_batch",
     "FIM",
     "FI_Expt",
+    "FI_Expt_samples",
     "BCFIM",
     "BQFIM",
     "BCRB",
@@ -172,8 +190,13 @@ __all__ = [
     "MLE",
     "BCB",
     "BayesCost",
+    "Quadrature",
+    "BayesianBoundSession",
     "Lindblad",
     "Kraus",
+    "Kraus_batch",
+    "Kraus_superop",
+    "Kraus_repeated",
     "SpinSqueezing",
     "TargetTime",
     "GRAPE_Copt",
@@ -191,11 +214,14 @@ __all__ = [
     "RI_Sopt",
     "mat_vec_convert",
     "suN_generator",
+    "suN_structure",
     "gramschmidt",
     "basis",
     "SIC",
     "annihilation",
     "BayesInput",
+    "parameterized_state",
+    "ParamGrid",
     "csv2npy_controls",
     "csv2npy_states",
     "csv2npy_measurements",
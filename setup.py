@@ -16,7 +16,6 @@ requirements = [
     "wheel>=0.33.6",
     "coverage>=4.5.4",
     "numpy",
-    "sympy",
     "scipy",
     "cvxpy",
     "julia",
@@ -0,0 +1,208 @@
+"""Tests of the batched and sampled Fisher information against reference results."""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from quanestimation import (
+    CFIM,
+    CFIM_batch,
+    CFIM_multiPOVM,
+    FI_Expt_samples,
+    QFIM,
+    QFIM_batch,
+    QFIM_Kraus,
+    QFIM_Kraus_batch,
+)
+
+
+def random_state(dim, para_num, rng, rank=None):
+    # random density matrix of the given rank and random Hermitian traceless
+    # derivatives inside its support
+    rank = dim if rank is None else rank
+    A = rng.normal(size=(dim, rank)) + 1j * rng.normal(size=(dim, rank))
+    rho = A @ A.conj().T
+    rho = rho / np.trace(rho).real
+    drho = []
+    for _ in range(para_num):
+        H = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+        H = H + H.conj().T
+        drho.append(-1j * (H @ rho - rho @ H))
+    return rho, drho
+
+
+def random_stack(num, dim, para_num, rng):
+    states = [random_state(dim, para_num, rng) for _ in range(num)]
+    return np.array([s[0] for s in states]), np.array([s[1] for s in states])
+
+
+def random_POVM(dim, rng):
+    # projective measurement in a random basis
+    A = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+    U = np.linalg.qr(A)[0]
+    return np.einsum("ik,jk->kij", U, U.conj())
+
+
+def looped(func, rho, drho, **kwargs):
+    # per-state results with the shape (N, para_num, para_num)
+    para_num = drho.shape[1]
+    return np.array(
+        [np.reshape(func(rho[n], list(drho[n]), **kwargs), (para_num, para_num)) for n in range(len(rho))]
+    )
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_QFIM_batch(self):
+        for LDtype in ["SLD", "RLD", "LLD"]:
+            for para_num in [1, 3]:
+                rho, drho = random_stack(7, 3, para_num, self.rng)
+                with self.subTest(LDtype=LDtype, para_num=para_num):
+                    expected = looped(QFIM, rho, drho, LDtype=LDtype)
+                    np.testing.assert_allclose(QFIM_batch(rho, drho, LDtype=LDtype), expected, rtol=1e-8)
+                    np.testing.assert_allclose(
+                        QFIM_batch(rho, drho, LDtype=LDtype, chunk_size=2), expected, rtol=1e-8
+                    )
+
+    def test_QFIM_batch_pure(self):
+        states = [random_state(3, 2, self.rng, rank=1) for _ in range(4)]
+        rho = np.array([s[0] for s in states])
+        drho = np.array([s[1] for s in states])
+        np.testing.assert_allclose(QFIM_batch(rho, drho), looped(QFIM, rho, drho), rtol=1e-8, atol=1e-10)
+
+    def test_QFIM_Kraus_batch(self):
+        # random channel from the first columns of a unitary on system and
+        # environment, with derivatives that are not tied to it
+        K = np.linalg.qr(self.rng.normal(size=(9, 9)) + 1j * self.rng.normal(size=(9, 9)))[0]
+        K = K[:, :3].reshape(3, 3, 3)
+        dK = self.rng.normal(size=(3, 2, 3, 3)) + 1j * self.rng.normal(size=(3, 2, 3, 3))
+        rho0 = random_stack(5, 3, 1, self.rng)[0]
+        expected = [QFIM_Kraus(r, list(K), [list(d) for d in dK]) for r in rho0]
+        np.testing.assert_allclose(QFIM_Kraus_batch(rho0, K, dK), expected, rtol=1e-8)
+        np.testing.assert_allclose(QFIM_Kraus_batch(rho0, K, dK, chunk_size=2), expected, rtol=1e-8)
+
+    def test_CFIM_batch(self):
+        for para_num in [1, 2]:
+            rho, drho = random_stack(7, 3, para_num, self.rng)
+            with self.subTest(para_num=para_num):
+                expected = looped(CFIM, rho, drho)
+                np.testing.assert_allclose(CFIM_batch(rho, drho), expected, rtol=1e-8)
+                np.testing.assert_allclose(CFIM_batch(rho, drho, chunk_size=3), expected, rtol=1e-8)
+
+
+class TestMultiPOVM(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_CFIM_multiPOVM(self):
+        M = np.array([random_POVM(3, self.rng) for _ in range(5)])
+        for para_num in [1, 2]:
+            rho, drho = random_state(3, para_num, self.rng)
+            with self.subTest(para_num=para_num):
+                expected = [CFIM(rho, drho, list(m)) for m in M]
+                np.testing.assert_allclose(CFIM_multiPOVM(rho, drho, M), expected, rtol=1e-8)
+
+    def test_padded(self):
+        # a two-outcome POVM padded with a zero matrix to three outcomes
+        rho, drho = random_state(3, 2, self.rng)
+        P = random_POVM(3, self.rng)
+        two = [P[0], P[1] + P[2]]
+        M = np.array([P, two + [np.zeros((3, 3))]])
+        res = CFIM_multiPOVM(rho, drho, M)
+        np.testing.assert_allclose(res[0], CFIM(rho, drho, list(P)), rtol=1e-8)
+        np.testing.assert_allclose(res[1], CFIM(rho, drho, two), rtol=1e-8)
+
+
+class TestFastPaths(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_pure(self):
+        # the state vector and its derivatives against the density matrix
+        for para_num in [1, 3]:
+            psi = self.rng.normal(size=5) + 1j * self.rng.normal(size=5)
+            psi = psi / np.linalg.norm(psi)
+            dpsi = []
+            for _ in range(para_num):
+                v = self.rng.normal(size=5) + 1j * self.rng.normal(size=5)
+                dpsi.append(v - psi * np.vdot(psi, v).real)
+            rho = np.outer(psi, psi.conj())
+            drho = [np.outer(v, psi.conj()) + np.outer(psi, v.conj()) for v in dpsi]
+            with self.subTest(para_num=para_num):
+                np.testing.assert_allclose(QFIM(psi, dpsi), QFIM(rho, drho), rtol=1e-8)
+
+    def test_low_rank(self):
+        for rank in [1, 2, 4]:
+            for para_num in [1, 2]:
+                rho, drho = random_state(8, para_num, self.rng, rank=rank)
+                with self.subTest(rank=rank, para_num=para_num):
+                    expected = QFIM(rho, drho)
+                    np.testing.assert_allclose(QFIM(rho, drho, rank=rank), expected, rtol=1e-7)
+                    # an upper bound of the rank is enough
+                    np.testing.assert_allclose(QFIM(rho, drho, rank=rank + 2), expected, rtol=1e-7)
+
+
+class TestExptSamples(unittest.TestCase):
+    # the CFI of a Gaussian with the standard deviation sigma on its mean is
+    # 1/sigma^2, and the CFI of a Poisson distribution on its mean is 1/lambda
+    num = 200000
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+
+    def check(self, y1, y2, dx, exact, **kwargs):
+        F, F_low, F_up = FI_Expt_samples(y1, y2, dx, bootstrap=400, seed=1, **kwargs)
+        self.assertLess(F_low, F)
+        self.assertLess(F, F_up)
+        self.assertLess(F_low, exact)
+        self.assertLess(exact, F_up)
+        # the statistical error is about 10% for these sample sizes
+        self.assertAlmostEqual(F / exact, 1.0, delta=0.3)
+
+    def test_norm(self):
+        for estimator in ["hist", "kde"]:
+            y1 = self.rng.normal(0.0, 2.0, self.num)
+            y2 = self.rng.normal(0.1, 2.0, self.num)
+            with self.subTest(estimator=estimator):
+                self.check(y1, y2, 0.1, 0.25, estimator=estimator)
+
+    def test_poisson(self):
+        y1 = self.rng.poisson(5.0, self.num)
+        y2 = self.rng.poisson(5.05, self.num)
+        self.check(y1, y2, 0.05, 0.2, estimator="discrete")
+
+    def test_bias(self):
+        # the mean over repetitions, whose plug-in value is about twice the CFI
+        F = [
+            FI_Expt_samples(self.rng.normal(0.0, 1.0, self.num), self.rng.normal(0.05, 1.0, self.num), 0.05)
+            for _ in range(10)
+        ]
+        self.assertAlmostEqual(np.mean(F), 1.0, delta=0.1)
+
+    def test_dx_array(self):
+        # the integer bins do not depend on the other data sets
+        y1 = self.rng.poisson(5.0, 10000)
+        y2 = [self.rng.poisson(5.0 + dx, 10000) for dx in [0.5, 1.0]]
+        F = FI_Expt_samples(y1, y2, [0.5, 1.0], estimator="discrete")
+        for i, dx in enumerate([0.5, 1.0]):
+            self.assertAlmostEqual(F[i], FI_Expt_samples(y1, y2[i], dx, estimator="discrete"), delta=1e-10)
+
+    def test_path(self):
+        y1 = self.rng.normal(0.0, 1.0, 10000)
+        y2 = self.rng.normal(0.1, 1.0, 10000)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "y1.npy")
+            np.save(path, y1)
+            for estimator in ["hist", "kde"]:
+                with self.subTest(estimator=estimator):
+                    self.assertAlmostEqual(
+                        FI_Expt_samples(path, y2, 0.1, estimator=estimator, chunk_size=999),
+                        FI_Expt_samples(y1, y2, 0.1, estimator=estimator),
+                        delta=1e-10,
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
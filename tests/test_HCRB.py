@@ -0,0 +1,177 @@
+"""Tests of the HCRB and NHB."""
+
+import importlib.util
+import unittest
+import numpy as np
+from quanestimation import HCRB, HCRB_batch, NHB, NHB_batch, QFIM
+
+# the SDPs are solved with CLARABEL, an interior-point solver shipped with cvxpy
+has_solver = all(importlib.util.find_spec(name) is not None for name in ["cvxpy", "clarabel"])
+
+
+def random_weight(para_num, rng):
+    A = rng.normal(size=(para_num, para_num))
+    return A @ A.T + 0.1 * np.identity(para_num)
+
+
+def random_mixed_qubit(para_num, rng):
+    # Bloch vector inside the ball and traceless Hermitian derivatives
+    sigma = np.array([[[0, 1], [1, 0]], [[0, -1j], [1j, 0]], [[1, 0], [0, -1]]])
+    r = rng.normal(size=3)
+    r = rng.uniform(0.2, 0.9) * r / np.linalg.norm(r)
+    rho = (np.identity(2) + np.einsum("i,ijk->jk", r, sigma)) / 2
+    drho = [np.einsum("i,ijk->jk", rng.normal(size=3), sigma) / 2 for _ in range(para_num)]
+    return rho, drho
+
+
+def random_pure_qubit(para_num, rng):
+    # drho = |dpsi><psi| + |psi><dpsi| for random tangent vectors dpsi
+    psi = rng.normal(size=2) + 1j * rng.normal(size=2)
+    psi = psi / np.linalg.norm(psi)
+    rho = np.outer(psi, psi.conj())
+    drho = []
+    for _ in range(para_num):
+        dpsi = rng.normal(size=2) + 1j * rng.normal(size=2)
+        dpsi = dpsi - psi * np.vdot(psi, dpsi).real
+        drho.append(np.outer(dpsi, psi.conj()) + np.outer(psi, dpsi.conj()))
+    return rho, drho
+
+
+def random_qudit(dim, rank, para_num, rng):
+    # random state of the given rank, with derivatives from random unitary
+    # rotations which keep the kernel-kernel block of drho zero
+    A = rng.normal(size=(dim, rank)) + 1j * rng.normal(size=(dim, rank))
+    rho = A @ A.conj().T
+    rho = rho / np.trace(rho).real
+    drho = []
+    for _ in range(para_num):
+        H = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+        H = H + H.conj().T
+        drho.append(-1j * (H @ rho - rho @ H))
+    return rho, drho
+
+
+@unittest.skipUnless(has_solver, "cvxpy with CLARABEL is not installed")
+class TestHCRBSDP(unittest.TestCase):
+    rtol = 1e-5
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_commuting(self):
+        # for commuting SLDs the HCRB equals Tr(WF^{-1})
+        rho = np.diag([0.5, 0.3, 0.2]).astype(np.complex128)
+        drho = [np.diag([1.0, -1.0, 0.0]), np.diag([0.0, 1.0, -1.0])]
+        W = random_weight(2, self.rng)
+        expected = np.trace(W @ np.linalg.inv(QFIM(rho, drho)))
+        self.assertAlmostEqual(HCRB(rho, drho, W, solver="CLARABEL") / expected, 1.0, delta=self.rtol)
+
+    def test_ordering(self):
+        # Tr(WF^{-1}) <= HCRB <= min(NHB, 2Tr(WF^{-1}))
+        for _ in range(5):
+            rho, drho = random_qudit(3, 3, 2, self.rng)
+            W = random_weight(2, self.rng)
+            with self.subTest(rho=rho, W=W):
+                C_S = np.trace(W @ np.linalg.inv(QFIM(rho, drho)))
+                C_H = HCRB(rho, drho, W, solver="CLARABEL")
+                C_N = NHB(rho, drho, W, solver="CLARABEL")
+                self.assertGreater(C_H, C_S * (1 - self.rtol))
+                self.assertLess(C_H, 2 * C_S * (1 + self.rtol))
+                self.assertLess(C_H, C_N * (1 + self.rtol))
+
+    def test_support(self):
+        # the SDP reduced to the support of rho has the same value
+        for rank in [1, 2, 3]:
+            rho, drho = random_qudit(3, rank, 2, self.rng)
+            W = random_weight(2, self.rng)
+            with self.subTest(rank=rank):
+                full = HCRB(rho, drho, W, solver="CLARABEL", method="SDP")
+                reduced = HCRB(rho, drho, W, solver="CLARABEL", method="support")
+                self.assertAlmostEqual(reduced / full, 1.0, delta=self.rtol)
+
+
+@unittest.skipUnless(has_solver, "cvxpy with CLARABEL is not installed")
+class TestHCRBAnalytic(unittest.TestCase):
+    # the SDP agrees with the closed forms to about 1e-7
+    rtol = 1e-5
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+
+    def compare(self, rho, drho, W, method):
+        analytic = HCRB(rho, drho, W, method="analytic")
+        sdp = HCRB(rho, drho, W, method=method, solver="CLARABEL")
+        self.assertAlmostEqual(analytic / sdp, 1.0, delta=self.rtol)
+
+    def test_two_parameters_mixed(self):
+        for _ in range(10):
+            rho, drho = random_mixed_qubit(2, self.rng)
+            W = random_weight(2, self.rng)
+            with self.subTest(rho=rho, W=W):
+                self.compare(rho, drho, W, "SDP")
+                self.compare(rho, drho, W, "support")
+
+    def test_three_parameters_mixed(self):
+        for _ in range(10):
+            rho, drho = random_mixed_qubit(3, self.rng)
+            W = random_weight(3, self.rng)
+            with self.subTest(rho=rho, W=W):
+                self.compare(rho, drho, W, "SDP")
+
+    def test_two_parameters_pure(self):
+        # rank-deficient states, where the SDP is reduced to the support of rho
+        for _ in range(10):
+            rho, drho = random_pure_qubit(2, self.rng)
+            W = random_weight(2, self.rng)
+            with self.subTest(rho=rho, W=W):
+                self.compare(rho, drho, W, "support")
+
+    def test_auto_selects_analytic(self):
+        rho, drho = random_mixed_qubit(2, self.rng)
+        W = random_weight(2, self.rng)
+        self.assertEqual(HCRB(rho, drho, W), HCRB(rho, drho, W, method="analytic"))
+
+    def test_no_closed_form(self):
+        rho = np.diag([0.5, 0.3, 0.2]).astype(np.complex128)
+        drho = [np.diag([1.0, -1.0, 0.0]), np.diag([0.0, 1.0, -1.0])]
+        with self.assertRaises(ValueError):
+            HCRB(rho, drho, np.identity(2), method="analytic")
+
+
+@unittest.skipUnless(has_solver, "cvxpy with CLARABEL is not installed")
+class TestBatch(unittest.TestCase):
+    rtol = 1e-5
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        states = [random_qudit(3, 3, 2, rng) for _ in range(5)]
+        self.rho = np.array([s[0] for s in states])
+        self.drho = np.array([s[1] for s in states])
+        self.W = random_weight(2, rng)
+
+    def test_against_single(self):
+        for name, batch, single in [("HCRB", HCRB_batch, HCRB), ("NHB", NHB_batch, NHB)]:
+            with self.subTest(bound=name):
+                value, status, elapsed = batch(self.rho, self.drho, self.W, solver="CLARABEL", chunk_size=2)
+                expected = [single(r, list(d), self.W, solver="CLARABEL") for r, d in zip(self.rho, self.drho)]
+                np.testing.assert_allclose(value, expected, rtol=self.rtol)
+                self.assertTrue(all(s in ["optimal", "optimal_inaccurate"] for s in status))
+                self.assertEqual(elapsed.shape, (5,))
+
+    def test_failed_point(self):
+        # a nan in one state is rejected by cvxpy, the other states are solved
+        drho = self.drho.copy()
+        drho[1, 0, 0, 1] = np.nan
+        for batch in [HCRB_batch, NHB_batch]:
+            for fallback_solver, prefix in [("SCS", "fallback failed: "), (None, "failed: ")]:
+                with self.subTest(bound=batch.__name__, fallback_solver=fallback_solver):
+                    value, status, _ = batch(
+                        self.rho, drho, self.W, solver="CLARABEL", fallback_solver=fallback_solver
+                    )
+                    self.assertTrue(np.isnan(value[1]))
+                    self.assertTrue(status[1].startswith(prefix))
+                    self.assertFalse(np.any(np.isnan(np.delete(value, 1))))
+
+
+if __name__ == "__main__":
+    unittest.main()
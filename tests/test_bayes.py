@@ -0,0 +1,216 @@
+"""Tests of the Bayesian bounds and their quadratures."""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.integrate import simps
+from quanestimation import (
+    BCFIM,
+    BCRB,
+    BQCRB,
+    BQFIM,
+    CFIM,
+    QFIM,
+    QVTB,
+    VTB,
+    BayesianBoundSession,
+    ParamGrid,
+    Quadrature,
+)
+
+sx = np.array([[0.0, 1.0], [1.0, 0.0]])
+sy = np.array([[0.0, -1.0j], [1.0j, 0.0]])
+sz = np.array([[1.0, 0.0], [0.0, -1.0]])
+
+
+def bloch(x):
+    # qubit state with the Bloch vector 0.8(sin a cos b, sin a sin b, cos a)
+    a, b = x
+    return 0.5 * np.identity(2) + 0.4 * (
+        np.sin(a) * np.cos(b) * sx + np.sin(a) * np.sin(b) * sy + np.cos(a) * sz
+    )
+
+
+def dbloch(x):
+    a, b = x
+    return [
+        0.4 * (np.cos(a) * np.cos(b) * sx + np.cos(a) * np.sin(b) * sy - np.sin(a) * sz),
+        0.4 * (-np.sin(a) * np.sin(b) * sx + np.sin(a) * np.cos(b) * sy),
+    ]
+
+
+def prior(x):
+    a, b = x
+    return np.exp(-((a - 0.9) ** 2) / 0.1 - (b - 0.5) ** 2 / 0.2)
+
+
+def dprior(x):
+    a, b = x
+    return [-2 * (a - 0.9) / 0.1 * prior(x), -2 * (b - 0.5) / 0.2 * prior(x)]
+
+
+def grid_model(x):
+    # prior, its derivatives and the states on the grid x
+    points = [[a, b] for a in x[0] for b in x[1]]
+    shape = (len(x[0]), len(x[1]))
+    p = np.array([prior(xv) for xv in points]).reshape(shape)
+    dp = np.array([dprior(xv) for xv in points]).reshape(shape + (2,))
+    rho = np.array([bloch(xv) for xv in points]).reshape(shape + (2, 2))
+    drho = np.array([dbloch(xv) for xv in points]).reshape(shape + (2, 2, 2))
+    return p, dp, rho, drho
+
+
+def simps2(F, x):
+    # nested Simpson's rule over the two axes of the grid
+    return simps(simps(F, x[1], axis=1), x[0], axis=0)
+
+
+class TestQuadrature(unittest.TestCase):
+    x = [np.linspace(0.5, 1.3, 11), np.linspace(0.0, 1.0, 8)]
+
+    def test_simpson_trapz(self):
+        F = np.random.default_rng(0).normal(size=(11, 8, 3))
+        np.testing.assert_allclose(Quadrature(self.x).integrate(F), simps2(F, self.x))
+        trapz = np.trapz(np.trapz(F, self.x[1], axis=1), self.x[0], axis=0)
+        np.testing.assert_allclose(Quadrature(self.x, method="trapz").integrate(F), trapz)
+        # the flattened grid
+        np.testing.assert_allclose(Quadrature(self.x).integrate(F.reshape(88, 3)), simps2(F, self.x))
+
+    def test_gauss(self):
+        # n Gauss-Legendre nodes integrate polynomials of degree 2n-1 exactly
+        quad = Quadrature([[0.0, 0.0, 0.0, 2.0], [-1.0, 0.0, 1.0]], method="gauss")
+        a, b = np.meshgrid(*quad.x, indexing="ij")
+        F = a**7 * b**4 + a**2
+        exact = 2.0**8 / 8 * 2.0 / 5 + 2.0**3 / 3 * 2.0
+        self.assertAlmostEqual(quad.integrate(F), exact, delta=1e-12)
+
+    def test_bounds(self):
+        # the bounds with a Quadrature against the per-state Fisher information
+        # integrated with Simpson's rule
+        p, dp, rho, drho = grid_model(self.x)
+        quad = Quadrature(self.x)
+        B = np.array([[CFIM(r, list(d)) for r, d in zip(rr, dd)] for rr, dd in zip(rho, drho)])
+        Q = np.array([[QFIM(r, list(d)) for r, d in zip(rr, dd)] for rr, dd in zip(rho, drho)])
+        for name, bound, F in [("BCRB", BCRB, B), ("BQCRB", BQCRB, Q)]:
+            with self.subTest(bound=name):
+                expected = simps2(p[..., None, None] * np.linalg.inv(F), self.x)
+                for kwargs in [{}, {"quad": quad}]:
+                    res = bound(self.x, p, dp, rho, drho, **kwargs)
+                    np.testing.assert_allclose(res, expected, rtol=1e-10, atol=1e-12)
+
+
+class TestSampledIntegration(unittest.TestCase):
+    x = [np.linspace(0.5, 1.3, 5), np.linspace(0.0, 1.0, 5)]
+
+    def exact(self, F):
+        # reference on a fine grid
+        x = [np.linspace(0.5, 1.3, 201), np.linspace(0.0, 1.0, 201)]
+        a, b = np.meshgrid(*x, indexing="ij")
+        return simps2(F(a, b), x)
+
+    def test_smolyak(self):
+        quad = Quadrature(self.x, method="smolyak", level=4)
+        a, b = quad.points.T
+        # exact for low-order polynomials and accurate for smooth functions
+        poly = lambda a, b: a**2 * b**3 + b
+        smooth = lambda a, b: np.exp(a * b)
+        self.assertAlmostEqual(quad.integrate(poly(a, b)), self.exact(poly), delta=1e-12)
+        self.assertAlmostEqual(quad.integrate(smooth(a, b)), self.exact(smooth), delta=1e-6)
+
+    def test_qmc(self):
+        quad = Quadrature(self.x, method="qmc", level=12, seed=0)
+        a, b = quad.points.T
+        smooth = lambda a, b: np.exp(a * b)
+        self.assertAlmostEqual(quad.integrate(smooth(a, b)), self.exact(smooth), delta=1e-4)
+
+    def test_bounds(self):
+        x_fine = [np.linspace(0.5, 1.3, 41), np.linspace(0.0, 1.0, 41)]
+        p, dp, rho, drho = grid_model(x_fine)
+        for name, bound in [("BCRB", BCRB), ("BQCRB", BQCRB)]:
+            expected = bound(x_fine, p, dp, rho, drho)
+            for integration, rtol in [("smolyak", 1e-5), ("qmc", 1e-3)]:
+                with self.subTest(bound=name, integration=integration):
+                    level = 6 if integration == "smolyak" else 12
+                    quad = Quadrature(self.x, method=integration, level=level, seed=0)
+                    res = bound(self.x, prior, dprior, bloch, dbloch, quad=quad, integration=integration)
+                    np.testing.assert_allclose(res, expected, rtol=rtol, atol=rtol * np.max(np.abs(expected)))
+
+
+class TestSession(unittest.TestCase):
+    def models(self):
+        # two parameters, and a single parameter with b fixed to 0.4
+        x = [np.linspace(0.5, 1.3, 9), np.linspace(0.0, 1.0, 7)]
+        p, dp, rho, drho = grid_model(x)
+        bias = [0.1 * np.sin(x[0]), 0.05 * x[1]], [0.1 * np.cos(x[0]), 0.05 * np.ones(7)]
+        yield "two", x, p, dp, rho, drho, bias
+        x1 = [x[0]]
+        p1 = np.array([prior([a, 0.4]) for a in x1[0]])
+        dp1 = np.array([dprior([a, 0.4])[0] for a in x1[0]])
+        rho1 = [bloch([a, 0.4]) for a in x1[0]]
+        drho1 = [dbloch([a, 0.4])[0] for a in x1[0]]
+        yield "single", x1, p1, dp1, rho1, drho1, (bias[0][:1], bias[1][:1])
+
+    def test_against_functions(self):
+        for name, x, p, dp, rho, drho, (b, db) in self.models():
+            session = BayesianBoundSession(x, p, dp, rho, drho)
+            for btype in [1, 2, 3]:
+                with self.subTest(model=name, btype=btype):
+                    np.testing.assert_allclose(
+                        session.BCRB(b=b, db=db, btype=btype),
+                        BCRB(x, p, dp, rho, drho, b=b, db=db, btype=btype),
+                        rtol=1e-12,
+                    )
+                    np.testing.assert_allclose(
+                        session.BQCRB(b=b, db=db, btype=btype),
+                        BQCRB(x, p, dp, rho, drho, b=b, db=db, btype=btype),
+                        rtol=1e-12,
+                    )
+            with self.subTest(model=name):
+                np.testing.assert_allclose(session.VTB(), VTB(x, p, dp, rho, drho), rtol=1e-12)
+                np.testing.assert_allclose(session.QVTB(), QVTB(x, p, dp, rho, drho), rtol=1e-12)
+                np.testing.assert_allclose(session.BCFIM(), BCFIM(x, p, rho, drho), rtol=1e-12)
+                np.testing.assert_allclose(session.BQFIM(), BQFIM(x, p, rho, drho), rtol=1e-12)
+                # the Fisher information is calculated once
+                self.assertIs(session.CFIM(), session.CFIM())
+                self.assertIs(session.QFIM(), session.QFIM())
+
+
+class TestParamGrid(unittest.TestCase):
+    x = [np.linspace(0.5, 1.3, 9), np.linspace(0.0, 1.0, 7)]
+
+    def test_round_trip(self):
+        p, dp, rho, drho = grid_model(self.x)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "grid")
+            # nested lists are converted chunk by chunk
+            ParamGrid.from_arrays(self.x, p, rho.tolist(), drho.tolist(), dp=dp, path=path, chunk_size=10)
+            grid = ParamGrid(path)
+            self.assertIsInstance(grid.rho, np.memmap)
+            np.testing.assert_array_equal(grid.p, p)
+            np.testing.assert_array_equal(grid.dp, dp)
+
+            # the chunks cover the flattened grid in order
+            chunks = list(grid.chunks(chunk_size=10))
+            self.assertEqual(len(chunks), 7)
+            np.testing.assert_array_equal(np.concatenate([c[3] for c in chunks]), rho.reshape(-1, 2, 2))
+            np.testing.assert_array_equal(np.concatenate([c[4] for c in chunks]), drho.reshape(-1, 2, 2, 2))
+            np.testing.assert_array_equal(np.concatenate([c[2] for c in chunks]), dp.reshape(-1, 2))
+
+            for btype in [1, 2, 3]:
+                with self.subTest(btype=btype):
+                    np.testing.assert_allclose(
+                        BCRB(grid.x, grid.p, grid.dp, grid.rho, grid.drho, btype=btype),
+                        BCRB(self.x, p, dp, rho, drho, btype=btype),
+                        rtol=1e-12,
+                    )
+                    np.testing.assert_allclose(
+                        BQCRB(grid.x, grid.p, grid.dp, grid.rho, grid.drho, btype=btype),
+                        BQCRB(self.x, p, dp, rho, drho, btype=btype),
+                        rtol=1e-12,
+                    )
+            del grid, chunks
+
+
+if __name__ == "__main__":
+    unittest.main()
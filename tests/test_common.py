@@ -0,0 +1,132 @@
+"""Tests of the common functions."""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from quanestimation import BayesInput, parameterized_state
+
+sx = np.array([[0.0, 1.0], [1.0, 0.0]])
+sy = np.array([[0.0, -1.0j], [1.0j, 0.0]])
+sz = np.array([[1.0, 0.0], [0.0, -1.0]])
+
+
+def H_func(x):
+    return 0.5 * (sx * np.cos(x[0]) + sz * np.sin(x[0] * x[1]))
+
+
+def dH_func(x):
+    return [
+        -0.5 * sx * np.sin(x[0]) + 0.5 * x[1] * sz * np.cos(x[0] * x[1]),
+        0.5 * x[0] * sz * np.cos(x[0] * x[1]),
+    ]
+
+
+def H_vectorized(x_list):
+    a, b = x_list
+    return 0.5 * (np.cos(a)[:, None, None] * sx + np.sin(a * b)[:, None, None] * sz)
+
+
+def dH_vectorized(x_list):
+    a, b = x_list
+    return np.stack(
+        [
+            -0.5 * np.sin(a)[:, None, None] * sx + 0.5 * (b * np.cos(a * b))[:, None, None] * sz,
+            0.5 * (a * np.cos(a * b))[:, None, None] * sz,
+        ],
+        axis=1,
+    )
+
+
+class TestBayesInput(unittest.TestCase):
+    def setUp(self):
+        self.x = [np.linspace(0.1, 1.0, 7), np.linspace(0.0, 2.0, 5)]
+
+    def reference(self, x):
+        H = np.array([[H_func([x0, x1]) for x1 in x[1]] for x0 in x[0]])
+        dH = np.array([[dH_func([x0, x1]) for x1 in x[1]] for x0 in x[0]])
+        return H, dH
+
+    def test_chunks_and_vectorized(self):
+        H_ref, dH_ref = self.reference(self.x)
+        for kwargs in [{}, {"chunk_size": 3}]:
+            H, dH = BayesInput(self.x, H_func, dH_func, **kwargs)
+            np.testing.assert_allclose(H, H_ref)
+            np.testing.assert_allclose(dH, dH_ref)
+        H, dH = BayesInput(self.x, H_vectorized, dH_vectorized, vectorized=True, chunk_size=4)
+        np.testing.assert_allclose(H, H_ref)
+        np.testing.assert_allclose(dH, dH_ref)
+
+    def test_path(self):
+        H_ref, dH_ref = self.reference(self.x)
+        with tempfile.TemporaryDirectory() as path:
+            H, dH = BayesInput(self.x, H_func, dH_func, chunk_size=4, path=path)
+            self.assertIsInstance(H, np.memmap)
+            np.testing.assert_allclose(np.load(os.path.join(path, "H.npy")), H_ref)
+            np.testing.assert_allclose(np.load(os.path.join(path, "dH.npy")), dH_ref)
+            del H, dH
+
+    def test_empty_grid(self):
+        x = [np.array([]), self.x[1]]
+        with tempfile.TemporaryDirectory() as path:
+            for path_i in [None, path]:
+                with self.subTest(path=path_i):
+                    H, dH = BayesInput(x, H_func, dH_func, path=path_i)
+                    self.assertEqual(H.shape, (0, 5, 2, 2))
+                    self.assertEqual(dH.shape, (0, 5, 2, 2, 2))
+            del H, dH
+
+
+def bloch(x):
+    # qubit state with the Bloch vector 0.8(sin a cos b, sin a sin b, cos a)
+    a, b = x
+    return 0.5 * np.identity(2) + 0.4 * (
+        np.sin(a) * np.cos(b) * sx + np.sin(a) * np.sin(b) * sy + np.cos(a) * sz
+    )
+
+
+def bloch_derivatives(x):
+    a, b = x
+    drho = [
+        0.4 * (np.cos(a) * np.cos(b) * sx + np.cos(a) * np.sin(b) * sy - np.sin(a) * sz),
+        0.4 * (-np.sin(a) * np.sin(b) * sx + np.sin(a) * np.cos(b) * sy),
+    ]
+    d2rho = [
+        [
+            -0.4 * (np.sin(a) * np.cos(b) * sx + np.sin(a) * np.sin(b) * sy + np.cos(a) * sz),
+            0.4 * (-np.cos(a) * np.sin(b) * sx + np.cos(a) * np.cos(b) * sy),
+        ],
+        [
+            0.4 * (-np.cos(a) * np.sin(b) * sx + np.cos(a) * np.cos(b) * sy),
+            -0.4 * (np.sin(a) * np.cos(b) * sx + np.sin(a) * np.sin(b) * sy),
+        ],
+    ]
+    return drho, d2rho
+
+
+class TestParameterizedState(unittest.TestCase):
+    x = [0.7, 0.3]
+
+    def test_first_order(self):
+        drho_ref = bloch_derivatives(self.x)[0]
+        for h in [1e-4, [1e-4, 2e-4]]:
+            with self.subTest(h=h):
+                rho, drho = parameterized_state(bloch, self.x, h=h)
+                np.testing.assert_allclose(rho, bloch(self.x))
+                np.testing.assert_allclose(drho, drho_ref, atol=1e-8)
+
+    def test_second_order(self):
+        drho_ref, d2rho_ref = bloch_derivatives(self.x)
+        rho, drho, d2rho = parameterized_state(bloch, self.x, h=1e-3, order=2)
+        np.testing.assert_allclose(drho, drho_ref, atol=1e-6)
+        np.testing.assert_allclose(d2rho, d2rho_ref, atol=1e-6)
+
+    def test_n_jobs(self):
+        res = parameterized_state(bloch, self.x, order=2)
+        res_jobs = parameterized_state(bloch, self.x, order=2, n_jobs=2)
+        for a, b in zip(res, res_jobs):
+            np.testing.assert_allclose(a, b)
+
+
+if __name__ == "__main__":
+    unittest.main()
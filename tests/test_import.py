@@ -0,0 +1,69 @@
+"""Import-time checks of the package."""
+
+import subprocess
+import sys
+import unittest
+
+# wall time allowed for `import quanestimation` in a fresh interpreter, the
+# NumPy-only import takes about 0.4 s while starting Julia takes several seconds
+IMPORT_BUDGET = 2.0
+
+# backends which are only loaded by the functions that use them
+HEAVY_MODULES = ["julia", "julia_project", "cvxpy", "sympy", "scipy.stats"]
+
+
+def run_python(code, *options):
+    return subprocess.run(
+        [sys.executable] + list(options) + ["-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_budget(self):
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import quanestimation\n"
+            "print(time.perf_counter() - start)\n"
+        )
+        # the best of three runs, to be robust against a busy machine
+        elapsed = min(float(run_python(code).stdout) for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+    def test_no_backend_loaded(self):
+        code = (
+            "import sys\n"
+            "import quanestimation\n"
+            "from quanestimation import QFIM, CFIM, BCRB, Bayes\n"
+            "print(' '.join(sys.modules))\n"
+        )
+        loaded = run_python(code).stdout.split()
+        for name in HEAVY_MODULES:
+            with self.subTest(module=name):
+                self.assertFalse(
+                    [m for m in loaded if m == name or m.startswith(name + ".")]
+                )
+
+    @unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs Python 3.7")
+    def test_importtime(self):
+        # every imported module is reported by -X importtime on stderr as
+        # "import time: self | cumulative | name"
+        for module in ["quanestimation", "quanestimation.AsymptoticBound.CramerRao"]:
+            report = run_python("import " + module, "-X", "importtime").stderr
+            imported = [
+                line.rsplit("|", 1)[-1].strip()
+                for line in report.splitlines()
+                if line.startswith("import time:")
+            ]
+            self.assertIn(module, imported)
+            for name in HEAVY_MODULES:
+                with self.subTest(module=module, backend=name):
+                    self.assertNotIn(name, imported)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Tests of the non-dynamical parameterization."""
+
+import unittest
+import numpy as np
+from quanestimation import Kraus, Kraus_batch, Kraus_repeated
+
+
+def amplitude_phase_channel(gamma, phi):
+    # amplitude damping followed by a phase shift, with the derivatives on
+    # gamma and phi
+    U = np.diag([1.0, np.exp(1j * phi)])
+    dU = np.diag([0.0, 1j * np.exp(1j * phi)])
+    A = [np.array([[1.0, 0.0], [0.0, np.sqrt(1 - gamma)]]), np.array([[0.0, np.sqrt(gamma)], [0.0, 0.0]])]
+    dA = [np.array([[0.0, 0.0], [0.0, -0.5 / np.sqrt(1 - gamma)]]), np.array([[0.0, 0.5 / np.sqrt(gamma)], [0.0, 0.0]])]
+    K = [U @ Ai for Ai in A]
+    dK = [[U @ dAi, dU @ Ai] for Ai, dAi in zip(A, dA)]
+    return K, dK
+
+
+def Kraus_sequence(rho0, K, dK, n):
+    # n sequential applications of the channel with the product rule
+    para_num = len(dK[0])
+    rho, drho = np.array(rho0, dtype=np.complex128), [np.zeros((2, 2), dtype=np.complex128)] * para_num
+    for _ in range(n):
+        rho_new, drho_ch = Kraus(rho, K, dK)
+        drho = [
+            drho_ch[a] + sum(Ki @ drho[a] @ Ki.conj().T for Ki in K)
+            for a in range(para_num)
+        ]
+        rho = rho_new
+    return rho, drho
+
+
+class TestKrausBatch(unittest.TestCase):
+    def test_against_Kraus(self):
+        rng = np.random.default_rng(0)
+        K, dK = amplitude_phase_channel(0.2, 0.5)
+        A = rng.normal(size=(6, 2, 2)) + 1j * rng.normal(size=(6, 2, 2))
+        rho0 = A @ A.conj().transpose(0, 2, 1)
+        rho0 = rho0 / np.trace(rho0, axis1=1, axis2=2)[:, None, None]
+        rho, drho = Kraus_batch(rho0, K, dK)
+        for n in range(len(rho0)):
+            rho_ref, drho_ref = Kraus(rho0[n], K, dK)
+            np.testing.assert_allclose(rho[n], rho_ref, atol=1e-12)
+            np.testing.assert_allclose(drho[n], drho_ref, atol=1e-12)
+
+
+class TestKrausRepeated(unittest.TestCase):
+    def setUp(self):
+        psi = np.array([1.0, 1.0]) / np.sqrt(2)
+        self.rho0 = np.outer(psi, psi.conj())
+        self.K, self.dK = amplitude_phase_channel(0.1, 0.3)
+
+    def test_multiparameter_scalar_n(self):
+        rho, drho = Kraus_repeated(self.rho0, self.K, self.dK, 5)
+        rho_ref, drho_ref = Kraus_sequence(self.rho0, self.K, self.dK, 5)
+        self.assertEqual(len(drho), 2)
+        np.testing.assert_allclose(rho, rho_ref, atol=1e-12)
+        np.testing.assert_allclose(drho, drho_ref, atol=1e-12)
+
+    def test_multiparameter_array_n(self):
+        n = np.array([0, 1, 2, 7, 12])
+        rho, drho = Kraus_repeated(self.rho0, self.K, self.dK, n)
+        self.assertEqual(drho.shape, (len(n), 2, 2, 2))
+        for i, ni in enumerate(n):
+            rho_ref, drho_ref = Kraus_sequence(self.rho0, self.K, self.dK, ni)
+            np.testing.assert_allclose(rho[i], rho_ref, atol=1e-12)
+            np.testing.assert_allclose(drho[i], drho_ref, atol=1e-12)
+
+    def test_single_parameter(self):
+        dK = [[dKi[0]] for dKi in self.dK]
+        rho, drho = Kraus_repeated(self.rho0, self.K, dK, 3)
+        rho_ref, drho_ref = Kraus_sequence(self.rho0, self.K, dK, 3)
+        np.testing.assert_allclose(rho, rho_ref, atol=1e-12)
+        np.testing.assert_allclose(drho, drho_ref, atol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()